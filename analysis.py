@@ -0,0 +1,134 @@
+"""Parse-and-check stage of an audit, inline or in a process pool
+
+Fetching is I/O-bound, but parsing the page and running the checks is
+pure-Python CPU work that holds the GIL, so audits running on threads stop
+scaling with cores. ``analyze_page`` is the whole CPU stage as one
+function of the fetched page: it takes the raw response and returns a
+compact ``Analysis``. ``audit_page`` runs it inline, or hands it to an
+``AnalysisPool`` of worker processes.
+
+The pool admits at most ``max_pending`` pages at a time. Audit threads
+that fetched a page block until a slot is free, so when analysis falls
+behind, fetching slows down instead of fetched pages piling up in memory.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from checks import AuditContext, run_checks
+from html_index import build_index
+from patterns import SIGNATURES, CUSTOM_GROUP
+
+
+class Analysis:
+    """Outcome of the CPU stage for one page
+
+    ``results`` is what ``run_checks`` returns, ``check_state`` the input
+    fingerprints for the next audit (``None`` unless state was kept) and
+    ``timings`` the seconds spent parsing and checking.
+    """
+
+    def __init__(self, index, results, check_state, timings):
+        self.index = index
+        self.results = results
+        self.check_state = check_state
+        self.timings = timings
+
+
+def analyze_page(url, response, index=None, assets=None, categories=None, skip_checks=(), max_cost=None,
+                 previous=None, keep_state=False, tls=None, parallel=True):
+    """Parse the page (unless ``index`` is given) and run the selected checks"""
+    timings = {}
+    if index is None:
+        start = time.perf_counter()
+        index = build_index(response.content, response.encoding)
+        timings['parse'] = time.perf_counter() - start
+
+    context = AuditContext(url, response, index, assets=assets, previous=previous, keep_state=keep_state, tls=tls)
+    start = time.perf_counter()
+    results = run_checks(context, categories, skip=skip_checks, max_cost=max_cost, parallel=parallel)
+    timings['checks'] = time.perf_counter() - start
+    return Analysis(index, results, context.check_state, timings)
+
+
+def _init_worker(signatures):
+    # Workers start from a fresh interpreter: add the signatures loaded from rules files
+    for signature in signatures:
+        SIGNATURES.add(signature)
+
+
+def _mp_context():
+    # Forking a process that runs threads can copy held locks; start workers from a clean server process
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class AnalysisPool:
+    """Runs ``analyze_page`` in worker processes with a bounded number of pages in flight
+
+    Workers are started on first use and load the custom signatures
+    registered at that point.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 2
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self):
+        """Pages being analyzed or waiting for a free worker"""
+        return self._pending
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context(),
+                                                     initializer=_init_worker,
+                                                     initargs=(SIGNATURES.by_group(CUSTOM_GROUP),))
+            return self._executor
+
+    def run(self, func, *args, **kwargs):
+        """``(result, waited)``: run ``func`` in a worker after waiting ``waited`` seconds for a slot"""
+        start = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._pending += 1
+        try:
+            executor = self._get_executor()
+            try:
+                return executor.submit(func, *args, **kwargs).result(), waited
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool for the next audits
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                executor.shutdown(wait=False)
+                raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def parse(self, content, encoding=None):
+        return self.run(build_index, content, encoding)[0]
+
+    def analyze(self, url, response, index=None, **options):
+        """``analyze_page`` in a worker; the time spent waiting for a slot is in ``timings['analysis_wait']``"""
+        # Checks run one after another in the worker; the pool provides the parallelism
+        analysis, waited = self.run(analyze_page, url, response, index, parallel=False, **options)
+        analysis.timings['analysis_wait'] = waited
+        return analysis
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
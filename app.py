@@ -1,513 +1,688 @@
-from flask import Flask, render_template, redirect, url_for, request, session, send_file
-from datetime import datetime
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-import requests
-import re
-import time
-from urllib.parse import urlparse
-import ssl
-import socket
-from bs4 import BeautifulSoup
+"""Flask front end and JSON API of the audit tool
+
+``create_app()`` builds the application; run it under a WSGI server with
+``gunicorn -c gunicorn.conf.py wsgi:app`` or, for development, ``python app.py``.
+Report rendering (ReportLab) is only imported when a PDF is first requested.
+"""
+from flask import Blueprint, Flask, render_template, redirect, url_for, request, session, send_file, jsonify, current_app, Response, stream_with_context
 import json
-import urllib3
-import hashlib
-from collections import Counter
+import os
+import secrets
+from jobs import JobQueue, QueueFull, DONE, FAILED
+from batch import run_batch, read_url_list
+from fetcher import Fetcher
+from audit import comprehensive_website_audit, audit_page
+from checks import parse_categories, parse_max_cost
+from functools import partial
+from result_store import open_result_store
+from report_pdf import PdfCache, count_findings, render_pdf, render_into_cache
+from io import BytesIO
+from audit_cache import AuditCache
+from crawler import Crawler
+from assets import AssetAnalyzer, AssetCache
+from patterns import SIGNATURES
+from history import AuditHistory, parse_time
+from metrics import METRICS
+from analysis import AnalysisPool
+from tls_inspector import TlsCache, TlsInspector
+from scheduler import ScheduleStore, Scheduler
+from exports import FORMATS, export, parse_format
+import uuid
 
-# Disable SSL warnings for testing
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+bp = Blueprint('web', __name__)
 
-app = Flask(__name__)
-app.secret_key = "your_secret_key"
 
-def comprehensive_website_audit(url):
-    """Comprehensive website audit covering security, performance, SEO, and accessibility"""
-    
-    # Ensure URL has protocol
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    audit_results = {
-        'url': url,
-        'scan_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'security': {'score': 0, 'findings': []},
-        'performance': {'score': 0, 'findings': []},
-        'seo': {'score': 0, 'findings': []},
-        'accessibility': {'score': 0, 'findings': []}
-    }
-    
-    try:
-        # Basic request with timeout
-        start_time = time.time()
-        response = requests.get(url, timeout=15, allow_redirects=True, verify=False)
-        load_time = time.time() - start_time
-        
-        # Parse HTML content
-        soup = BeautifulSoup(response.content, 'html.parser')
-        content = response.text.lower()
-        headers = response.headers
-        
-        # 1. SECURITY AUDIT
-        security_score = 100
-        security_findings = []
-        
-        # HTTPS Check
-        if not url.startswith('https://'):
-            security_score -= 25
-            security_findings.append({
-                'name': 'HTTPS Not Enabled',
-                'description': 'Website is not using secure HTTPS connection',
-                'fix_steps': [
-                    'Purchase and install SSL certificate',
-                    'Configure server to redirect HTTP to HTTPS',
-                    'Update all internal links to use HTTPS',
-                    'Test all functionality after HTTPS migration'
-                ]
-            })
-        
-        # Security Headers
-        security_headers = {
-            'X-Frame-Options': 'Missing X-Frame-Options header (clickjacking protection)',
-            'X-Content-Type-Options': 'Missing X-Content-Type-Options header (MIME sniffing protection)',
-            'X-XSS-Protection': 'Missing X-XSS-Protection header (XSS protection)',
-            'Strict-Transport-Security': 'Missing HSTS header (HTTPS enforcement)',
-            'Content-Security-Policy': 'Missing CSP header (content security policy)',
-            'Referrer-Policy': 'Missing Referrer-Policy header (referrer control)'
-        }
-        
-        for header, description in security_headers.items():
-            if header not in headers:
-                security_score -= 5
-                security_findings.append({
-                    'name': f'Missing {header}',
-                    'description': description,
-                    'fix_steps': [
-                        f'Add {header} header to server configuration',
-                        'Configure appropriate values for the header',
-                        'Test the header implementation',
-                        'Monitor for any functionality issues'
-                    ]
-                })
-        
-        # Server Information Disclosure
-        server_headers = ['Server', 'X-Powered-By', 'X-AspNet-Version']
-        for header in server_headers:
-            if header in headers:
-                security_score -= 3
-                security_findings.append({
-                    'name': f'Server Information Disclosure',
-                    'description': f'{header} header reveals server information: {headers[header]}',
-                    'fix_steps': [
-                        'Remove or modify server information headers',
-                        'Configure server to hide version information',
-                        'Use generic server names',
-                        'Regularly audit server configuration'
-                    ]
-                })
-        
-        # SQL Injection Patterns
-        sql_patterns = ['mysql_error', 'oracle error', 'sql server error', 'postgresql error']
-        for pattern in sql_patterns:
-            if pattern in content:
-                security_score -= 15
-                security_findings.append({
-                    'name': 'SQL Error Information Disclosure',
-                    'description': f'Database error information is exposed: {pattern}',
-                    'fix_steps': [
-                        'Implement proper error handling',
-                        'Use parameterized queries',
-                        'Configure custom error pages',
-                        'Enable error logging instead of user display'
-                    ]
-                })
-        
-        # XSS Vulnerabilities
-        xss_patterns = ['<script>', 'javascript:', 'onerror=', 'onload=']
-        for pattern in xss_patterns:
-            if pattern in content:
-                security_score -= 10
-                security_findings.append({
-                    'name': 'Potential XSS Vulnerability',
-                    'description': f'Potentially dangerous pattern found: {pattern}',
-                    'fix_steps': [
-                        'Sanitize all user inputs',
-                        'Use Content Security Policy (CSP)',
-                        'Implement output encoding',
-                        'Regular security testing'
-                    ]
-                })
-        
-        # 2. PERFORMANCE AUDIT
-        performance_score = 100
-        performance_findings = []
-        
-        # Page Load Time
-        if load_time > 3:
-            performance_score -= 20
-            performance_findings.append({
-                'name': 'Slow Page Load Time',
-                'description': f'Page takes {load_time:.2f} seconds to load (should be under 3 seconds)',
-                'fix_steps': [
-                    'Optimize server response time',
-                    'Minimize HTTP requests',
-                    'Enable compression (Gzip)',
-                    'Use CDN for static assets',
-                    'Optimize images and media files'
-                ]
-            })
-        elif load_time > 1.5:
-            performance_score -= 10
-            performance_findings.append({
-                'name': 'Moderate Page Load Time',
-                'description': f'Page takes {load_time:.2f} seconds to load (could be faster)',
-                'fix_steps': [
-                    'Optimize server configuration',
-                    'Reduce server-side processing',
-                    'Implement caching strategies',
-                    'Optimize database queries'
-                ]
-            })
-        
-        # Image Optimization
-        images = soup.find_all('img')
-        large_images = 0
-        for img in images:
-            if img.get('width') and img.get('height'):
-                width = int(img.get('width'))
-                height = int(img.get('height'))
-                if width > 1920 or height > 1080:
-                    large_images += 1
-        
-        if large_images > 0:
-            performance_score -= 10
-            performance_findings.append({
-                'name': 'Large Images Detected',
-                'description': f'Found {large_images} images that may be too large for web use',
-                'fix_steps': [
-                    'Resize images to appropriate dimensions',
-                    'Use responsive images with srcset',
-                    'Implement lazy loading',
-                    'Optimize image formats (WebP, AVIF)',
-                    'Use image compression tools'
-                ]
-            })
-        
-        # JavaScript and CSS Optimization
-        scripts = soup.find_all('script')
-        stylesheets = soup.find_all('link', rel='stylesheet')
-        
-        if len(scripts) > 10:
-            performance_score -= 5
-            performance_findings.append({
-                'name': 'Too Many JavaScript Files',
-                'description': f'Found {len(scripts)} script tags (consider bundling)',
-                'fix_steps': [
-                    'Bundle JavaScript files',
-                    'Minify JavaScript code',
-                    'Use async/defer attributes',
-                    'Remove unused JavaScript',
-                    'Implement code splitting'
-                ]
-            })
-        
-        if len(stylesheets) > 5:
-            performance_score -= 5
-            performance_findings.append({
-                'name': 'Too Many CSS Files',
-                'description': f'Found {len(stylesheets)} stylesheet links (consider bundling)',
-                'fix_steps': [
-                    'Bundle CSS files',
-                    'Minify CSS code',
-                    'Remove unused CSS',
-                    'Use critical CSS inline',
-                    'Implement CSS optimization'
-                ]
-            })
-        
-        # 3. SEO AUDIT
-        seo_score = 100
-        seo_findings = []
-        
-        # Title Tag
-        title = soup.find('title')
-        if not title or not title.text.strip():
-            seo_score -= 20
-            seo_findings.append({
-                'name': 'Missing Title Tag',
-                'description': 'Page has no title tag or empty title',
-                'fix_steps': [
-                    'Add a unique, descriptive title tag',
-                    'Keep title between 50-60 characters',
-                    'Include primary keyword naturally',
-                    'Make title compelling for users'
-                ]
-            })
-        elif len(title.text) > 60:
-            seo_score -= 10
-            seo_findings.append({
-                'name': 'Title Too Long',
-                'description': f'Title is {len(title.text)} characters (should be 50-60)',
-                'fix_steps': [
-                    'Shorten title to 50-60 characters',
-                    'Focus on primary keyword',
-                    'Make it compelling and clear',
-                    'Test in search results preview'
-                ]
-            })
-        
-        # Meta Description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if not meta_desc or not meta_desc.get('content'):
-            seo_score -= 15
-            seo_findings.append({
-                'name': 'Missing Meta Description',
-                'description': 'Page has no meta description',
-                'fix_steps': [
-                    'Add unique meta description',
-                    'Keep it between 150-160 characters',
-                    'Include primary keyword naturally',
-                    'Make it compelling for click-throughs'
-                ]
-            })
-        elif len(meta_desc.get('content', '')) > 160:
-            seo_score -= 5
-            seo_findings.append({
-                'name': 'Meta Description Too Long',
-                'description': f'Meta description is {len(meta_desc.get("content", ""))} characters',
-                'fix_steps': [
-                    'Shorten to 150-160 characters',
-                    'Focus on compelling description',
-                    'Include primary keyword',
-                    'Test in search results'
-                ]
-            })
-        
-        # Heading Structure
-        h1_tags = soup.find_all('h1')
-        if len(h1_tags) == 0:
-            seo_score -= 15
-            seo_findings.append({
-                'name': 'Missing H1 Tag',
-                'description': 'Page has no H1 heading tag',
-                'fix_steps': [
-                    'Add a single H1 tag per page',
-                    'Include primary keyword naturally',
-                    'Make it descriptive and compelling',
-                    'Ensure it matches page content'
-                ]
-            })
-        elif len(h1_tags) > 1:
-            seo_score -= 10
-            seo_findings.append({
-                'name': 'Multiple H1 Tags',
-                'description': f'Page has {len(h1_tags)} H1 tags (should have only one)',
-                'fix_steps': [
-                    'Use only one H1 tag per page',
-                    'Convert extra H1s to H2 or H3',
-                    'Maintain proper heading hierarchy',
-                    'Ensure H1 represents main topic'
-                ]
-            })
-        
-        # Alt Text for Images
-        images_without_alt = [img for img in images if not img.get('alt')]
-        if images_without_alt:
-            seo_score -= 10
-            seo_findings.append({
-                'name': 'Images Missing Alt Text',
-                'description': f'{len(images_without_alt)} images missing alt text',
-                'fix_steps': [
-                    'Add descriptive alt text to all images',
-                    'Include relevant keywords naturally',
-                    'Describe image content clearly',
-                    'Use alt="" for decorative images'
-                ]
-            })
-        
-        # 4. ACCESSIBILITY AUDIT
-        accessibility_score = 100
-        accessibility_findings = []
-        
-        # Alt Text Check (also affects accessibility)
-        if images_without_alt:
-            accessibility_score -= 15
-            accessibility_findings.append({
-                'name': 'Images Missing Alt Text',
-                'description': f'{len(images_without_alt)} images missing alt text for screen readers',
-                'fix_steps': [
-                    'Add descriptive alt text to all images',
-                    'Describe image content clearly',
-                    'Use alt="" for decorative images',
-                    'Test with screen readers'
-                ]
-            })
-        
-        # Form Labels
-        forms = soup.find_all('form')
-        for form in forms:
-            inputs = form.find_all('input')
-            for input_field in inputs:
-                if input_field.get('type') not in ['hidden', 'submit', 'button']:
-                    if not input_field.get('id') or not soup.find('label', attrs={'for': input_field.get('id')}):
-                        accessibility_score -= 5
-                        accessibility_findings.append({
-                            'name': 'Form Input Missing Label',
-                            'description': 'Form input field missing proper label association',
-                            'fix_steps': [
-                                'Add unique ID to input field',
-                                'Create label with matching "for" attribute',
-                                'Use descriptive label text',
-                                'Test with screen readers'
-                            ]
-                        })
-                        break
-        
-        # Color Contrast (basic check)
-        if 'color: #' in content or 'background-color: #' in content:
-            accessibility_score -= 5
-            accessibility_findings.append({
-                'name': 'Color Contrast Check Needed',
-                'description': 'Page uses custom colors - verify contrast ratios',
-                'fix_steps': [
-                    'Test color contrast ratios (4.5:1 minimum)',
-                    'Use high contrast color combinations',
-                    'Test with color blindness simulators',
-                    'Provide alternative color schemes'
-                ]
-            })
-        
-        # Keyboard Navigation
-        if not soup.find('a') and not soup.find('button'):
-            accessibility_score -= 10
-            accessibility_findings.append({
-                'name': 'Keyboard Navigation Issues',
-                'description': 'Page may have keyboard navigation problems',
-                'fix_steps': [
-                    'Ensure all interactive elements are keyboard accessible',
-                    'Add skip navigation links',
-                    'Test tab order and focus indicators',
-                    'Implement proper ARIA labels'
-                ]
-            })
-        
-        # Update scores
-        audit_results['security']['score'] = max(0, security_score)
-        audit_results['security']['findings'] = security_findings
-        audit_results['performance']['score'] = max(0, performance_score)
-        audit_results['performance']['findings'] = performance_findings
-        audit_results['seo']['score'] = max(0, seo_score)
-        audit_results['seo']['findings'] = seo_findings
-        audit_results['accessibility']['score'] = max(0, accessibility_score)
-        audit_results['accessibility']['findings'] = accessibility_findings
-        
-    except requests.exceptions.RequestException as e:
-        audit_results['error'] = f"Failed to access website: {str(e)}"
-        audit_results['security']['score'] = 0
-        audit_results['performance']['score'] = 0
-        audit_results['seo']['score'] = 0
-        audit_results['accessibility']['score'] = 0
-    
-    return audit_results
+def create_app(config=None):
+    """Build the Flask app; ``config`` overrides settings otherwise read from the environment
+
+    Shared services (job queue, fetcher, caches, stores) are created on first
+    use, so the app can be built before a pre-forking server forks workers.
+    """
+    app = Flask(__name__)
+    app.config.update(config or {})
+    app.config.setdefault('SECRET_KEY', os.environ.get('SECRET_KEY'))
+    app.config.setdefault('AUDIT_WORKERS', int(os.environ.get('AUDIT_WORKERS', 4)))
+    app.config.setdefault('AUDIT_MAX_QUEUE', int(os.environ.get('AUDIT_MAX_QUEUE', 32)))
+    app.config.setdefault('AUDIT_MAX_WAIT', float(os.environ.get('AUDIT_MAX_WAIT', 60)))
+    app.config.setdefault('FETCH_CONNECT_TIMEOUT', float(os.environ.get('FETCH_CONNECT_TIMEOUT', 5)))
+    app.config.setdefault('FETCH_READ_TIMEOUT', float(os.environ.get('FETCH_READ_TIMEOUT', 15)))
+    app.config.setdefault('FETCH_MAX_BYTES', int(os.environ.get('FETCH_MAX_BYTES', 5 * 1024 * 1024)))
+    app.config.setdefault('RESULT_STORE_URL', os.environ.get('RESULT_STORE_URL', 'sqlite:///audit_results.db'))
+    app.config.setdefault('RESULT_TTL', int(os.environ.get('RESULT_TTL', 86400)))
+    app.config.setdefault('PDF_CACHE_BYTES', int(os.environ.get('PDF_CACHE_BYTES', 64 * 1024 * 1024)))
+    app.config.setdefault('PDF_ASYNC_FINDINGS', int(os.environ.get('PDF_ASYNC_FINDINGS', 200)))
+    app.config.setdefault('AUDIT_CACHE_TTL', int(os.environ.get('AUDIT_CACHE_TTL', 300)))
+    app.config.setdefault('AUDIT_CACHE_ENTRIES', int(os.environ.get('AUDIT_CACHE_ENTRIES', 256)))
+    app.config.setdefault('AUDIT_CACHE_BYTES', int(os.environ.get('AUDIT_CACHE_BYTES', 64 * 1024 * 1024)))
+    app.config.setdefault('ASSET_CONCURRENCY', int(os.environ.get('ASSET_CONCURRENCY', 8)))
+    app.config.setdefault('ASSET_MAX_PER_PAGE', int(os.environ.get('ASSET_MAX_PER_PAGE', 100)))
+    app.config.setdefault('ASSET_CACHE_TTL', int(os.environ.get('ASSET_CACHE_TTL', 3600)))
+    app.config.setdefault('BATCH_MAX_URLS', int(os.environ.get('BATCH_MAX_URLS', 1000)))
+    app.config.setdefault('BATCH_MAX_CONCURRENCY', int(os.environ.get('BATCH_MAX_CONCURRENCY', 16)))
+    app.config.setdefault('CRAWL_MAX_PAGES', int(os.environ.get('CRAWL_MAX_PAGES', 500)))
+    app.config.setdefault('CRAWL_MAX_DEPTH', int(os.environ.get('CRAWL_MAX_DEPTH', 5)))
+    app.config.setdefault('ANALYSIS_WORKERS', int(os.environ.get('ANALYSIS_WORKERS', 0)))
+    app.config.setdefault('ANALYSIS_MAX_PENDING', int(os.environ.get('ANALYSIS_MAX_PENDING', 0)))
+    app.config.setdefault('TLS_CACHE_TTL', int(os.environ.get('TLS_CACHE_TTL', 3600)))
+    app.config.setdefault('TLS_TIMEOUT', float(os.environ.get('TLS_TIMEOUT', 5)))
+    app.config.setdefault('HISTORY_DB', os.environ.get('HISTORY_DB', 'audit_history.db'))
+    app.config.setdefault('SCHEDULE_DB', os.environ.get('SCHEDULE_DB', 'audit_schedules.db'))
+    app.config.setdefault('SCHEDULER_ENABLED', is_truthy(os.environ.get('SCHEDULER_ENABLED', '0')))
+    app.config.setdefault('SCHEDULER_WORKERS', int(os.environ.get('SCHEDULER_WORKERS', 2)))
+    app.config.setdefault('SCHEDULER_JITTER', float(os.environ.get('SCHEDULER_JITTER', 0.1)))
+    app.config.setdefault('ALERT_WEBHOOK', os.environ.get('ALERT_WEBHOOK'))
+    app.config.setdefault('AUDIT_RULES_FILE', os.environ.get('AUDIT_RULES_FILE'))
+
+    if not app.config['SECRET_KEY']:
+        # Sessions then only survive as long as this process and are not shared between workers
+        app.logger.warning('SECRET_KEY is not set; using a random key for this process')
+        app.config['SECRET_KEY'] = secrets.token_hex(32)
+
+    # Extra content signatures (see patterns.py) are compiled in alongside the built-in ones
+    if app.config['AUDIT_RULES_FILE']:
+        SIGNATURES.load_rules(app.config['AUDIT_RULES_FILE'])
+
+    app.register_blueprint(bp)
+    return app
 
 # Flask routes
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/enter-url', methods=['GET', 'POST'])
+@bp.route('/enter-url', methods=['GET', 'POST'])
 def enter_url():
     if request.method == 'POST':
         website_url = request.form['website_url']
         session['website_url'] = website_url
-        return redirect(url_for('scan'))
+        session['categories'] = request.form.get('categories') or request.args.get('categories', '')
+        session.pop('job_id', None)
+        return redirect(url_for('web.scan'))
     return render_template('enter_url.html')
 
-@app.route('/scan')
+def get_job_queue():
+    """Return the audit job queue for the current app, creating it on first use"""
+    queue = current_app.extensions.get('audit_jobs')
+    if queue is None:
+        queue = JobQueue(workers=current_app.config['AUDIT_WORKERS'],
+                         max_queue=current_app.config['AUDIT_MAX_QUEUE'],
+                         max_wait=current_app.config['AUDIT_MAX_WAIT'])
+        current_app.extensions['audit_jobs'] = queue
+    return queue
+
+def get_fetcher():
+    """Return the shared pooled fetcher for the current app"""
+    fetcher = current_app.extensions.get('audit_fetcher')
+    if fetcher is None:
+        fetcher = Fetcher(connect_timeout=current_app.config['FETCH_CONNECT_TIMEOUT'],
+                          read_timeout=current_app.config['FETCH_READ_TIMEOUT'],
+                          max_bytes=current_app.config['FETCH_MAX_BYTES'],
+                          pool_size=current_app.config['AUDIT_WORKERS'] + current_app.config['BATCH_MAX_CONCURRENCY']
+                          + current_app.config['SCHEDULER_WORKERS'])
+        current_app.extensions['audit_fetcher'] = fetcher
+    return fetcher
+
+def get_audit_cache():
+    """Return the URL-keyed fetch and result cache for the current app"""
+    cache = current_app.extensions.get('audit_cache')
+    if cache is None:
+        cache = AuditCache(ttl=current_app.config['AUDIT_CACHE_TTL'],
+                           max_entries=current_app.config['AUDIT_CACHE_ENTRIES'],
+                           max_bytes=current_app.config['AUDIT_CACHE_BYTES'])
+        current_app.extensions['audit_cache'] = cache
+    return cache
+
+def get_asset_analyzer():
+    """Return the asset analyzer, whose cache is shared by every audit in this app"""
+    analyzer = current_app.extensions.get('audit_assets')
+    if analyzer is None:
+        analyzer = AssetAnalyzer(get_fetcher(), cache=AssetCache(ttl=current_app.config['ASSET_CACHE_TTL']),
+                                 concurrency=current_app.config['ASSET_CONCURRENCY'],
+                                 max_assets=current_app.config['ASSET_MAX_PER_PAGE'])
+        current_app.extensions['audit_assets'] = analyzer
+    return analyzer
+
+def get_tls_inspector():
+    """Return the TLS inspector, whose per-host cache is shared by every audit in this app"""
+    inspector = current_app.extensions.get('audit_tls')
+    if inspector is None:
+        inspector = TlsInspector(cache=TlsCache(ttl=current_app.config['TLS_CACHE_TTL']),
+                                 timeout=current_app.config['TLS_TIMEOUT'])
+        current_app.extensions['audit_tls'] = inspector
+    return inspector
+
+def get_analysis_pool():
+    """Return the process pool that parses pages and runs checks, or None to run them on the audit thread"""
+    if not current_app.config['ANALYSIS_WORKERS']:
+        return None
+    pool = current_app.extensions.get('audit_analysis')
+    if pool is None:
+        pool = AnalysisPool(workers=current_app.config['ANALYSIS_WORKERS'],
+                            max_pending=current_app.config['ANALYSIS_MAX_PENDING'] or None)
+        current_app.extensions['audit_analysis'] = pool
+    return pool
+
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+def request_payload():
+    """The request's JSON object, or its form fields; ``None`` when the JSON body is not an object"""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return request.form
+    return payload if isinstance(payload, dict) else None
+
+def audit_options(params):
+    """Build audit keyword arguments from request parameters; raises ValueError on bad input"""
+    return {
+        'fetcher': get_fetcher(),
+        'cache': get_audit_cache(),
+        'categories': parse_categories(params.get('categories')),
+        'max_cost': parse_max_cost(params.get('max_cost')),
+        'force_refresh': is_truthy(params.get('force_refresh')),
+        'assets': get_asset_analyzer() if is_truthy(params.get('assets')) else None,
+        'analysis': get_analysis_pool(),
+        'tls': get_tls_inspector() if is_truthy(params.get('tls', True)) else None,
+        'profile': is_truthy(params.get('profile')),
+    }
+
+def get_result_store():
+    """Return the server-side audit result store for the current app"""
+    store = current_app.extensions.get('audit_results')
+    if store is None:
+        store = open_result_store(current_app.config['RESULT_STORE_URL'], ttl=current_app.config['RESULT_TTL'])
+        current_app.extensions['audit_results'] = store
+    return store
+
+def get_history():
+    """Return the long-term audit history for the current app"""
+    history = current_app.extensions.get('audit_history')
+    if history is None:
+        history = AuditHistory(current_app.config['HISTORY_DB'])
+        current_app.extensions['audit_history'] = history
+    return history
+
+def run_and_store_audit(store, history, audit_id, website_url, **options):
+    """Job body: run the audit, persist the result and its history entry, and return its audit ID"""
+    audit_results = comprehensive_website_audit(website_url, **options)
+    store.put(audit_id, audit_results)
+    history.record(audit_id, audit_results)
+    return audit_id
+
+def get_schedule_store():
+    """Return the store of recurring audit schedules and their alerts"""
+    store = current_app.extensions.get('audit_schedules')
+    if store is None:
+        store = ScheduleStore(current_app.config['SCHEDULE_DB'])
+        current_app.extensions['audit_schedules'] = store
+    return store
+
+def get_scheduler():
+    """Return the running scheduler of recurring audits, starting it on first use"""
+    scheduler = current_app.extensions.get('audit_scheduler')
+    if scheduler is None:
+        # Scheduled runs compare against the previous scan, so they never reuse a cached result
+        audit = partial(comprehensive_website_audit, **audit_options({'force_refresh': True}))
+        scheduler = Scheduler(get_schedule_store(), audit, get_history(),
+                              workers=current_app.config['SCHEDULER_WORKERS'],
+                              jitter=current_app.config['SCHEDULER_JITTER'],
+                              webhook=current_app.config['ALERT_WEBHOOK'])
+        current_app.extensions['audit_scheduler'] = scheduler.start()
+    return scheduler
+
+@bp.before_app_request
+def start_scheduler():
+    # Started from the first request rather than create_app() so pre-forking servers start it in each worker
+    if current_app.config['SCHEDULER_ENABLED']:
+        get_scheduler()
+
+def submit_audit(website_url, options):
+    """Queue an audit for the URL and return its job; the job result is the audit ID"""
+    return get_job_queue().submit(run_and_store_audit, get_result_store(), get_history(), uuid.uuid4().hex,
+                                  website_url, **options)
+
+def get_pdf_cache():
+    """Return the rendered-PDF cache for the current app"""
+    cache = current_app.extensions.get('audit_pdfs')
+    if cache is None:
+        cache = PdfCache(max_bytes=current_app.config['PDF_CACHE_BYTES'])
+        current_app.extensions['audit_pdfs'] = cache
+    return cache
+
+def load_session_results():
+    """Load the audit result referenced by the session, or None when missing or expired"""
+    audit_id = session.get('audit_id')
+    if not audit_id:
+        return None
+    return get_result_store().get(audit_id)
+
+@bp.route('/scan')
 def scan():
-    return render_template('scan.html')
+    website_url = session.get('website_url', '')
+    if not website_url:
+        return redirect(url_for('web.enter_url'))
+    
+    job = get_job_queue().get(session.get('job_id', ''))
+    if job is None or job.status == FAILED:
+        try:
+            params = request.args.to_dict()
+            params.setdefault('categories', session.get('categories'))
+            job = submit_audit(website_url, audit_options(params))
+        except ValueError as e:
+            return render_template('enter_url.html', error=str(e)), 400
+        except QueueFull:
+            return render_template('enter_url.html',
+                                   error='The audit service is busy right now. Please try again in a minute.'), 503
+        session['job_id'] = job.id
+    
+    return render_template('scan.html', job_id=job.id)
 
-@app.route('/processing')
+@bp.route('/processing')
 def processing():
     website_url = session.get('website_url', '')
     if not website_url:
-        return redirect(url_for('enter_url'))
+        return redirect(url_for('web.enter_url'))
     
-    # Perform comprehensive audit
-    audit_results = comprehensive_website_audit(website_url)
-    session['audit_results'] = audit_results
+    job = get_job_queue().get(session.get('job_id', ''))
+    if job is None:
+        return redirect(url_for('web.scan'))
+    if job.status == FAILED:
+        session.pop('job_id', None)
+        return render_template('enter_url.html', error=f'Audit failed: {job.error}'), 500
+    if job.status != DONE:
+        return render_template('processing.html', job_id=job.id)
     
-    return redirect(url_for('report'))
+    session['audit_id'] = job.result
+    return redirect(url_for('web.report'))
 
-@app.route('/report')
-def report():
-    website_url = session.get('website_url', 'Unknown URL')
-    audit_results = session.get('audit_results', {})
+@bp.route('/api/audits', methods=['POST'])
+def api_submit_audit():
+    payload = request_payload()
+    if payload is None:
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    website_url = payload.get('url', '')
+    if not website_url:
+        return jsonify({'error': 'Missing "url"'}), 400
+    
+    try:
+        job = submit_audit(website_url, audit_options(payload))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '30'}
+    
+    return jsonify({
+        'id': job.id,
+        'status': job.status,
+        'status_url': url_for('web.api_audit_status', job_id=job.id),
+        'result_url': url_for('web.api_audit_result', job_id=job.id)
+    }), 202
+
+@bp.route('/api/audits/<job_id>')
+def api_audit_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown audit job'}), 404
+    
+    status = job.to_dict()
+    status['queue_depth'] = get_job_queue().depth
+    if job.status == DONE:
+        status['audit_id'] = job.result
+    return jsonify(status)
+
+@bp.route('/api/audits/<job_id>/result')
+def api_audit_result(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown audit job'}), 404
+    if job.status == FAILED:
+        return jsonify(job.to_dict()), 500
+    if job.status != DONE:
+        return jsonify(job.to_dict()), 202
+    
+    audit_results = get_result_store().get(job.result)
+    if audit_results is None:
+        return jsonify({'error': 'Audit result has expired'}), 410
+    return jsonify(audit_results)
+
+def export_response(results, fmt, name):
+    """Stream an iterable of audit results as a downloadable ``fmt`` export"""
+    return Response(stream_with_context(export(results, fmt)), mimetype=FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'})
+
+@bp.route('/api/audits/<job_id>/export')
+def api_audit_export(job_id):
+    """The finished audit as JSON, NDJSON, CSV or SARIF (``?format=``, default JSON)"""
+    try:
+        fmt = parse_format(request.args.get('format'), 'json')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown audit job'}), 404
+    if job.status == FAILED:
+        return jsonify(job.to_dict()), 500
+    if job.status != DONE:
+        return jsonify(job.to_dict()), 202
+    
+    audit_results = get_result_store().get(job.result)
+    if audit_results is None:
+        return jsonify({'error': 'Audit result has expired'}), 410
+    return export_response([audit_results], fmt, f'audit-{job.result}')
+
+@bp.route('/api/batch', methods=['POST'])
+def api_batch():
+    """Audit a list of URLs and stream each result back as NDJSON, or as an export with ``format``"""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        urls = list(read_url_list(request.get_data(as_text=True).splitlines()))
+        payload = request.args
+    elif not isinstance(payload, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    else:
+        urls = payload.get('urls') or []
+    
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        return jsonify({'error': '"urls" must be a list of URL strings'}), 400
+    if not urls:
+        return jsonify({'error': 'No URLs supplied'}), 400
+    if len(urls) > current_app.config['BATCH_MAX_URLS']:
+        return jsonify({'error': f'Too many URLs (limit {current_app.config["BATCH_MAX_URLS"]})'}), 413
+    
+    try:
+        concurrency = min(int(payload.get('concurrency', 8)), current_app.config['BATCH_MAX_CONCURRENCY'])
+        per_host = int(payload.get('per_host', 2))
+        audit = partial(comprehensive_website_audit, **audit_options(payload))
+        fmt = parse_format(payload.get('format') or request.args.get('format'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    history = get_history()
+    
+    def results():
+        for result in run_batch(urls, audit, concurrency=concurrency, per_host=per_host):
+            history.record(uuid.uuid4().hex, result)
+            yield result
+    
+    if fmt:
+        return export_response(results(), fmt, 'batch')
+    return Response(stream_with_context(json.dumps(result) + '\n' for result in results()),
+                    mimetype='application/x-ndjson')
+
+@bp.route('/api/crawl', methods=['POST'])
+def api_crawl():
+    """Crawl a site from the given URL, streaming one NDJSON record per page and a final summary"""
+    payload = request_payload()
+    if payload is None:
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    website_url = payload.get('url', '')
+    if not website_url:
+        return jsonify({'error': 'Missing "url"'}), 400
+    
+    try:
+        options = audit_options(payload)
+        max_pages = max(1, min(int(payload.get('max_pages', 50)), current_app.config['CRAWL_MAX_PAGES']))
+        max_depth = max(0, min(int(payload.get('max_depth', 2)), current_app.config['CRAWL_MAX_DEPTH']))
+        concurrency = max(1, min(int(payload.get('concurrency', 4)), current_app.config['BATCH_MAX_CONCURRENCY']))
+        rate = float(payload.get('rate', 2.0))
+        if not rate > 0:
+            raise ValueError('"rate" must be a positive number of requests per second')
+        fmt = parse_format(payload.get('format') or request.args.get('format'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    crawler = Crawler(website_url, partial(audit_page, **options), fetcher=options['fetcher'],
+                      max_depth=max_depth, max_pages=max_pages, concurrency=concurrency, rate=rate,
+                      use_sitemap=is_truthy(payload.get('sitemap', False)),
+                      obey_robots=is_truthy(payload.get('robots', True)), categories=options['categories'])
     
+    history = get_history()
+    
+    if fmt:
+        # Exports carry the audited pages; the crawl summary is only in the NDJSON stream
+        def pages():
+            for _, result in crawler.crawl():
+                history.record(uuid.uuid4().hex, result)
+                yield result
+        return export_response(pages(), fmt, 'crawl')
+    
+    def generate():
+        for depth, result in crawler.crawl():
+            history.record(uuid.uuid4().hex, result)
+            yield json.dumps({'type': 'page', 'depth': depth, 'result': result}) + '\n'
+        yield json.dumps({'type': 'summary', 'summary': crawler.summary.to_dict()}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def history_url(value):
+    """Normalize a ``url`` query parameter the same way audits normalize the URL they store"""
+    if value and not value.startswith(('http://', 'https://')):
+        value = 'https://' + value
+    return value
+
+@bp.route('/api/history')
+def api_history():
+    """Stored scans of one URL, newest first"""
+    url = history_url(request.args.get('url', ''))
+    if not url:
+        return jsonify({'error': 'Missing "url"'}), 400
+    try:
+        scans = get_history().scans(url, since=parse_time(request.args.get('since')),
+                                    until=parse_time(request.args.get('until')),
+                                    limit=min(int(request.args.get('limit', 100)), 1000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'url': url, 'scans': scans})
+
+@bp.route('/api/history/series')
+def api_history_series():
+    """Per-category score time series for one URL"""
+    url = history_url(request.args.get('url', ''))
+    if not url:
+        return jsonify({'error': 'Missing "url"'}), 400
+    try:
+        series = get_history().series(url, categories=parse_categories(request.args.get('categories')),
+                                      since=parse_time(request.args.get('since')),
+                                      until=parse_time(request.args.get('until')),
+                                      limit=min(int(request.args.get('limit', 1000)), 10000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'url': url, 'series': series})
+
+@bp.route('/api/history/diff')
+def api_history_diff():
+    """Finding-level diff between two scans; defaults to the two latest scans of ``url``"""
+    old_id, new_id = request.args.get('from'), request.args.get('to')
+    if not (old_id and new_id):
+        url = history_url(request.args.get('url', ''))
+        if not url:
+            return jsonify({'error': 'Pass "from" and "to" audit IDs, or a "url"'}), 400
+        latest = get_history().latest_two(url)
+        if len(latest) < 2:
+            return jsonify({'error': 'Fewer than two successful scans of this URL'}), 404
+        old_id, new_id = old_id or latest[0], new_id or latest[1]
+    
+    diff = get_history().diff(old_id, new_id)
+    if diff is None:
+        return jsonify({'error': 'Unknown audit ID'}), 404
+    return jsonify(diff)
+
+@bp.route('/api/history/aggregate')
+def api_history_aggregate():
+    """Score statistics and most common findings across all stored audits"""
+    try:
+        aggregate = get_history().aggregate(since=parse_time(request.args.get('since')),
+                                            until=parse_time(request.args.get('until')),
+                                            top=min(int(request.args.get('top', 10)), 100))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(aggregate)
+
+@bp.route('/api/history/export')
+def api_history_export():
+    """Stored scans of one URL, newest first, as JSON, NDJSON, CSV or SARIF"""
+    url = history_url(request.args.get('url', ''))
+    if not url:
+        return jsonify({'error': 'Missing "url"'}), 400
+    history = get_history()
+    try:
+        fmt = parse_format(request.args.get('format'), 'json')
+        scans = history.scans(url, since=parse_time(request.args.get('since')),
+                              until=parse_time(request.args.get('until')),
+                              limit=min(int(request.args.get('limit', 100)), 10000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # One stored result in memory at a time
+    def results():
+        for scan in scans:
+            _, audit_results = history.load(scan['audit_id'])
+            if audit_results is not None:
+                yield audit_results
+    
+    return export_response(results(), fmt, 'history')
+
+@bp.route('/api/schedules', methods=['GET', 'POST'])
+def api_schedules():
+    """List schedules (``?url=`` to filter), or register a URL for recurring audits"""
+    store = get_schedule_store()
+    if request.method == 'GET':
+        try:
+            schedules = store.schedules(url=history_url(request.args.get('url', '')) or None,
+                                        limit=min(int(request.args.get('limit', 100)), 1000),
+                                        offset=int(request.args.get('offset', 0)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'schedules': schedules})
+    
+    payload = request_payload()
+    if payload is None:
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    website_url = history_url(payload.get('url', ''))
+    if not website_url:
+        return jsonify({'error': 'Missing "url"'}), 400
+    try:
+        schedule = store.add(website_url, payload.get('interval', '1d'), categories=payload.get('categories'),
+                             thresholds=payload.get('thresholds'), webhook=payload.get('webhook'),
+                             jitter=current_app.config['SCHEDULER_JITTER'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(schedule), 201, {'Location': url_for('web.api_schedule', schedule_id=schedule['id'])}
+
+@bp.route('/api/schedules/<schedule_id>', methods=['GET', 'PATCH', 'DELETE'])
+def api_schedule(schedule_id):
+    """One schedule; PATCH ``{"enabled": false}`` pauses it, DELETE removes it"""
+    store = get_schedule_store()
+    if request.method == 'DELETE':
+        if not store.remove(schedule_id):
+            return jsonify({'error': 'Unknown schedule'}), 404
+        return '', 204
+    if request.method == 'PATCH':
+        payload = request_payload()
+        if payload is None:
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        if 'enabled' in payload and not store.set_enabled(schedule_id, is_truthy(payload['enabled'])):
+            return jsonify({'error': 'Unknown schedule'}), 404
+    
+    schedule = store.get(schedule_id)
+    if schedule is None:
+        return jsonify({'error': 'Unknown schedule'}), 404
+    return jsonify(schedule)
+
+@bp.route('/api/alerts')
+def api_alerts():
+    """Alerts raised by scheduled audits, newest first (``?schedule_id=``, ``?since=``)"""
+    try:
+        alerts = get_schedule_store().alerts(schedule_id=request.args.get('schedule_id'),
+                                             since=parse_time(request.args.get('since')),
+                                             limit=min(int(request.args.get('limit', 100)), 1000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'alerts': alerts})
+
+@bp.route('/metrics')
+def metrics():
+    """Stage latency quantiles, audit counters and queue/cache gauges in the Prometheus text format"""
+    extensions = current_app.extensions
+    queue = extensions.get('audit_jobs')
+    cache = extensions.get('audit_cache')
+    assets = extensions.get('audit_assets')
+    analysis = extensions.get('audit_analysis')
+    tls = extensions.get('audit_tls')
+    scheduler = extensions.get('audit_scheduler')
+    asset_cache = assets.cache if assets is not None else None
+    gauges = [
+        ('audit_queue_depth', 'Audit jobs waiting for a worker', queue.depth if queue is not None else None),
+        ('analysis_pending', 'Pages being analyzed or waiting for an analysis worker',
+         analysis.pending if analysis is not None else None),
+        ('audit_cache_hit_rate', 'Share of audits served or revalidated from the audit cache',
+         round(cache.hit_rate(), 4) if cache is not None else None),
+        ('asset_cache_hits', 'Asset probes answered from the asset cache',
+         asset_cache.hits if asset_cache is not None else None),
+        ('asset_cache_misses', 'Asset probes that went to the network',
+         asset_cache.misses if asset_cache is not None else None),
+        ('tls_cache_hits', 'Audits that reused a cached TLS inspection of their host',
+         tls.cache.hits if tls is not None else None),
+        ('tls_cache_misses', 'TLS inspections started', tls.cache.misses if tls is not None else None),
+        ('scheduled_audits_running', 'Scheduled audits in progress',
+         scheduler.running if scheduler is not None else None),
+    ]
+    return Response(METRICS.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/report')
+def report():
+    audit_results = load_session_results()
     if not audit_results:
-        return redirect(url_for('enter_url'))
+        return redirect(url_for('web.enter_url'))
+    website_url = audit_results.get('url', session.get('website_url', 'Unknown URL'))
     
     return render_template('report_generated.html', 
                          website_url=website_url,
                          audit_results=audit_results)
 
-@app.route('/download-report')
+@bp.route('/export')
+def export_report():
+    """Download the session's audit as JSON, NDJSON, CSV or SARIF"""
+    audit_results = load_session_results()
+    if not audit_results:
+        return redirect(url_for('web.enter_url'))
+    try:
+        fmt = parse_format(request.args.get('format'), 'json')
+    except ValueError as e:
+        return str(e), 400
+    return export_response([audit_results], fmt, 'comprehensive_website_audit')
+
+@bp.route('/download-report')
 def download_report():
-    website_url = session.get('website_url', 'Unknown URL')
-    audit_results = session.get('audit_results', {})
-    
+    audit_results = load_session_results()
     if not audit_results:
-        return redirect(url_for('enter_url'))
-    
-    pdf_file = "comprehensive_website_audit_report.pdf"
-    doc = SimpleDocTemplate(pdf_file, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Title
-    story.append(Paragraph("Comprehensive Website Audit Report", styles['Title']))
-    story.append(Spacer(1, 12))
-    story.append(Paragraph("WebAudit.com - Professional Website Analysis", styles['Normal']))
-    story.append(Spacer(1, 20))
-    
-    # Meta info
-    story.append(Paragraph(f"URL: {website_url}", styles['Normal']))
-    story.append(Paragraph(f"Scan Date: {audit_results.get('scan_time', 'Unknown')}", styles['Normal']))
-    story.append(Spacer(1, 20))
-    
-    # Overall Scores
-    story.append(Paragraph("Overall Audit Scores", styles['Heading1']))
-    story.append(Spacer(1, 12))
+        return redirect(url_for('web.enter_url'))
+    website_url = audit_results.get('url', session.get('website_url', 'Unknown URL'))
     
-    categories = ['security', 'performance', 'seo', 'accessibility']
-    category_names = ['Security', 'Performance', 'SEO', 'Accessibility']
+    cache = get_pdf_cache()
+    key = PdfCache.key(session['audit_id'], audit_results)
+    pdf = cache.get(key)
     
-    for i, category in enumerate(categories):
-        score = audit_results.get(category, {}).get('score', 0)
-        story.append(Paragraph(f"{category_names[i]}: {score}/100", styles['Heading2']))
-        story.append(Spacer(1, 12))
+    # Large reports are rendered by a background job while the browser polls
+    if pdf is None and count_findings(audit_results) > current_app.config['PDF_ASYNC_FINDINGS']:
+        job = get_job_queue().get(session.pop('pdf_job_id', ''))
+        if job is None:
+            try:
+                job = get_job_queue().submit(render_into_cache, cache, key, audit_results, website_url)
+            except QueueFull:
+                pass
+        if job is not None and job.status not in (DONE, FAILED):
+            session['pdf_job_id'] = job.id
+            return render_template('processing.html', job_id=job.id, next_url=url_for('web.download_report'))
+        pdf = cache.get(key)
     
-    # Detailed Findings
-    for category in categories:
-        category_name = category_names[categories.index(category)]
-        findings = audit_results.get(category, {}).get('findings', [])
-        
-        if findings:
-            story.append(Paragraph(f"{category_name} Findings", styles['Heading1']))
-            story.append(Spacer(1, 12))
-            
-            for finding in findings:
-                story.append(Paragraph(finding['name'], styles['Heading3']))
-                story.append(Paragraph(finding['description'], styles['Normal']))
-                story.append(Paragraph("Steps to Fix:", styles['Heading4']))
-                
-                for i, step in enumerate(finding['fix_steps'], 1):
-                    story.append(Paragraph(f"{i}. {step}", styles['Normal']))
-                
-                story.append(Spacer(1, 12))
+    if pdf is None:
+        with METRICS.timed('report.render'):
+            pdf = render_pdf(audit_results, website_url)
+        cache.put(key, pdf)
     
-    doc.build(story)
-    return send_file(pdf_file, as_attachment=True)
+    return send_file(BytesIO(pdf), mimetype='application/pdf', as_attachment=True,
+                     download_name='comprehensive_website_audit_report.pdf')
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
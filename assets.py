@@ -0,0 +1,143 @@
+"""Optional asset pass: real transfer sizes, compression and caching of subresources
+
+``AssetAnalyzer`` inspects the images, scripts and stylesheets a page
+references. Each asset is probed with ``HEAD`` first, then a one-byte
+``Range`` request, and only falls back to a streamed ``GET`` (counting
+bytes, capped) when the server reports no size. Results are kept in a shared
+``AssetCache`` so pages of one site that reference the same bundle only pay
+for it once.
+"""
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urldefrag
+
+import requests
+
+from storage import LRUCache
+
+ACCEPT_ENCODING = 'gzip, deflate, br'
+CONTENT_RANGE_TOTAL = re.compile(r'/(\d+)\s*$')
+
+
+class AssetCache:
+    """Thread-safe LRU of asset probe results with a TTL"""
+
+    def __init__(self, ttl=3600, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = LRUCache(max_entries=max_entries)
+
+    @property
+    def hits(self):
+        return self._entries.hits
+
+    @property
+    def misses(self):
+        return self._entries.misses
+
+    def get(self, url):
+        return self._entries.get(url)
+
+    def put(self, url, info):
+        self._entries.put(url, info, ttl=self.ttl)
+
+
+class AssetAnalyzer:
+    """Probes page assets concurrently through a fetcher's pooled session"""
+
+    def __init__(self, fetcher, cache=None, concurrency=8, max_assets=100, max_asset_bytes=10 * 1024 * 1024):
+        self.session = fetcher.session
+        self.timeout = fetcher.timeout
+        self.verify = fetcher.verify
+        self.cache = cache if cache is not None else AssetCache()
+        self.max_assets = max_assets
+        self.max_asset_bytes = max_asset_bytes
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='audit-asset')
+
+    def analyze(self, base_url, index):
+        """Return one info dict per distinct asset referenced by ``index``"""
+        assets = OrderedDict()
+        for kind, refs in (('image', [img.get('src') for img in index.images]),
+                           ('script', index.scripts),
+                           ('stylesheet', index.stylesheets)):
+            for ref in refs:
+                if not ref or ref.startswith('data:'):
+                    continue
+                url = urldefrag(urljoin(base_url, ref))[0]
+                if url.startswith(('http://', 'https://')):
+                    assets.setdefault(url, kind)
+
+        selected = list(assets.items())[:self.max_assets]
+        futures = [self._executor.submit(self._probe_cached, url, kind) for url, kind in selected]
+        return [future.result() for future in futures]
+
+    def _probe_cached(self, url, kind):
+        info = self.cache.get(url)
+        if info is None:
+            info = self._probe(url)
+            self.cache.put(url, info)
+        return dict(info, type=kind)
+
+    def _probe(self, url):
+        headers = {'Accept-Encoding': ACCEPT_ENCODING}
+        info = {'url': url, 'status': None, 'size': None, 'encoding': None, 'cache_control': None,
+                'content_type': None, 'method': None}
+        try:
+            response = self.session.head(url, headers=headers, timeout=self.timeout, verify=self.verify,
+                                         allow_redirects=True)
+            self._read_headers(info, response, 'HEAD')
+            if response.status_code < 400 and response.headers.get('Content-Length'):
+                info['size'] = int(response.headers['Content-Length'])
+                return info
+
+            response = self.session.get(url, headers=dict(headers, Range='bytes=0-0'), timeout=self.timeout,
+                                        verify=self.verify, stream=True)
+            with response:
+                self._read_headers(info, response, 'RANGE')
+                total = CONTENT_RANGE_TOTAL.search(response.headers.get('Content-Range', ''))
+                if response.status_code == 206 and total:
+                    info['size'] = int(total.group(1))
+                    return info
+                if response.status_code >= 400:
+                    return info
+
+                # Server ignored the range: count the transferred (still encoded) bytes
+                info['method'] = 'GET'
+                size = 0
+                for chunk in response.raw.stream(64 * 1024, decode_content=False):
+                    size += len(chunk)
+                    if size > self.max_asset_bytes:
+                        break
+                info['size'] = size
+        except (requests.exceptions.RequestException, ValueError) as e:
+            info['error'] = str(e)
+        return info
+
+    @staticmethod
+    def _read_headers(info, response, method):
+        info['method'] = method
+        info['status'] = response.status_code
+        info['encoding'] = response.headers.get('Content-Encoding')
+        info['cache_control'] = response.headers.get('Cache-Control')
+        info['content_type'] = response.headers.get('Content-Type')
+
+
+def summarize_assets(assets, html_bytes, top=5):
+    """Page-weight summary for the audit result"""
+    by_type = {}
+    total = html_bytes
+    for asset in assets:
+        size = asset.get('size') or 0
+        total += size
+        stats = by_type.setdefault(asset['type'], {'count': 0, 'bytes': 0})
+        stats['count'] += 1
+        stats['bytes'] += size
+    heaviest = sorted((a for a in assets if a.get('size')), key=lambda a: a['size'], reverse=True)[:top]
+    return {
+        'total_bytes': total,
+        'html_bytes': html_bytes,
+        'asset_count': len(assets),
+        'by_type': by_type,
+        'heaviest': [{'url': a['url'], 'type': a['type'], 'bytes': a['size']} for a in heaviest],
+    }
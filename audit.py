@@ -0,0 +1,199 @@
+import copy
+from datetime import datetime
+
+import requests
+
+from assets import summarize_assets
+from tls_inspector import summarize_tls
+from analysis import analyze_page
+from audit_cache import CacheEntry, HIT, REVALIDATED, UNCHANGED, MISS, BYPASS, body_hash
+from checks import parse_categories, summarize
+from fetcher import FetchResult, default_fetcher
+from html_index import build_index
+from metrics import METRICS, Spans, profile_call
+
+
+def comprehensive_website_audit(url, fetcher=None, categories=None, skip_checks=(), max_cost=None,
+                                cache=None, force_refresh=False, assets=None, analysis=None, tls=None,
+                                profile=False):
+    """Comprehensive website audit covering security, performance, SEO, and accessibility
+
+    ``categories`` limits the audit to some of the categories (list or
+    comma-separated string), ``skip_checks`` names individual checks to leave
+    out and ``max_cost='cheap'`` skips checks registered as expensive.
+
+    With an ``AuditCache``, fresh results for the same URL and options are
+    returned without fetching, and stale ones are revalidated with a
+    conditional request, and checks whose inputs are unchanged since the
+    cached audit reuse their findings (see the ``reuse`` block and the
+    ``reused`` flag of each entry in ``checks``). ``force_refresh`` bypasses
+    the cache lookup. The result's ``cache`` block says how it was produced.
+
+    Passing an ``AssetAnalyzer`` as ``assets`` enables the asset pass, which
+    measures the page's images, scripts and stylesheets and adds a
+    ``page_weight`` block plus the asset-based performance checks.
+
+    With an ``AnalysisPool`` as ``analysis``, parsing and the checks run in
+    its worker processes while this thread only fetches; otherwise they run
+    inline.
+
+    Passing a ``TlsInspector`` as ``tls`` inspects the certificate,
+    protocol and cipher of HTTPS hosts while the page is fetched, adds a
+    ``tls`` block and enables the TLS security checks.
+
+    Every result has a ``timings`` block with the seconds spent in each
+    stage (``dns``, ``connect``, ``tls``, ``wait``, ``download``, ``parse``,
+    ``assets``, ``checks`` and per-category check time). With
+    ``profile=True`` the audit runs under cProfile and the result gains a
+    ``profile`` list of the most expensive functions.
+    """
+    return audit_page(url, fetcher=fetcher, categories=categories, skip_checks=skip_checks,
+                      max_cost=max_cost, cache=cache, force_refresh=force_refresh, assets=assets,
+                      analysis=analysis, tls=tls, profile=profile)[0]
+
+
+def audit_page(url, fetcher=None, categories=None, skip_checks=(), max_cost=None,
+               cache=None, force_refresh=False, assets=None, analysis=None, tls=None, profile=False):
+    """Run the audit and return ``(audit_results, page_index)``
+
+    The page index is ``None`` when the page could not be fetched. Crawlers
+    use it to discover links without parsing the page a second time.
+    """
+    options = dict(fetcher=fetcher, categories=categories, skip_checks=skip_checks, max_cost=max_cost,
+                   cache=cache, force_refresh=force_refresh, assets=assets, analysis=analysis, tls=tls)
+    if not profile:
+        return _audit_page(url, **options)
+    (audit_results, index), rows = profile_call(_audit_page, url, **options)
+    # None when another audit was already being profiled
+    audit_results['profile'] = rows
+    return audit_results, index
+
+
+def _audit_page(url, fetcher, categories, skip_checks, max_cost, cache, force_refresh, assets, analysis, tls):
+    with METRICS.in_flight('audit_in_flight'):
+        spans = Spans('audit')
+        audit_results, index = _run_audit(spans, url, fetcher, categories, skip_checks, max_cost, cache,
+                                          force_refresh, assets, analysis, tls)
+        audit_results['timings'] = spans.finish()
+    if audit_results.get('error'):
+        outcome = 'error'
+    elif audit_results.get('cache', {}).get('status') == HIT:
+        outcome = 'cache_hit'
+    else:
+        outcome = 'ok'
+    METRICS.increment('audits_total', result=outcome)
+    return audit_results, index
+
+
+def _run_audit(spans, url, fetcher, categories, skip_checks, max_cost, cache, force_refresh, assets, analysis,
+               tls):
+    categories = parse_categories(categories)
+    if fetcher is None:
+        fetcher = default_fetcher()
+
+    # Ensure URL has protocol
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    tls = tls if 'security' in categories else None
+    cache_key = (cache.key(url, categories, skip_checks, max_cost, assets is not None, tls is not None)
+                 if cache is not None else None)
+    entry = cache.get(cache_key) if cache is not None and not force_refresh else None
+    if entry is not None and cache.is_fresh(entry):
+        cache.record(HIT)
+        audit_results = copy.deepcopy(entry.results)
+        audit_results['cache'] = {'status': HIT, 'from_cache': True, 'age': round(entry.age, 1)}
+        return audit_results, entry.index
+
+    audit_results = {
+        'url': url,
+        'scan_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    for category in categories:
+        audit_results[category] = {'score': 0, 'findings': []}
+
+    index = None
+    # The host's TLS setup is inspected on another thread while the page downloads
+    pending_tls = tls.start(url) if tls is not None else None
+    try:
+        # Fetch through the pooled session; load time is TTFB plus body download
+        with spans.span('fetch'):
+            response = fetcher.fetch(url, headers=entry.conditional_headers() if entry else None)
+        for stage, seconds in response.connection.items():
+            spans.add(stage, seconds)
+        spans.add('wait', max(0.0, response.ttfb - sum(response.connection.values())))
+        spans.add('download', response.download_time)
+
+        cache_status = BYPASS if force_refresh and cache is not None else MISS
+        if entry is not None and response.status_code == 304:
+            response = _merge_not_modified(entry.response, response)
+            index = entry.index
+            cache_status = REVALIDATED
+        elif entry is not None and body_hash(response.content) == entry.body_hash:
+            index = entry.index
+            cache_status = UNCHANGED
+        audit_results['fetch'] = response.summary()
+
+        tls_info = None
+        if pending_tls is not None:
+            with spans.span('tls_inspection_wait'):
+                tls_info = pending_tls.result()
+            audit_results['tls'] = summarize_tls(tls_info)
+
+        asset_info = None
+        if assets is not None and 'performance' in categories:
+            if index is None:
+                # The asset pass needs the page's asset URLs before the checks can run
+                with spans.span('parse'):
+                    index = (analysis.parse(response.content, response.encoding) if analysis is not None
+                             else build_index(response.content, response.encoding))
+            with spans.span('assets'):
+                asset_info = assets.analyze(response.final_url, index)
+            audit_results['page_weight'] = summarize_assets(asset_info, len(response.content))
+
+        # Parse HTML content once into a compact index of everything the checks use, then run the checks
+        options = dict(assets=asset_info, categories=categories, skip_checks=skip_checks, max_cost=max_cost,
+                       previous=entry.check_state if entry is not None else None, keep_state=cache is not None,
+                       tls=tls_info)
+        if analysis is not None:
+            outcome = analysis.analyze(url, response, index, **options)
+        else:
+            outcome = analyze_page(url, response, index, **options)
+        index = outcome.index
+        for stage, seconds in outcome.timings.items():
+            spans.add(stage, seconds)
+        audit_results.update(outcome.results)
+        for name, info in audit_results['checks'].items():
+            spans.add(f'checks.{info["category"]}', info['time'])
+            if not info['reused']:
+                METRICS.observe(f'check.{name}', info['time'])
+        audit_results['summary'] = summarize(audit_results, categories)
+
+        if cache is not None:
+            cache.record(cache_status)
+            cache.put(cache_key, CacheEntry(response, index, copy.deepcopy(audit_results),
+                                            check_state=copy.deepcopy(outcome.check_state)))
+            audit_results['cache'] = {'status': cache_status, 'from_cache': cache_status not in (MISS, BYPASS)}
+
+    except requests.exceptions.RequestException as e:
+        audit_results['error'] = f"Failed to access website: {str(e)}"
+        index = None
+
+    return audit_results, index
+
+
+def _merge_not_modified(cached, response):
+    """Combine a 304 response's headers and timing with the cached body"""
+    headers = dict(cached.headers)
+    headers.update(response.headers)
+    return FetchResult(
+        url=response.url,
+        final_url=response.final_url,
+        status_code=cached.status_code,
+        headers=headers,
+        content=cached.content,
+        encoding=cached.encoding,
+        redirects=response.redirects,
+        ttfb=response.ttfb,
+        download_time=response.download_time,
+    )
@@ -0,0 +1,90 @@
+"""URL-keyed cache of fetched pages and their audit results
+
+A fresh entry (younger than ``ttl``) is served without touching the
+network. A stale entry is revalidated with ``If-None-Match`` /
+``If-Modified-Since``; on ``304 Not Modified``, or when the new body hashes
+to the same value, the cached parse of the page is reused. Either way the
+entry's per-check state lets checks whose inputs did not change reuse their
+previous findings. Entries are evicted least-recently-used once either the
+entry count or the approximate byte size limit is exceeded.
+"""
+import hashlib
+import threading
+import time
+
+from storage import LRUCache
+
+HIT = 'hit'
+REVALIDATED = 'revalidated'
+UNCHANGED = 'unchanged'
+MISS = 'miss'
+BYPASS = 'bypass'
+
+
+def body_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class CacheEntry:
+    def __init__(self, response, index, results, check_state=None):
+        self.response = response
+        self.index = index
+        self.results = results
+        self.check_state = check_state or {}
+        self.body_hash = body_hash(response.content)
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        self.stored_at = time.time()
+        self.size = len(response.content) + 1024
+
+    @property
+    def age(self):
+        return time.time() - self.stored_at
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class AuditCache:
+    """Thread-safe LRU of ``CacheEntry`` objects with TTL and size bounds"""
+
+    def __init__(self, ttl=300, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Stale entries are kept: they are revalidated rather than refetched
+        self._entries = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=lambda entry: entry.size)
+        self._lock = threading.Lock()
+        self.stats = {HIT: 0, REVALIDATED: 0, UNCHANGED: 0, MISS: 0, BYPASS: 0}
+
+    @staticmethod
+    def key(url, categories, skip_checks=(), max_cost=None, with_assets=False, with_tls=False):
+        return '|'.join([url, ','.join(categories), ','.join(sorted(skip_checks)), max_cost or '',
+                         'assets' if with_assets else '', 'tls' if with_tls else ''])
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def is_fresh(self, entry):
+        return entry.age < self.ttl
+
+    def put(self, key, entry):
+        self._entries.put(key, entry)
+
+    def record(self, status):
+        with self._lock:
+            self.stats[status] += 1
+
+    def hit_rate(self):
+        with self._lock:
+            total = sum(self.stats.values())
+            reused = self.stats[HIT] + self.stats[REVALIDATED] + self.stats[UNCHANGED]
+        return reused / total if total else 0.0
+
+    def clear(self):
+        self._entries.clear()
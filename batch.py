@@ -0,0 +1,78 @@
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+
+def normalize_url(url):
+    """Ensure URL has protocol"""
+    url = url.strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+def read_url_list(lines):
+    """Yield URLs from an iterable of lines, skipping blanks and # comments"""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def run_batch(urls, audit, concurrency=8, per_host=2):
+    """Audit many URLs concurrently and yield each result as soon as it finishes
+
+    At most ``concurrency`` audits run at once and at most ``per_host`` of them
+    target the same host. URLs for a busy host wait in a per-host backlog so
+    they never tie up a worker thread. Results are yielded in completion order.
+    """
+    concurrency = max(1, int(concurrency))
+    per_host = max(1, int(per_host))
+    pending = deque(urls)
+    backlog = defaultdict(deque)
+    active = defaultdict(int)
+    ready = deque()
+    running = {}
+
+    def host_of(url):
+        return urlparse(normalize_url(url)).netloc.lower()
+
+    def next_url():
+        # Hosts freed by a finished audit get their backlog served first
+        while ready:
+            host = ready.popleft()
+            if backlog[host] and active[host] < per_host:
+                return host, backlog[host].popleft()
+        while pending:
+            url = pending.popleft()
+            host = host_of(url)
+            if active[host] < per_host:
+                return host, url
+            backlog[host].append(url)
+        return None, None
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='audit-batch') as executor:
+        while True:
+            while len(running) < concurrency:
+                host, url = next_url()
+                if url is None:
+                    break
+                active[host] += 1
+                running[executor.submit(_audit_one, audit, url)] = host
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                host = running.pop(future)
+                active[host] -= 1
+                if backlog[host]:
+                    ready.append(host)
+                yield future.result()
+
+
+def _audit_one(audit, url):
+    try:
+        return audit(url)
+    except Exception as e:
+        return {'url': url, 'error': f'Audit failed: {str(e)}'}
@@ -0,0 +1,137 @@
+"""Benchmark audit throughput against the number of analysis worker processes
+
+Runs the same batch of audits with parsing and checks on the audit threads
+(``0`` workers) and in an ``AnalysisPool`` of each requested size, and
+reports audits per second and latency. The fixture server runs in its own
+process so serving pages does not compete with the audits for the GIL.
+Throughput can only scale up to the number of available cores.
+
+Usage:
+    python benchmarks/bench_analysis.py [--workers 0,1,2,4] [--threads 16] [--audits 200] [--scenario large]
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_audit import SCENARIOS, percentile  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_fixture_server(port, timeout=10):
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            'fixture_server.py'), '--port', str(port)],
+                              stdout=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError('Fixture server did not start')
+
+
+def bench_workers(url, workers, threads, audits):
+    """Audits per second with ``threads`` concurrent audits and ``workers`` analysis processes"""
+    from analysis import AnalysisPool
+    from audit import comprehensive_website_audit
+    from fetcher import Fetcher
+
+    fetcher = Fetcher(pool_size=threads)
+    pool = AnalysisPool(workers=workers) if workers else None
+    audit = lambda: _timed(comprehensive_website_audit, url, fetcher=fetcher, analysis=pool)  # noqa: E731
+    try:
+        # Warm up connections and start the worker processes outside the measurement
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: audit(), range(max(threads, workers * 2))))
+            start = time.perf_counter()
+            latencies = list(executor.map(lambda _: audit(), range(audits)))
+            elapsed = time.perf_counter() - start
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return {
+        'workers': workers,
+        'threads': threads,
+        'audits': audits,
+        'audits_per_second': audits / elapsed,
+        'latency_p50': statistics.median(latencies),
+        'latency_p95': percentile(latencies, 0.95),
+    }
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    if result.get('error'):
+        raise RuntimeError(result['error'])
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default=None,
+                        help='Comma-separated analysis worker counts; 0 analyzes on the audit threads '
+                             '(default: 0,1,2,4,... up to the CPU count)')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent audits (fetch threads)')
+    parser.add_argument('--audits', type=int, default=200, help='Audits per measurement')
+    parser.add_argument('--scenario', default='large', choices=sorted(SCENARIOS), help='Page profile to audit')
+    parser.add_argument('-o', '--output', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        counts = [int(n) for n in args.workers.split(',')]
+    else:
+        cpus = os.cpu_count() or 1
+        counts = [0] + [n for n in (1, 2, 4, 8, 16, 32, 64) if n < cpus] + [cpus]
+
+    results = {
+        'meta': {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'scenario': args.scenario,
+        },
+        'runs': [],
+    }
+    port = free_port()
+    server = start_fixture_server(port)
+    try:
+        query = '&'.join(f'{k}={v}' for k, v in SCENARIOS[args.scenario].items())
+        url = f'http://127.0.0.1:{port}/page?{query}'
+        for workers in counts:
+            run = bench_workers(url, workers, args.threads, args.audits)
+            results['runs'].append(run)
+            print(f'workers={workers:<3} {run["audits_per_second"]:>7.1f} audits/s '
+                  f'p50={run["latency_p50"] * 1000:.0f}ms p95={run["latency_p95"] * 1000:.0f}ms', file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
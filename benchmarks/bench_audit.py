@@ -0,0 +1,267 @@
+"""Benchmark the audit pipeline end to end against the local fixture server
+
+Measures, per page profile, the time spent fetching, parsing, running the
+checks of each category, rendering the PDF report and running the whole
+``comprehensive_website_audit``; then the throughput of audits submitted
+concurrently through the Flask API. Results are written as JSON so runs
+can be compared:
+
+Usage:
+    python benchmarks/bench_audit.py [--scenarios small,large] [--repeat 5] [--output run.json]
+    python benchmarks/bench_audit.py --compare baseline.json [--threshold 0.15]
+    python benchmarks/bench_audit.py --latency 0.05 --tls --headers secure --clients 8 --audits 40
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_server import FixtureServer  # noqa: E402
+
+SCENARIOS = {
+    'small': {'images': 10, 'forms': 1, 'scripts': 3, 'depth': 5},
+    'medium': {'images': 300, 'forms': 20, 'scripts': 20, 'stylesheets': 8, 'links': 200, 'depth': 50},
+    'large': {'images': 3000, 'forms': 200, 'scripts': 100, 'stylesheets': 30, 'links': 2000, 'depth': 300,
+              'pad_kb': 512},
+    'nested': {'images': 50, 'forms': 5, 'depth': 3000},
+}
+
+
+def median_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))] if values else None
+
+
+def bench_pipeline(url, repeat):
+    """Median seconds per stage for one page"""
+    from audit import comprehensive_website_audit
+    from checks import CATEGORIES, AuditContext, run_checks
+    from fetcher import Fetcher
+    from html_index import build_index
+    from report_pdf import render_pdf
+
+    fetcher = Fetcher()
+    response = fetcher.fetch(url)
+    index = build_index(response.content, response.encoding)
+    results = comprehensive_website_audit(url, fetcher=fetcher)
+
+    stages = {
+        'page_bytes': len(response.content),
+        'fetch': median_of(lambda: fetcher.fetch(url), repeat),
+        'parse': median_of(lambda: build_index(response.content, response.encoding), repeat),
+        # A fresh context per run so cached body scans are not shared between runs
+        'checks': {category: median_of(lambda: run_checks(AuditContext(url, response, index), (category,)),
+                                       repeat)
+                   for category in CATEGORIES},
+        'pdf': median_of(lambda: render_pdf(results), repeat),
+        'audit': median_of(lambda: comprehensive_website_audit(url, fetcher=fetcher), repeat),
+    }
+    stages['checks']['all'] = median_of(lambda: run_checks(AuditContext(url, response, index)), repeat)
+    stages['findings'] = sum(len(results[c]['findings']) for c in CATEGORIES)
+    return stages
+
+
+def bench_throughput(url, clients, audits):
+    """Audits per second through ``POST /api/audits`` and job polling on a threaded dev server"""
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    tmp = tempfile.mkdtemp(prefix='bench-audit-')
+    from app import create_app
+    import requests
+
+    app = create_app({'RESULT_STORE_URL': 'memory://', 'HISTORY_DB': os.path.join(tmp, 'history.db'),
+                      'SECRET_KEY': 'bench'})
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    remaining = [audits]
+
+    def client():
+        session = requests.Session()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                response = session.post(f'{base}/api/audits', json={'url': url, 'force_refresh': True})
+                if response.status_code != 202:
+                    raise RuntimeError(f'submit returned {response.status_code}')
+                result_url = base + response.json()['result_url']
+                while True:
+                    response = session.get(result_url)
+                    if response.status_code != 202:
+                        break
+                    time.sleep(0.01)
+                if response.status_code != 200:
+                    raise RuntimeError(f'result returned {response.status_code}')
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=client) for _ in range(clients)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    return {
+        'clients': clients,
+        'audits': len(latencies),
+        'errors': len(errors),
+        'audits_per_second': len(latencies) / elapsed if elapsed else None,
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p95': percentile(latencies, 0.95),
+    }
+
+
+def flatten(results):
+    """``{'large.checks.seo': seconds, ...}`` for every timing in a run"""
+    flat = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f'{prefix}.{key}' if prefix else key, item)
+        elif isinstance(value, float):
+            flat[prefix] = value
+
+    walk('', results['scenarios'])
+    throughput = results.get('throughput') or {}
+    for key in ('latency_p50', 'latency_p95'):
+        if throughput.get(key) is not None:
+            flat[f'throughput.{key}'] = throughput[key]
+    return flat
+
+
+def compare(current, baseline, threshold, min_delta=0.0005):
+    """Print per-metric changes; returns the metrics that got slower by more than ``threshold``
+
+    Changes smaller than ``min_delta`` seconds are treated as noise.
+    """
+    now, before = flatten(current), flatten(baseline)
+    for key in ('parser', 'latency', 'tls', 'headers'):
+        if current['meta'].get(key) != baseline.get('meta', {}).get(key):
+            print(f'warning: {key} differs from the baseline run '
+                  f'({baseline.get("meta", {}).get(key)!r} vs {current["meta"].get(key)!r})', file=sys.stderr)
+    regressions = []
+    print(f'{"metric":<32} {"baseline":>12} {"current":>12} {"change":>8}')
+    for key in sorted(set(now) & set(before)):
+        change = (now[key] - before[key]) / before[key] if before[key] else 0.0
+        flag = ''
+        if change > threshold and now[key] - before[key] > min_delta:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f'{key:<32} {before[key] * 1000:>10.2f}ms {now[key] * 1000:>10.2f}ms {change:>+7.1%}{flag}')
+    old_rate = (baseline.get('throughput') or {}).get('audits_per_second')
+    new_rate = (current.get('throughput') or {}).get('audits_per_second')
+    if old_rate and new_rate:
+        change = (new_rate - old_rate) / old_rate
+        flag = ''
+        if change < -threshold:
+            regressions.append('throughput.audits_per_second')
+            flag = '  REGRESSION'
+        print(f'{"throughput.audits_per_second":<32} {old_rate:>12.2f} {new_rate:>12.2f} {change:>+7.1%}{flag}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default='small,medium,large,nested',
+                        help=f'Comma-separated page profiles ({", ".join(SCENARIOS)})')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='Fixture server response delay in seconds')
+    parser.add_argument('--headers', choices=('bare', 'secure'), default='bare')
+    parser.add_argument('--tls', action='store_true', help='Serve the fixture pages over HTTPS')
+    parser.add_argument('--clients', type=int, default=4, help='Concurrent API clients (0 skips throughput)')
+    parser.add_argument('--audits', type=int, default=20, help='Audits to submit through the API')
+    parser.add_argument('--throughput-scenario', default='medium')
+    parser.add_argument('-o', '--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline JSON from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.15, help='Slowdown that counts as a regression')
+    parser.add_argument('--min-delta', type=float, default=0.5, help='Ignore changes below this many ms')
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.scenarios.split(',') if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f'Unknown scenarios: {", ".join(unknown)}')
+
+    from html_index import default_backend
+
+    results = {
+        'meta': {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parser': default_backend(),
+            'repeat': args.repeat,
+            'latency': args.latency,
+            'tls': args.tls,
+            'headers': args.headers,
+        },
+        'scenarios': {},
+        'throughput': None,
+    }
+    with FixtureServer(latency=args.latency, headers=args.headers, tls=args.tls) as server:
+        for name in names:
+            stages = bench_pipeline(server.url(**SCENARIOS[name]), args.repeat)
+            results['scenarios'][name] = stages
+            checks = ' '.join(f'{c}={t * 1000:.1f}ms' for c, t in stages['checks'].items())
+            print(f'{name:>8} {stages["page_bytes"]:>9}B fetch={stages["fetch"] * 1000:.1f}ms '
+                  f'parse={stages["parse"] * 1000:.1f}ms {checks} pdf={stages["pdf"] * 1000:.1f}ms '
+                  f'audit={stages["audit"] * 1000:.1f}ms', file=sys.stderr)
+        if args.clients:
+            results['throughput'] = bench_throughput(server.url(**SCENARIOS[args.throughput_scenario]),
+                                                     args.clients, args.audits)
+            print(f'throughput: {json.dumps(results["throughput"])}', file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    elif not args.compare:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        if compare(results, baseline, args.threshold, args.min_delta / 1000):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
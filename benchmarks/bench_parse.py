@@ -0,0 +1,100 @@
+"""Benchmark parse-plus-analyze time: BeautifulSoup traversals vs the single-pass index
+
+Usage:
+    python benchmarks/bench_parse.py [--sizes 100,1000,5000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_index import BACKENDS, build_index  # noqa: E402
+
+
+def synthetic_page(n):
+    """Page with ``n`` images, n/10 forms of 5 inputs each, n/20 scripts and n/50 stylesheets"""
+    parts = ['<html><head><title>Benchmark page</title>',
+             '<meta name="description" content="Synthetic benchmark page">']
+    parts += [f'<link rel="stylesheet" href="/s{i}.css">' for i in range(max(1, n // 50))]
+    parts.append('</head><body><h1>Benchmark</h1>')
+    for i in range(n):
+        alt = f' alt="image {i}"' if i % 3 else ''
+        parts.append(f'<div class="card"><div><img src="/i{i}.png" width="{i % 2500}" height="400"{alt}>'
+                     f'<a href="/p{i}">link {i}</a></div></div>')
+    for f in range(max(1, n // 10)):
+        parts.append('<form>')
+        for j in range(5):
+            parts.append(f'<label for="f{f}i{j}">Field</label><input type="text" id="f{f}i{j}">' if j % 2
+                         else f'<input type="text" id="f{f}x{j}">')
+        parts.append('<button>Send</button></form>')
+    parts += [f'<script src="/j{i}.js"></script>' for i in range(max(1, n // 20))]
+    parts.append('</body></html>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+def legacy_analyze(content):
+    """The BeautifulSoup traversals the audit used before the single-pass index"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+    images = soup.find_all('img')
+    soup.find_all('script')
+    soup.find_all('link', rel='stylesheet')
+    soup.find('title')
+    soup.find('meta', attrs={'name': 'description'})
+    soup.find_all('h1')
+    [img for img in images if not img.get('alt')]
+    for form in soup.find_all('form'):
+        for input_field in form.find_all('input'):
+            if input_field.get('type') not in ['hidden', 'submit', 'button']:
+                if not input_field.get('id') or not soup.find('label', attrs={'for': input_field.get('id')}):
+                    break
+    soup.find('a')
+    soup.find('button')
+
+
+def index_analyze(content, backend):
+    index = build_index(content, 'utf-8', backend)
+    index.images_without_alt()
+    for inputs in index.forms:
+        for input_field in inputs:
+            if input_field.get('type') not in ['hidden', 'submit', 'button']:
+                if not input_field.get('id') or input_field['id'] not in index.labels_for:
+                    break
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,5000', help='Comma-separated image counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    try:
+        import bs4  # noqa: F401
+        variants = {'bs4 (before)': legacy_analyze}
+    except ImportError:
+        print('beautifulsoup4 not installed; skipping the "before" measurement', file=sys.stderr)
+        variants = {}
+    for backend in BACKENDS:
+        variants[f'index/{backend}'] = lambda content, backend=backend: index_analyze(content, backend)
+
+    print(f'{"images":>8} {"bytes":>10} ' + ' '.join(f'{name:>20}' for name in variants))
+    for size in (int(s) for s in args.sizes.split(',')):
+        content = synthetic_page(size)
+        row = [best_of(lambda: func(content), args.repeat) for func in variants.values()]
+        print(f'{size:>8} {len(content):>10} ' + ' '.join(f'{t * 1000:>18.1f}ms' for t in row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark PDF report render time against the number of findings
+
+Usage:
+    python benchmarks/bench_pdf.py [--findings 10,100,1000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_pdf import CATEGORIES, PdfCache, render_pdf  # noqa: E402
+
+
+def synthetic_results(n):
+    """Audit result with ``n`` findings spread evenly over the categories"""
+    results = {'url': 'https://example.com', 'scan_time': '2024-01-01 00:00:00'}
+    for i, category in enumerate(CATEGORIES):
+        results[category] = {'score': 50, 'findings': [
+            {
+                'name': f'Finding {j}',
+                'description': f'Synthetic {category} finding number {j} with <markup> & entities',
+                'severity': 'medium',
+                'fix_steps': ['First step to fix', 'Second step to fix', 'Third step to fix', 'Verify'],
+            }
+            for j in range(i, n, len(CATEGORIES))
+        ]}
+    return results
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--findings', default='10,100,1000', help='Comma-separated finding counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f'{"findings":>9} {"render":>12} {"pdf bytes":>10} {"cached":>12}')
+    for n in (int(s) for s in args.findings.split(',')):
+        results = synthetic_results(n)
+        render_time = best_of(lambda: render_pdf(results), args.repeat)
+        pdf = render_pdf(results)
+
+        cache = PdfCache()
+        cache.put(PdfCache.key('bench', results), pdf)
+        cached_time = best_of(lambda: cache.get(PdfCache.key('bench', results)), args.repeat)
+        print(f'{n:>9} {render_time * 1000:>10.1f}ms {len(pdf):>10} {cached_time * 1000:>10.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""Benchmark cold start time and memory of the web app
+
+Each run starts a fresh interpreter and measures the time and resident
+memory after importing ``app``, after ``create_app()``, after the first
+request and after the first PDF report (the first one imports ReportLab).
+With ``--gunicorn N`` it also starts ``gunicorn -c gunicorn.conf.py`` with
+N workers and reports how long they take to serve the first request and
+the RSS and PSS (RSS with shared pages split between the processes sharing
+them) of each worker. Linux only: memory is read from ``/proc``.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--gunicorn 4] [--no-preload] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the fresh interpreter; prints one JSON object
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+
+def rss_kb():
+    with open('/proc/self/status') as fh:
+        for line in fh:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+
+stages = {}
+def mark(name):
+    stages[name] = {'time': time.perf_counter() - start, 'rss_kb': rss_kb()}
+
+import app
+mark('import')
+application = app.create_app({'SECRET_KEY': 'bench', 'RESULT_STORE_URL': 'memory://',
+                              'HISTORY_DB': sys.argv[1]})
+mark('create_app')
+loaded = {'reportlab': 'reportlab' in sys.modules, 'bs4': 'bs4' in sys.modules}
+application.test_client().get('/')
+mark('first_request')
+from report_pdf import render_pdf
+render_pdf({'url': 'https://example.com', 'security': {'score': 100, 'findings': []}})
+mark('first_pdf')
+print(json.dumps({'stages': stages, 'loaded_at_start': loaded}))
+'''
+
+
+def run_probe(history_db):
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', PROBE, history_db], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output)
+    result['wall'] = time.perf_counter() - start
+    return result
+
+
+def interpreter_baseline(repeat):
+    """Median wall time of an interpreter that imports nothing"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_cold_start(repeat):
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as tmp:
+        runs = [run_probe(os.path.join(tmp, f'history{i}.db')) for i in range(repeat)]
+    stages = {}
+    for name in runs[0]['stages']:
+        stages[name] = {
+            'time': statistics.median(run['stages'][name]['time'] for run in runs),
+            'rss_kb': statistics.median(run['stages'][name]['rss_kb'] for run in runs),
+        }
+    return {
+        'wall': statistics.median(run['wall'] for run in runs),
+        'interpreter': interpreter_baseline(repeat),
+        'stages': stages,
+        'loaded_at_start': runs[0]['loaded_at_start'],
+    }
+
+
+def memory_kb(pid):
+    """``(rss_kb, pss_kb)`` of a process"""
+    rss = pss = None
+    with open(f'/proc/{pid}/status') as fh:
+        for line in fh:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as fh:
+            for line in fh:
+                if line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, pss
+
+
+def child_pids(pid):
+    pids = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as fh:
+            pids += [int(child) for child in fh.read().split()]
+    return pids
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def bench_gunicorn(workers, preload, timeout=60):
+    """Time until every worker is up and serving, and per-worker memory"""
+    import requests
+
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as tmp:
+        env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0', SECRET_KEY='bench',
+                   RESULT_STORE_URL='memory://', HISTORY_DB=os.path.join(tmp, 'history.db'))
+        start = time.perf_counter()
+        master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers',
+                                   str(workers), '--bind', f'127.0.0.1:{port}', 'wsgi:app'],
+                                  cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            ready = None
+            while time.perf_counter() - start < timeout:
+                if master.poll() is not None:
+                    raise RuntimeError(f'gunicorn exited with status {master.returncode}')
+                try:
+                    if requests.get(f'http://127.0.0.1:{port}/', timeout=1).status_code == 200:
+                        if len(child_pids(master.pid)) >= workers:
+                            ready = time.perf_counter() - start
+                            break
+                except requests.ConnectionError:
+                    pass
+                time.sleep(0.02)
+            if ready is None:
+                raise RuntimeError(f'gunicorn did not start within {timeout}s')
+            # Touch every worker so each has served a request before it is measured
+            for _ in range(workers * 4):
+                requests.get(f'http://127.0.0.1:{port}/', timeout=5)
+            memory = [memory_kb(pid) for pid in child_pids(master.pid)]
+            master_memory = memory_kb(master.pid)
+        finally:
+            master.terminate()
+            master.wait()
+
+    rss = [m[0] for m in memory]
+    pss = [m[1] for m in memory if m[1] is not None]
+    return {
+        'workers': workers,
+        'preload': preload,
+        'ready': ready,
+        'master_rss_kb': master_memory[0],
+        'worker_rss_kb': statistics.median(rss),
+        'worker_pss_kb': statistics.median(pss) if pss else None,
+        'total_pss_kb': (sum(pss) + (master_memory[1] or 0)) if pss else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--gunicorn', type=int, default=0, metavar='WORKERS',
+                        help='Also measure a gunicorn server with this many workers')
+    parser.add_argument('--no-preload', action='store_true', help='Start gunicorn without preload_app')
+    parser.add_argument('-o', '--output', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    results = {
+        'meta': {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'cold_start': bench_cold_start(args.repeat),
+        'gunicorn': None,
+    }
+    cold = results['cold_start']
+    print(f'interpreter={cold["interpreter"] * 1000:.0f}ms wall={cold["wall"] * 1000:.0f}ms '
+          + ' '.join(f'{name}={stage["time"] * 1000:.0f}ms/{stage["rss_kb"] / 1024:.1f}MB'
+                     for name, stage in cold['stages'].items()), file=sys.stderr)
+    if args.gunicorn:
+        results['gunicorn'] = bench_gunicorn(args.gunicorn, preload=not args.no_preload)
+        print(f'gunicorn: {json.dumps(results["gunicorn"])}', file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""Local stand-in web server serving synthetic pages for benchmarks
+
+Pages are generated from query parameters, so one server can serve every
+profile a benchmark needs::
+
+    /page?images=1000&forms=50&inputs=5&scripts=30&stylesheets=10&depth=200&pad_kb=512
+
+``latency`` (seconds before the response starts) and ``headers`` (``bare``
+or ``secure``) can be set per server and overridden per request. Assets
+referenced by the pages (``/static/...``) are served with a
+``Content-Length`` so the asset pass can size them with ``HEAD``.
+``external`` adds links to another origin, ``robots`` is served as
+``/robots.txt`` and ``etags=True`` answers ``If-None-Match`` with ``304``.
+
+With ``tls=True`` the server uses the given certificate or generates a
+throwaway self-signed one with the ``openssl`` command.
+
+Usage:
+    python benchmarks/fixture_server.py [--port 8800] [--latency 0.05] [--headers secure] [--tls]
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PAGE_PARAMS = {'images': 10, 'forms': 1, 'inputs': 4, 'scripts': 3, 'stylesheets': 2, 'links': 20, 'depth': 5,
+               'pad_kb': 0, 'external': 0}
+
+SECURE_HEADERS = {
+    'X-Frame-Options': 'DENY',
+    'X-Content-Type-Options': 'nosniff',
+    'X-XSS-Protection': '1; mode=block',
+    'Strict-Transport-Security': 'max-age=31536000',
+    'Content-Security-Policy': "default-src 'self'",
+    'Referrer-Policy': 'no-referrer',
+}
+
+ASSET_BYTES = 4096
+
+
+@lru_cache(maxsize=64)
+def synthetic_page(images=10, forms=1, inputs=4, scripts=3, stylesheets=2, links=20, depth=5, pad_kb=0,
+                   external=0):
+    """HTML page with the given number of elements; ``depth`` nests the content in that many divs"""
+    parts = ['<!DOCTYPE html><html><head><title>Fixture page</title>',
+             '<meta name="description" content="Synthetic page served by the benchmark fixture server">',
+             '<style>body { color: #333; background-color: #fff; }</style>']
+    parts += [f'<link rel="stylesheet" href="/static/s{i}.css">' for i in range(stylesheets)]
+    parts.append('</head><body>')
+    parts.append('<div class="level">' * depth)
+    parts.append('<h1>Fixture</h1>')
+    for i in range(images):
+        alt = f' alt="image {i}"' if i % 3 else ''
+        parts.append(f'<img src="/static/i{i}.png" width="{400 + i % 2000}" height="300"{alt}>')
+    parts += [f'<a href="/page?links=0&amp;n={i}">link {i}</a>' for i in range(links)]
+    parts += [f'<a href="https://external.example/page{i}">external {i}</a>' for i in range(external)]
+    for f in range(forms):
+        parts.append('<form>')
+        for j in range(inputs):
+            parts.append(f'<label for="f{f}i{j}">Field</label><input type="text" id="f{f}i{j}">' if j % 2
+                         else f'<input type="text" name="f{f}x{j}">')
+        parts.append('<button>Send</button></form>')
+    parts.append('</div>' * depth)
+    parts += [f'<script src="/static/j{i}.js"></script>' for i in range(scripts)]
+    if pad_kb:
+        parts.append('<!-- ' + 'x' * (pad_kb * 1024) + ' -->')
+    parts.append('</body></html>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def do_GET(self):
+        self._respond(head=False)
+
+    def _respond(self, head):
+        parsed = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        latency = float(query.get('latency', self.server.latency))
+        header_profile = query.get('headers', self.server.header_profile)
+        if latency:
+            time.sleep(latency)
+
+        if parsed.path.startswith('/static/'):
+            body = b'/* fixture asset */' + b' ' * (ASSET_BYTES - 19)
+            content_type = 'text/css' if parsed.path.endswith('.css') else (
+                'application/javascript' if parsed.path.endswith('.js') else 'image/png')
+            headers = {'Cache-Control': 'public, max-age=86400'}
+        elif parsed.path in ('/', '/page'):
+            try:
+                params = {k: int(query.get(k, default)) for k, default in PAGE_PARAMS.items()}
+            except ValueError:
+                self.send_error(400, 'Page parameters must be integers')
+                return
+            body = synthetic_page(**params)
+            content_type = 'text/html; charset=utf-8'
+            headers = dict(SECURE_HEADERS) if header_profile == 'secure' else {}
+        elif parsed.path == '/robots.txt' and self.server.robots is not None:
+            body = self.server.robots.encode('utf-8')
+            content_type = 'text/plain; charset=utf-8'
+            headers = {}
+        else:
+            self.send_error(404)
+            return
+
+        if self.server.etags:
+            headers['ETag'] = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                self.send_response(304)
+                self.send_header('ETag', headers['ETag'])
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+class _FixtureHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that reject the self-signed certificate abort the handshake; that is expected
+        if not isinstance(sys.exc_info()[1], (ssl.SSLError, ConnectionError)):
+            super().handle_error(request, client_address)
+
+
+class FixtureServer:
+    """Threaded fixture server on a background thread; use as a context manager"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, headers='bare', tls=False, certfile=None,
+                 keyfile=None, robots=None, etags=False):
+        self.httpd = _FixtureHTTPServer((host, port), FixtureHandler)
+        self.httpd.latency = latency
+        self.httpd.header_profile = headers
+        self.httpd.robots = robots
+        self.httpd.etags = etags
+        self.tls = tls
+        self._tempdir = None
+        if tls:
+            if certfile is None:
+                certfile, keyfile = self._self_signed_cert()
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            # Handshakes happen on first read, in the connection's own thread
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True,
+                                                    do_handshake_on_connect=False)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fixture-server', daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'{"https" if self.tls else "http"}://{host}:{port}'
+
+    def url(self, path='/page', **params):
+        query = '&'.join(f'{k}={v}' for k, v in params.items())
+        return self.base_url + path + (f'?{query}' if query else '')
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._tempdir:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _self_signed_cert(self):
+        if shutil.which('openssl') is None:
+            raise RuntimeError('TLS needs --certfile/--keyfile or the openssl command to generate a certificate')
+        self._tempdir = tempfile.mkdtemp(prefix='fixture-tls-')
+        certfile = os.path.join(self._tempdir, 'cert.pem')
+        keyfile = os.path.join(self._tempdir, 'key.pem')
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                        '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1',
+                        '-keyout', keyfile, '-out', certfile],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return certfile, keyfile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve synthetic pages for benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+    parser.add_argument('--headers', choices=('bare', 'secure'), default='bare')
+    parser.add_argument('--tls', action='store_true', help='Serve HTTPS (self-signed unless --certfile is given)')
+    parser.add_argument('--certfile')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args(argv)
+
+    server = FixtureServer(args.host, args.port, latency=args.latency, headers=args.headers, tls=args.tls,
+                           certfile=args.certfile, keyfile=args.keyfile)
+    print(f'Serving fixture pages at {server.url()}')
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+"""Check-plugin registry and engine
+
+Every audit rule is a function registered with the ``check`` decorator. A
+check declares its category, the audit inputs it reads, a default severity
+and score deduction, and a cost class. ``run_checks`` runs only the checks
+for the selected categories: cheap checks run inline while expensive ones
+are dispatched to a shared thread pool, and the time spent in every check
+is recorded alongside the results.
+
+Inputs may name a region of the page index (``'index.images'``). On a
+re-audit the context carries the previous run's per-check state, and a
+check whose inputs fingerprint the same as last time has its findings
+reused instead of being run again.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from html_index import REGIONS
+
+from patterns import SIGNATURES
+
+CATEGORIES = ('security', 'performance', 'seo', 'accessibility')
+SEVERITIES = ('critical', 'high', 'medium', 'low')
+INPUTS = ('url', 'headers', 'index', 'body', 'timing', 'assets', 'tls')
+COSTS = ('cheap', 'expensive')
+
+# Headers that change on every response without changing what the checks see
+VOLATILE_HEADERS = frozenset(['date', 'age', 'expires', 'etag', 'last-modified', 'set-cookie', 'content-length',
+                              'x-request-id', 'x-runtime', 'server-timing', 'cf-ray', 'x-amz-cf-id', 'x-cache',
+                              'x-served-by', 'x-timer', 'via'])
+
+# Parts of a TLS inspection that change without the host's TLS setup changing
+TLS_VOLATILE_KEYS = frozenset(['dns_time', 'connect_time', 'handshake_time', 'cached', 'addresses'])
+
+REGISTRY = OrderedDict()
+
+_executor = None
+_executor_lock = threading.Lock()
+CHECK_WORKERS = 4
+
+
+class Check:
+    """A registered audit rule"""
+
+    def __init__(self, name, category, func, inputs, severity, deduction, cost):
+        self.name = name
+        self.category = category
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.severity = severity
+        self.deduction = deduction
+        self.cost = cost
+
+    def run(self, context):
+        findings = []
+        for finding in self.func(context) or ():
+            finding.setdefault('severity', self.severity)
+            finding.setdefault('deduction', self.deduction)
+            # Identity across scans: descriptions carry measured values and several findings share a name
+            subject = finding.pop('subject', None)
+            finding['id'] = f'{self.name}:{subject if subject is not None else finding["name"]}'
+            findings.append(finding)
+        return findings
+
+
+def _known_input(name):
+    base, _, region = name.partition('.')
+    if region:
+        return base == 'index' and region in REGIONS
+    return base in INPUTS
+
+
+def check(category, name=None, inputs=(), severity='medium', deduction=0, cost='cheap'):
+    """Register the decorated function as an audit check
+
+    The function receives an ``AuditContext`` and returns (or yields) finding
+    dicts. A finding may override the check's ``severity`` and ``deduction``.
+    """
+    if category not in CATEGORIES:
+        raise ValueError(f'Unknown check category: {category}')
+    if severity not in SEVERITIES:
+        raise ValueError(f'Unknown severity: {severity}')
+    if cost not in COSTS:
+        raise ValueError(f'Unknown cost class: {cost}')
+    unknown = {i for i in inputs if not _known_input(i)}
+    if unknown:
+        raise ValueError(f'Unknown check inputs: {", ".join(sorted(unknown))}')
+
+    def decorator(func):
+        check_name = name or func.__name__
+        if check_name in REGISTRY:
+            raise ValueError(f'Duplicate check name: {check_name}')
+        REGISTRY[check_name] = Check(check_name, category, func, inputs, severity, deduction, cost)
+        return func
+
+    return decorator
+
+
+def finding(name, description, fix_steps, **extra):
+    """Build a finding dict in the shape the report templates expect
+
+    Pass ``subject`` (a header, a pattern) when one check can report several
+    findings under the same name; it becomes part of the finding's ``id``.
+    """
+    result = {'name': name, 'description': description, 'fix_steps': fix_steps}
+    result.update(extra)
+    return result
+
+
+def _digest(value):
+    if isinstance(value, (set, frozenset)):
+        value = sorted(value)
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()
+
+
+class AuditContext:
+    """The inputs a check may read, derived from one page fetch
+
+    ``assets`` is only set when the optional asset pass ran and ``tls`` when
+    the host's TLS setup was inspected; checks that declare an input the
+    context does not provide are skipped.
+
+    ``previous`` is the ``check_state`` of an earlier audit of the same page
+    and options. With ``keep_state`` (or ``previous``), ``run_checks`` fills
+    ``check_state`` with each check's input fingerprint, findings and run
+    time for the next audit to reuse; otherwise no fingerprints are computed.
+    """
+
+    def __init__(self, url, response, index, assets=None, previous=None, keep_state=False, tls=None):
+        self.url = url
+        self.response = response
+        self.index = index
+        self.assets = assets
+        self.tls = tls
+        self.previous = previous or {}
+        self.check_state = {} if keep_state or previous else None
+        self._fingerprints = {}
+        self._signature_matches = None
+        self._scan_lock = threading.Lock()
+
+    def provides(self, inputs):
+        return (('assets' not in inputs or self.assets is not None)
+                and ('tls' not in inputs or self.tls is not None))
+
+    def fingerprint(self, input_name):
+        """Digest of one input, or ``None`` for inputs that differ on every fetch"""
+        if input_name not in self._fingerprints:
+            if input_name == 'timing':
+                value = None
+            elif input_name == 'url':
+                value = self.url
+            elif input_name == 'headers':
+                value = _digest(sorted((k.lower(), v) for k, v in self.headers.items()
+                                       if k.lower() not in VOLATILE_HEADERS))
+            elif input_name == 'body':
+                value = hashlib.sha256(self.body).hexdigest()
+            elif input_name == 'assets':
+                value = _digest(self.assets)
+            elif input_name == 'tls':
+                # The day is included so certificate expiry countdowns are re-evaluated daily
+                value = _digest((sorted((k, v) for k, v in self.tls.items() if k not in TLS_VOLATILE_KEYS),
+                                 int(time.time() // 86400)))
+            elif input_name == 'index':
+                value = _digest([self.fingerprint(f'index.{region}') for region in REGIONS])
+            else:
+                value = _digest(getattr(self.index, input_name[len('index.'):]))
+            self._fingerprints[input_name] = value
+        return self._fingerprints[input_name]
+
+    def check_fingerprint(self, check_obj):
+        """Fingerprint of everything ``check_obj`` reads, or ``None`` if it must always run"""
+        parts = [self.fingerprint(i) for i in check_obj.inputs]
+        if not parts or None in parts:
+            return None
+        return _digest(parts)
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    @property
+    def body(self):
+        return self.response.content
+
+    @property
+    def timing(self):
+        return self.response
+
+    @property
+    def signature_matches(self):
+        """Matches of every registered content signature, from one scan of the raw body"""
+        with self._scan_lock:
+            if self._signature_matches is None:
+                self._signature_matches = SIGNATURES.scan(self.response.content)
+            return self._signature_matches
+
+    def signature_findings(self, group):
+        """``(signature, match)`` pairs for the signatures of ``group`` found in the body"""
+        matches = self.signature_matches
+        for signature in SIGNATURES.by_group(group):
+            if signature.id in matches:
+                yield signature, matches[signature.id]
+
+
+def parse_categories(value):
+    """Turn ``'security,seo'`` or a list into a validated tuple of categories"""
+    if not value:
+        return CATEGORIES
+    if isinstance(value, str):
+        value = value.split(',')
+    categories = tuple(c.strip().lower() for c in value if c.strip())
+    unknown = [c for c in categories if c not in CATEGORIES]
+    if unknown:
+        raise ValueError(f'Unknown categories: {", ".join(unknown)} (choose from {", ".join(CATEGORIES)})')
+    return categories or CATEGORIES
+
+
+def parse_max_cost(value):
+    """Validate a ``max_cost`` option; empty means no limit"""
+    if not value:
+        return None
+    if value not in COSTS:
+        raise ValueError(f'Unknown cost class: {value} (choose from {", ".join(COSTS)})')
+    return value
+
+
+def select_checks(categories=None, skip=(), max_cost=None):
+    """Registered checks for ``categories``, minus skipped names and costlier checks"""
+    categories = parse_categories(categories)
+    max_cost = parse_max_cost(max_cost)
+    allowed_costs = COSTS[:COSTS.index(max_cost) + 1] if max_cost else COSTS
+    return [c for c in REGISTRY.values()
+            if c.category in categories and c.name not in skip and c.cost in allowed_costs]
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CHECK_WORKERS, thread_name_prefix='audit-check')
+        return _executor
+
+
+def _timed_run(check_obj, context):
+    start = time.perf_counter()
+    findings = check_obj.run(context)
+    return findings, time.perf_counter() - start
+
+
+def run_checks(context, categories=None, skip=(), max_cost=None, parallel=True):
+    """Run the selected checks against ``context``
+
+    Returns ``{category: {'score', 'findings'}, ..., 'checks': {...}}`` where
+    ``checks`` maps each executed check name to its category, run time and
+    whether its findings were ``reused`` from the previous audit. When there
+    was a previous audit, ``reuse`` counts recomputed and reused checks and
+    the check time saved. Findings keep registration order regardless of
+    completion order.
+    """
+    categories = parse_categories(categories)
+    selected = [c for c in select_checks(categories, skip, max_cost) if context.provides(c.inputs)]
+
+    fingerprints = {}
+    outcomes = {}
+    if context.check_state is not None:
+        for check_obj in selected:
+            fingerprint = fingerprints[check_obj.name] = context.check_fingerprint(check_obj)
+            previous = context.previous.get(check_obj.name)
+            if fingerprint is not None and previous is not None and previous['fingerprint'] == fingerprint:
+                outcomes[check_obj.name] = copy.deepcopy(previous['findings']), previous['time'], True
+
+    futures = {}
+    if parallel:
+        executor = _get_executor()
+        for check_obj in selected:
+            if check_obj.cost == 'expensive' and check_obj.name not in outcomes:
+                futures[check_obj.name] = executor.submit(_timed_run, check_obj, context)
+    for check_obj in selected:
+        if check_obj.name not in futures and check_obj.name not in outcomes:
+            outcomes[check_obj.name] = _timed_run(check_obj, context) + (False,)
+    for name, future in futures.items():
+        outcomes[name] = future.result() + (False,)
+
+    results = OrderedDict((category, {'score': 100, 'findings': []}) for category in categories)
+    timings = OrderedDict()
+    saved = 0.0
+    for check_obj in selected:
+        findings, elapsed, reused = outcomes[check_obj.name]
+        category = results[check_obj.category]
+        category['findings'].extend(findings)
+        category['score'] -= sum(f['deduction'] for f in findings)
+        timings[check_obj.name] = {'category': check_obj.category, 'time': 0.0 if reused else round(elapsed, 6),
+                                   'reused': reused}
+        if reused:
+            saved += elapsed
+        if context.check_state is not None:
+            context.check_state[check_obj.name] = {'fingerprint': fingerprints[check_obj.name],
+                                                   'findings': findings, 'time': elapsed}
+    for category in results.values():
+        category['score'] = max(0, category['score'])
+
+    results['checks'] = timings
+    if context.previous:
+        reused = sum(1 for t in timings.values() if t['reused'])
+        results['reuse'] = {'recomputed': len(timings) - reused, 'reused': reused, 'time_saved': round(saved, 6)}
+    return results
+
+
+def summarize(results, categories=CATEGORIES):
+    """Issue counts by severity across the audited categories"""
+    summary = {'total_issues': 0}
+    for severity in SEVERITIES:
+        summary[f'{severity}_issues'] = 0
+    for category in categories:
+        for f in results.get(category, {}).get('findings', []):
+            summary['total_issues'] += 1
+            summary[f'{f["severity"]}_issues'] += 1
+    return summary
+
+
+from checks import security, performance, seo, accessibility, custom, tls  # noqa: E402,F401  (register built-ins)
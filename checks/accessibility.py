@@ -0,0 +1,73 @@
+from checks import check, finding
+from patterns import register
+
+register('color:color', 'color: #', group='color')
+register('color:background-color', 'background-color: #', group='color')
+
+
+@check('accessibility', name='image_alt_text_a11y', inputs=('index.images',), severity='high', deduction=15)
+def image_alt_text(ctx):
+    images_without_alt = ctx.index.images_without_alt()
+    if images_without_alt:
+        yield finding(
+            'Images Missing Alt Text',
+            f'{len(images_without_alt)} images missing alt text for screen readers',
+            [
+                'Add descriptive alt text to all images',
+                'Describe image content clearly',
+                'Use alt="" for decorative images',
+                'Test with screen readers'
+            ]
+        )
+
+
+@check('accessibility', inputs=('index.forms', 'index.labels_for'), severity='medium', deduction=5)
+def form_labels(ctx):
+    labels_for = ctx.index.labels_for
+    for inputs in ctx.index.forms:
+        for input_field in inputs:
+            if input_field.get('type') not in ['hidden', 'submit', 'button']:
+                if not input_field.get('id') or input_field['id'] not in labels_for:
+                    yield finding(
+                        'Form Input Missing Label',
+                        'Form input field missing proper label association',
+                        [
+                            'Add unique ID to input field',
+                            'Create label with matching "for" attribute',
+                            'Use descriptive label text',
+                            'Test with screen readers'
+                        ]
+                    )
+                    break
+
+
+@check('accessibility', inputs=('body',), severity='low', deduction=5, cost='expensive')
+def color_contrast(ctx):
+    matches = [m for _, match in ctx.signature_findings('color') for m in match['matches']]
+    if matches:
+        yield finding(
+            'Color Contrast Check Needed',
+            'Page uses custom colors - verify contrast ratios',
+            [
+                'Test color contrast ratios (4.5:1 minimum)',
+                'Use high contrast color combinations',
+                'Test with color blindness simulators',
+                'Provide alternative color schemes'
+            ],
+            matches=sorted(matches, key=lambda m: m['offset'])
+        )
+
+
+@check('accessibility', inputs=('index.links', 'index.button_count'), severity='medium', deduction=10)
+def keyboard_navigation(ctx):
+    if not ctx.index.anchor_count and not ctx.index.button_count:
+        yield finding(
+            'Keyboard Navigation Issues',
+            'Page may have keyboard navigation problems',
+            [
+                'Ensure all interactive elements are keyboard accessible',
+                'Add skip navigation links',
+                'Test tab order and focus indicators',
+                'Implement proper ARIA labels'
+            ]
+        )
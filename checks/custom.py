@@ -0,0 +1,24 @@
+from checks import CATEGORIES, check, finding
+from patterns import CUSTOM_GROUP
+
+
+def _custom_signatures(category):
+    def run(ctx):
+        for signature, match in ctx.signature_findings(CUSTOM_GROUP):
+            if signature.category == category:
+                yield finding(
+                    signature.name,
+                    signature.description,
+                    signature.fix_steps,
+                    severity=signature.severity,
+                    deduction=signature.deduction,
+                    matches=match['matches'],
+                    subject=signature.id
+                )
+    return run
+
+
+# One check per category reports the signatures loaded from a rules file
+for _category in CATEGORIES:
+    check(_category, name=f'custom_signatures_{_category}', inputs=('body',), cost='expensive')(
+        _custom_signatures(_category))
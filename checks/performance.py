@@ -0,0 +1,153 @@
+from checks import check, finding
+
+
+@check('performance', inputs=('timing',), severity='high', deduction=20)
+def page_load_time(ctx):
+    load_time = ctx.timing.load_time
+    ttfb = ctx.timing.ttfb
+    if load_time > 3:
+        yield finding(
+            'Slow Page Load Time',
+            f'Page takes {load_time:.2f} seconds to load (TTFB {ttfb:.2f}s, should be under 3 seconds)',
+            [
+                'Optimize server response time',
+                'Minimize HTTP requests',
+                'Enable compression (Gzip)',
+                'Use CDN for static assets',
+                'Optimize images and media files'
+            ]
+        )
+    elif load_time > 1.5:
+        yield finding(
+            'Moderate Page Load Time',
+            f'Page takes {load_time:.2f} seconds to load (TTFB {ttfb:.2f}s, could be faster)',
+            [
+                'Optimize server configuration',
+                'Reduce server-side processing',
+                'Implement caching strategies',
+                'Optimize database queries'
+            ],
+            severity='medium',
+            deduction=10
+        )
+
+
+@check('performance', inputs=('index.images',), severity='medium', deduction=10)
+def large_images(ctx):
+    large = 0
+    for img in ctx.index.images:
+        if img.get('width', '').isdigit() and img.get('height', '').isdigit():
+            if int(img['width']) > 1920 or int(img['height']) > 1080:
+                large += 1
+
+    if large > 0:
+        yield finding(
+            'Large Images Detected',
+            f'Found {large} images that may be too large for web use',
+            [
+                'Resize images to appropriate dimensions',
+                'Use responsive images with srcset',
+                'Implement lazy loading',
+                'Optimize image formats (WebP, AVIF)',
+                'Use image compression tools'
+            ]
+        )
+
+
+@check('performance', inputs=('index.scripts',), severity='low', deduction=5)
+def script_count(ctx):
+    scripts = ctx.index.scripts
+    if len(scripts) > 10:
+        yield finding(
+            'Too Many JavaScript Files',
+            f'Found {len(scripts)} script tags (consider bundling)',
+            [
+                'Bundle JavaScript files',
+                'Minify JavaScript code',
+                'Use async/defer attributes',
+                'Remove unused JavaScript',
+                'Implement code splitting'
+            ]
+        )
+
+
+@check('performance', inputs=('index.stylesheets',), severity='low', deduction=5)
+def stylesheet_count(ctx):
+    stylesheets = ctx.index.stylesheets
+    if len(stylesheets) > 5:
+        yield finding(
+            'Too Many CSS Files',
+            f'Found {len(stylesheets)} stylesheet links (consider bundling)',
+            [
+                'Bundle CSS files',
+                'Minify CSS code',
+                'Remove unused CSS',
+                'Use critical CSS inline',
+                'Implement CSS optimization'
+            ]
+        )
+
+
+@check('performance', inputs=('assets', 'body'), severity='high', deduction=15, cost='expensive')
+def page_weight(ctx):
+    total = len(ctx.body) + sum(a.get('size') or 0 for a in ctx.assets)
+    heaviest = max(ctx.assets, key=lambda a: a.get('size') or 0, default=None)
+    detail = f' (largest: {heaviest["url"]}, {heaviest["size"] / 1024:.0f} KB)' if heaviest and heaviest.get('size') else ''
+    if total > 3 * 1024 * 1024:
+        yield finding(
+            'Heavy Page Weight',
+            f'Page and its assets transfer {total / (1024 * 1024):.1f} MB{detail}',
+            [
+                'Compress and resize images',
+                'Remove unused JavaScript and CSS',
+                'Lazy-load below-the-fold media',
+                'Audit third-party scripts'
+            ]
+        )
+    elif total > 1.5 * 1024 * 1024:
+        yield finding(
+            'Moderate Page Weight',
+            f'Page and its assets transfer {total / (1024 * 1024):.1f} MB{detail}',
+            [
+                'Compress and resize images',
+                'Minify and bundle scripts and stylesheets',
+                'Lazy-load below-the-fold media'
+            ],
+            severity='medium',
+            deduction=5
+        )
+
+
+@check('performance', inputs=('url', 'assets', 'headers', 'body'), severity='medium', deduction=5, cost='expensive')
+def text_compression(ctx):
+    uncompressed = [a for a in ctx.assets
+                    if a['type'] in ('script', 'stylesheet') and (a.get('size') or 0) > 1024
+                    and a.get('encoding') not in ('gzip', 'br', 'deflate', 'zstd')]
+    if ctx.headers.get('Content-Encoding') is None and len(ctx.body) > 1024:
+        uncompressed.insert(0, {'url': ctx.url})
+    if uncompressed:
+        yield finding(
+            'Text Compression Not Enabled',
+            f'{len(uncompressed)} HTML, script or stylesheet responses are served without gzip/br compression',
+            [
+                'Enable gzip or Brotli compression on the web server or CDN',
+                'Compress HTML, JavaScript, CSS and SVG responses',
+                'Verify the Content-Encoding response header'
+            ]
+        )
+
+
+@check('performance', inputs=('assets',), severity='low', deduction=5, cost='expensive')
+def asset_caching(ctx):
+    uncached = [a for a in ctx.assets if a.get('status') and a['status'] < 400
+                and not any(d in (a.get('cache_control') or '').lower() for d in ('max-age', 'immutable'))]
+    if uncached:
+        yield finding(
+            'Assets Missing Cache Headers',
+            f'{len(uncached)} of {len(ctx.assets)} assets have no Cache-Control max-age',
+            [
+                'Serve static assets with long Cache-Control max-age',
+                'Use fingerprinted file names for cache busting',
+                'Mark versioned assets as immutable'
+            ]
+        )
@@ -0,0 +1,104 @@
+from checks import check, finding
+from patterns import register
+
+SECURITY_HEADERS = {
+    'X-Frame-Options': 'Missing X-Frame-Options header (clickjacking protection)',
+    'X-Content-Type-Options': 'Missing X-Content-Type-Options header (MIME sniffing protection)',
+    'X-XSS-Protection': 'Missing X-XSS-Protection header (XSS protection)',
+    'Strict-Transport-Security': 'Missing HSTS header (HTTPS enforcement)',
+    'Content-Security-Policy': 'Missing CSP header (content security policy)',
+    'Referrer-Policy': 'Missing Referrer-Policy header (referrer control)'
+}
+
+SERVER_HEADERS = ['Server', 'X-Powered-By', 'X-AspNet-Version']
+
+SQL_PATTERNS = ['mysql_error', 'oracle error', 'sql server error', 'postgresql error']
+
+XSS_PATTERNS = ['<script>', 'javascript:', 'onerror=', 'onload=']
+
+for _pattern in SQL_PATTERNS:
+    register(f'sql_error:{_pattern}', _pattern, group='sql_error')
+for _pattern in XSS_PATTERNS:
+    register(f'xss:{_pattern}', _pattern, group='xss')
+
+
+@check('security', inputs=('url',), severity='high', deduction=25)
+def https_enabled(ctx):
+    if not ctx.url.startswith('https://'):
+        yield finding(
+            'HTTPS Not Enabled',
+            'Website is not using secure HTTPS connection',
+            [
+                'Purchase and install SSL certificate',
+                'Configure server to redirect HTTP to HTTPS',
+                'Update all internal links to use HTTPS',
+                'Test all functionality after HTTPS migration'
+            ]
+        )
+
+
+@check('security', inputs=('headers',), severity='medium', deduction=5)
+def security_headers(ctx):
+    for header, description in SECURITY_HEADERS.items():
+        if header not in ctx.headers:
+            yield finding(
+                f'Missing {header}',
+                description,
+                [
+                    f'Add {header} header to server configuration',
+                    'Configure appropriate values for the header',
+                    'Test the header implementation',
+                    'Monitor for any functionality issues'
+                ]
+            )
+
+
+@check('security', inputs=('headers',), severity='low', deduction=3)
+def server_disclosure(ctx):
+    for header in SERVER_HEADERS:
+        if header in ctx.headers:
+            yield finding(
+                'Server Information Disclosure',
+                f'{header} header reveals server information: {ctx.headers[header]}',
+                [
+                    'Remove or modify server information headers',
+                    'Configure server to hide version information',
+                    'Use generic server names',
+                    'Regularly audit server configuration'
+                ],
+                subject=header
+            )
+
+
+@check('security', inputs=('body',), severity='critical', deduction=15, cost='expensive')
+def sql_error_disclosure(ctx):
+    for signature, match in ctx.signature_findings('sql_error'):
+        yield finding(
+            'SQL Error Information Disclosure',
+            f'Database error information is exposed: {signature.pattern}',
+            [
+                'Implement proper error handling',
+                'Use parameterized queries',
+                'Configure custom error pages',
+                'Enable error logging instead of user display'
+            ],
+            matches=match['matches'],
+            subject=signature.id
+        )
+
+
+@check('security', inputs=('body',), severity='high', deduction=10, cost='expensive')
+def xss_patterns(ctx):
+    for signature, match in ctx.signature_findings('xss'):
+        yield finding(
+            'Potential XSS Vulnerability',
+            f'Potentially dangerous pattern found: {signature.pattern}',
+            [
+                'Sanitize all user inputs',
+                'Use Content Security Policy (CSP)',
+                'Implement output encoding',
+                'Regular security testing'
+            ],
+            matches=match['matches'],
+            subject=signature.id
+        )
@@ -0,0 +1,104 @@
+from checks import check, finding
+
+
+@check('seo', inputs=('index.title',), severity='high', deduction=20)
+def title_tag(ctx):
+    title = ctx.index.title
+    if not title or not title.strip():
+        yield finding(
+            'Missing Title Tag',
+            'Page has no title tag or empty title',
+            [
+                'Add a unique, descriptive title tag',
+                'Keep title between 50-60 characters',
+                'Include primary keyword naturally',
+                'Make title compelling for users'
+            ]
+        )
+    elif len(title) > 60:
+        yield finding(
+            'Title Too Long',
+            f'Title is {len(title)} characters (should be 50-60)',
+            [
+                'Shorten title to 50-60 characters',
+                'Focus on primary keyword',
+                'Make it compelling and clear',
+                'Test in search results preview'
+            ],
+            severity='low',
+            deduction=10
+        )
+
+
+@check('seo', inputs=('index.meta_description',), severity='medium', deduction=15)
+def meta_description(ctx):
+    meta_desc = ctx.index.meta_description
+    if not meta_desc:
+        yield finding(
+            'Missing Meta Description',
+            'Page has no meta description',
+            [
+                'Add unique meta description',
+                'Keep it between 150-160 characters',
+                'Include primary keyword naturally',
+                'Make it compelling for click-throughs'
+            ]
+        )
+    elif len(meta_desc) > 160:
+        yield finding(
+            'Meta Description Too Long',
+            f'Meta description is {len(meta_desc)} characters',
+            [
+                'Shorten to 150-160 characters',
+                'Focus on compelling description',
+                'Include primary keyword',
+                'Test in search results'
+            ],
+            severity='low',
+            deduction=5
+        )
+
+
+@check('seo', inputs=('index.headings',), severity='medium', deduction=15)
+def heading_structure(ctx):
+    h1_count = ctx.index.h1_count
+    if h1_count == 0:
+        yield finding(
+            'Missing H1 Tag',
+            'Page has no H1 heading tag',
+            [
+                'Add a single H1 tag per page',
+                'Include primary keyword naturally',
+                'Make it descriptive and compelling',
+                'Ensure it matches page content'
+            ]
+        )
+    elif h1_count > 1:
+        yield finding(
+            'Multiple H1 Tags',
+            f'Page has {h1_count} H1 tags (should have only one)',
+            [
+                'Use only one H1 tag per page',
+                'Convert extra H1s to H2 or H3',
+                'Maintain proper heading hierarchy',
+                'Ensure H1 represents main topic'
+            ],
+            severity='low',
+            deduction=10
+        )
+
+
+@check('seo', inputs=('index.images',), severity='medium', deduction=10)
+def image_alt_text(ctx):
+    images_without_alt = ctx.index.images_without_alt()
+    if images_without_alt:
+        yield finding(
+            'Images Missing Alt Text',
+            f'{len(images_without_alt)} images missing alt text',
+            [
+                'Add descriptive alt text to all images',
+                'Include relevant keywords naturally',
+                'Describe image content clearly',
+                'Use alt="" for decorative images'
+            ]
+        )
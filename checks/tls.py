@@ -0,0 +1,117 @@
+import time
+
+from checks import check, finding
+
+EXPIRY_WARNING_DAYS = 30
+
+LEGACY_PROTOCOLS = ('SSLv2', 'SSLv3', 'TLSv1', 'TLSv1.1')
+
+WEAK_CIPHER_MARKERS = ('NULL', 'EXPORT', 'RC4', 'DES', 'MD5', 'ANON')
+
+# OpenSSL's X509_V_ERR_CERT_HAS_EXPIRED; reported by tls_certificate_expiry when the expiry date is known
+CERT_HAS_EXPIRED = 10
+
+
+@check('security', inputs=('tls',), severity='high', deduction=20)
+def tls_handshake(ctx):
+    if ctx.tls['error']:
+        yield finding(
+            'TLS Handshake Failed',
+            f'A standard TLS client could not connect to {ctx.tls["host"]}:{ctx.tls["port"]}: {ctx.tls["error"]}',
+            [
+                'Enable TLS 1.2 and TLS 1.3 on the server',
+                'Check that the certificate and private key are installed correctly',
+                'Test the server with an SSL checker such as SSL Labs',
+                'Disable protocols and ciphers that modern clients reject'
+            ]
+        )
+
+
+@check('security', inputs=('tls',), severity='high', deduction=20)
+def tls_certificate(ctx):
+    if ctx.tls['error'] or ctx.tls['verified']:
+        return
+    certificate = ctx.tls['certificate'] or {}
+    if ctx.tls['verify_code'] == CERT_HAS_EXPIRED and certificate.get('not_after'):
+        return
+    detail = 'is self-signed' if certificate.get('self_signed') else f'is not trusted ({ctx.tls["verify_error"]})'
+    yield finding(
+        'Untrusted TLS Certificate',
+        f'The certificate served by {ctx.tls["host"]} {detail}; browsers will show a security warning',
+        [
+            'Obtain a certificate from a trusted certificate authority (e.g. Let\'s Encrypt)',
+            'Install the full chain including intermediate certificates',
+            'Verify the chain with openssl s_client -showcerts',
+            'Automate certificate renewal'
+        ]
+    )
+
+
+@check('security', inputs=('tls',), severity='high', deduction=15)
+def tls_certificate_expiry(ctx):
+    certificate = ctx.tls['certificate']
+    if not certificate or not certificate['not_after']:
+        return
+    days_left = (certificate['not_after'] - time.time()) / 86400
+    fix_steps = [
+        'Renew the TLS certificate',
+        'Install the renewed certificate on every server and load balancer',
+        'Automate renewal (e.g. certbot or your CDN\'s managed certificates)',
+        'Monitor certificate expiry dates'
+    ]
+    if days_left < 0:
+        yield finding(
+            'TLS Certificate Expired',
+            f'The certificate for {ctx.tls["host"]} expired {int(-days_left)} days ago',
+            fix_steps,
+            severity='critical', deduction=25
+        )
+    elif days_left < EXPIRY_WARNING_DAYS:
+        yield finding(
+            'TLS Certificate Expiring Soon',
+            f'The certificate for {ctx.tls["host"]} expires in {int(days_left)} days',
+            fix_steps,
+            severity='medium', deduction=5
+        )
+
+
+@check('security', inputs=('tls',), severity='high', deduction=15)
+def tls_hostname(ctx):
+    if ctx.tls['hostname_match'] is False:
+        certificate = ctx.tls['certificate'] or {}
+        names = ', '.join(certificate.get('san') or [certificate.get('subject') or 'none'])
+        yield finding(
+            'TLS Certificate Hostname Mismatch',
+            f'The certificate is not valid for {ctx.tls["host"]} (issued for: {names})',
+            [
+                'Issue a certificate that lists this host name in its Subject Alternative Names',
+                'Check that the server sends the right certificate for this name (SNI)',
+                'Redirect alternative host names to the canonical one'
+            ]
+        )
+
+
+@check('security', inputs=('tls',), severity='medium', deduction=10)
+def tls_protocol(ctx):
+    if ctx.tls['protocol'] in LEGACY_PROTOCOLS:
+        yield finding(
+            'Outdated TLS Protocol',
+            f'The server negotiated {ctx.tls["protocol"]}, which is deprecated and insecure',
+            [
+                'Enable TLS 1.2 and TLS 1.3',
+                'Disable SSLv3, TLS 1.0 and TLS 1.1',
+                'Restart the server and retest the configuration'
+            ]
+        )
+    cipher = (ctx.tls['cipher'] or '').upper()
+    bits = ctx.tls['cipher_bits']
+    if cipher and (any(marker in cipher for marker in WEAK_CIPHER_MARKERS) or (bits is not None and bits < 128)):
+        yield finding(
+            'Weak TLS Cipher',
+            f'The server negotiated the weak cipher {ctx.tls["cipher"]} ({bits} bits)',
+            [
+                'Prefer AEAD ciphers such as AES-GCM and ChaCha20-Poly1305',
+                'Remove NULL, EXPORT, RC4, DES and 3DES cipher suites',
+                'Use a maintained configuration such as Mozilla\'s SSL Configuration Generator'
+            ]
+        )
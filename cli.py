@@ -0,0 +1,280 @@
+"""Command-line entry point for running audits without the web UI
+
+Usage:
+    python cli.py batch https://example.com https://example.org
+    python cli.py batch -f urls.txt --concurrency 16 --per-host 2 > results.ndjson
+    python cli.py crawl https://example.com --max-pages 200 --max-depth 3 --sitemap
+    python cli.py batch -f urls.txt --format sarif -o results.sarif
+    python cli.py export results.ndjson --format csv > findings.csv
+    python cli.py schedule add https://example.com --interval 6h --threshold security=80
+    python cli.py schedule run --workers 4
+    python cli.py --rules rules.json batch -f urls.txt
+"""
+import argparse
+import json
+import os
+import sys
+from functools import partial
+
+from batch import run_batch, read_url_list
+
+EXPORT_FORMATS = ('json', 'ndjson', 'csv', 'sarif')
+
+
+def write_results(results, fmt, path):
+    """Write audit results as raw NDJSON, or as an export when ``fmt`` is set"""
+    if fmt:
+        from exports import export
+        chunks = export(results, fmt)
+    else:
+        chunks = (json.dumps(result) + '\n' for result in results)
+    out = open(path, 'w', newline='') if path else sys.stdout
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def analysis_pool(args):
+    if not args.analysis_workers:
+        return None
+    from analysis import AnalysisPool
+    return AnalysisPool(workers=args.analysis_workers)
+
+
+def tls_inspector(args):
+    if args.no_tls:
+        return None
+    from tls_inspector import TlsInspector
+    return TlsInspector()
+
+
+def batch_command(args):
+    from audit import comprehensive_website_audit
+    from checks import parse_categories, parse_max_cost
+
+    try:
+        audit = partial(comprehensive_website_audit, categories=parse_categories(args.categories),
+                        max_cost=parse_max_cost(args.max_cost), analysis=analysis_pool(args),
+                        tls=tls_inspector(args))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    urls = list(args.urls)
+    if args.file == '-':
+        urls.extend(read_url_list(sys.stdin))
+    elif args.file:
+        with open(args.file) as fh:
+            urls.extend(read_url_list(fh))
+    if not urls:
+        print('No URLs supplied', file=sys.stderr)
+        return 2
+
+    write_results(run_batch(urls, audit, concurrency=args.concurrency, per_host=args.per_host),
+                  args.format, args.output)
+    return 0
+
+
+def crawl_command(args):
+    from audit import audit_page
+    from checks import parse_categories, parse_max_cost
+    from crawler import Crawler
+
+    try:
+        categories = parse_categories(args.categories)
+        audit = partial(audit_page, categories=categories, max_cost=parse_max_cost(args.max_cost),
+                        analysis=analysis_pool(args), tls=tls_inspector(args))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    crawler = Crawler(args.url, audit, max_depth=args.max_depth, max_pages=args.max_pages,
+                      concurrency=args.concurrency, rate=args.rate, use_sitemap=args.sitemap,
+                      obey_robots=not args.ignore_robots, categories=categories)
+    if args.format:
+        # Exports carry the audited pages; the crawl summary is only in the NDJSON stream
+        write_results((result for _, result in crawler.crawl()), args.format, args.output)
+        return 0
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for depth, result in crawler.crawl():
+            out.write(json.dumps({'type': 'page', 'depth': depth, 'result': result}) + '\n')
+            out.flush()
+        out.write(json.dumps({'type': 'summary', 'summary': crawler.summary.to_dict()}) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def read_results(fh):
+    """Audit results from batch NDJSON, or the pages of crawl NDJSON"""
+    for line in fh:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if record.get('type') == 'page':
+            yield record['result']
+        elif record.get('type') != 'summary':
+            yield record
+
+
+def export_command(args):
+    fh = sys.stdin if args.input == '-' else open(args.input)
+    try:
+        write_results(read_results(fh), args.format, args.output)
+    except ValueError as e:
+        print(f'Invalid results file: {e}', file=sys.stderr)
+        return 2
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    return 0
+
+
+def schedule_store():
+    from scheduler import ScheduleStore
+    return ScheduleStore(os.environ.get('SCHEDULE_DB', 'audit_schedules.db'))
+
+
+def schedule_add_command(args):
+    from batch import normalize_url
+    try:
+        schedule = schedule_store().add(normalize_url(args.url), args.interval, categories=args.categories,
+                                        thresholds=args.threshold, webhook=args.webhook)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(json.dumps(schedule))
+    return 0
+
+
+def schedule_list_command(args):
+    for schedule in schedule_store().schedules(limit=args.limit):
+        print(json.dumps(schedule))
+    return 0
+
+
+def schedule_remove_command(args):
+    if not schedule_store().remove(args.id):
+        print(f'Unknown schedule: {args.id}', file=sys.stderr)
+        return 1
+    return 0
+
+
+def schedule_alerts_command(args):
+    for alert in schedule_store().alerts(schedule_id=args.schedule_id, limit=args.limit):
+        print(json.dumps(alert))
+    return 0
+
+
+def schedule_run_command(args):
+    import time
+    from audit import comprehensive_website_audit
+    from history import AuditHistory
+    from scheduler import Scheduler
+
+    audit = partial(comprehensive_website_audit, analysis=analysis_pool(args), tls=tls_inspector(args))
+    scheduler = Scheduler(schedule_store(), audit, AuditHistory(os.environ.get('HISTORY_DB', 'audit_history.db')),
+                          workers=args.workers, webhook=args.webhook).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.shutdown()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Comprehensive website audit tool')
+    parser.add_argument('--rules', default=os.environ.get('AUDIT_RULES_FILE'),
+                        help='JSON file with extra content signatures (default: $AUDIT_RULES_FILE)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help='Audit a list of URLs concurrently, streaming NDJSON results')
+    batch.add_argument('urls', nargs='*', help='URLs to audit')
+    batch.add_argument('-f', '--file', help='File with one URL per line ("-" for stdin)')
+    batch.add_argument('-c', '--concurrency', type=int, default=8, help='Maximum audits in flight (default: 8)')
+    batch.add_argument('--per-host', type=int, default=2, help='Maximum concurrent audits per host (default: 2)')
+    batch.add_argument('--categories', help='Comma-separated categories to audit (default: all)')
+    batch.add_argument('--max-cost', choices=('cheap', 'expensive'), help='Skip checks costlier than this')
+    batch.add_argument('--no-tls', action='store_true', help='Skip the TLS certificate and protocol checks')
+    batch.add_argument('--analysis-workers', type=int, default=0,
+                       help='Parse and check pages in this many worker processes (default: on the audit threads)')
+    batch.add_argument('--format', choices=EXPORT_FORMATS, help='Write an export instead of raw result NDJSON')
+    batch.add_argument('-o', '--output', help='Write NDJSON to this file instead of stdout')
+    batch.set_defaults(handler=batch_command)
+
+    crawl = commands.add_parser('crawl', help='Crawl a site and audit every same-origin page, streaming NDJSON')
+    crawl.add_argument('url', help='Start URL')
+    crawl.add_argument('--max-depth', type=int, default=2, help='Link depth to follow from the start URL (default: 2)')
+    crawl.add_argument('--max-pages', type=int, default=100, help='Maximum pages to audit (default: 100)')
+    crawl.add_argument('-c', '--concurrency', type=int, default=4, help='Maximum audits in flight (default: 4)')
+    crawl.add_argument('--rate', type=float, default=2.0, help='Maximum requests per second to the host (default: 2)')
+    crawl.add_argument('--sitemap', action='store_true', help='Seed the crawl from sitemap.xml')
+    crawl.add_argument('--ignore-robots', action='store_true', help='Do not obey robots.txt')
+    crawl.add_argument('--categories', help='Comma-separated categories to audit (default: all)')
+    crawl.add_argument('--max-cost', choices=('cheap', 'expensive'), help='Skip checks costlier than this')
+    crawl.add_argument('--no-tls', action='store_true', help='Skip the TLS certificate and protocol checks')
+    crawl.add_argument('--analysis-workers', type=int, default=0,
+                       help='Parse and check pages in this many worker processes (default: on the audit threads)')
+    crawl.add_argument('--format', choices=EXPORT_FORMATS, help='Write an export of the pages instead of NDJSON')
+    crawl.add_argument('-o', '--output', help='Write NDJSON to this file instead of stdout')
+    crawl.set_defaults(handler=crawl_command)
+
+    export = commands.add_parser('export', help='Convert batch or crawl NDJSON results to an export format')
+    export.add_argument('input', help='NDJSON file written by batch or crawl ("-" for stdin)')
+    export.add_argument('--format', choices=EXPORT_FORMATS, default='json', help='Export format (default: json)')
+    export.add_argument('-o', '--output', help='Write the export to this file instead of stdout')
+    export.set_defaults(handler=export_command)
+
+    schedule = commands.add_parser('schedule', help='Manage and run recurring audits ($SCHEDULE_DB)')
+    schedule_commands = schedule.add_subparsers(dest='schedule_command', required=True)
+    add = schedule_commands.add_parser('add', help='Register a URL for recurring audits')
+    add.add_argument('url', help='URL to audit')
+    add.add_argument('--interval', default='1d', help='Time between audits: seconds or 30m, 6h, 1d (default: 1d)')
+    add.add_argument('--categories', help='Comma-separated categories to audit (default: all)')
+    add.add_argument('--threshold', help='Alert when a score drops below this, e.g. security=80,seo=70')
+    add.add_argument('--webhook', help='POST alerts of this schedule to this URL')
+    add.set_defaults(handler=schedule_add_command)
+    listing = schedule_commands.add_parser('list', help='Print registered schedules as NDJSON')
+    listing.add_argument('--limit', type=int, default=1000, help='Maximum schedules to print (default: 1000)')
+    listing.set_defaults(handler=schedule_list_command)
+    remove = schedule_commands.add_parser('remove', help='Delete a schedule')
+    remove.add_argument('id', help='Schedule ID')
+    remove.set_defaults(handler=schedule_remove_command)
+    alerts = schedule_commands.add_parser('alerts', help='Print recent alerts as NDJSON, newest first')
+    alerts.add_argument('--schedule-id', help='Only alerts of this schedule')
+    alerts.add_argument('--limit', type=int, default=100, help='Maximum alerts to print (default: 100)')
+    alerts.set_defaults(handler=schedule_alerts_command)
+    run = schedule_commands.add_parser('run', help='Run due audits until interrupted')
+    run.add_argument('-w', '--workers', type=int, default=4, help='Maximum scheduled audits in flight (default: 4)')
+    run.add_argument('--webhook', default=os.environ.get('ALERT_WEBHOOK'),
+                     help='Default alert webhook (default: $ALERT_WEBHOOK)')
+    run.add_argument('--no-tls', action='store_true', help='Skip the TLS certificate and protocol checks')
+    run.add_argument('--analysis-workers', type=int, default=0,
+                     help='Parse and check pages in this many worker processes (default: on the audit threads)')
+    run.set_defaults(handler=schedule_run_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.rules:
+        from patterns import SIGNATURES
+        try:
+            SIGNATURES.load_rules(args.rules)
+        except (OSError, ValueError) as e:
+            print(f'Cannot load rules: {e}', file=sys.stderr)
+            return 2
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
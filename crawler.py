@@ -0,0 +1,251 @@
+"""Site crawl mode: audit every same-origin page reachable from a start URL
+
+Pages are fetched and audited in a streaming pipeline: at most
+``concurrency`` audits are in flight, each finished page is yielded right
+away and folded into a ``SiteSummary``, and nothing but the frontier and
+the set of seen URLs (both capped by ``max_pages``) is kept in memory.
+"""
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from io import BytesIO
+from urllib.parse import urljoin, urldefrag, urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from checks import CATEGORIES
+from fetcher import default_fetcher
+
+ROBOTS_USER_AGENT = 'WebsiteAuditBot'
+SKIP_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.css', '.js',
+                   '.zip', '.gz', '.mp4', '.mp3', '.xml', '.json', '.woff', '.woff2')
+SCORE_BUCKETS = ('0-19', '20-39', '40-59', '60-79', '80-100')
+
+
+class HostRateLimiter:
+    """Spaces out request starts to at most ``rate`` per second per host"""
+
+    def __init__(self, rate=2.0):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def set_min_interval(self, interval):
+        with self._lock:
+            self.interval = max(self.interval, interval)
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class SiteSummary:
+    """Site-level aggregate built incrementally from per-page results"""
+
+    def __init__(self, categories=CATEGORIES):
+        self.categories = categories
+        self.pages = 0
+        self.errors = 0
+        self.skipped_robots = 0
+        self.scores = {c: {'count': 0, 'total': 0, 'min': None, 'max': None,
+                           'distribution': dict.fromkeys(SCORE_BUCKETS, 0)} for c in categories}
+        self.finding_pages = Counter()
+
+    def add(self, results):
+        self.pages += 1
+        if results.get('error'):
+            self.errors += 1
+            return
+        for category in self.categories:
+            if category not in results:
+                continue
+            score = results[category]['score']
+            stats = self.scores[category]
+            stats['count'] += 1
+            stats['total'] += score
+            stats['min'] = score if stats['min'] is None else min(stats['min'], score)
+            stats['max'] = score if stats['max'] is None else max(stats['max'], score)
+            stats['distribution'][SCORE_BUCKETS[min(score // 20, 4)]] += 1
+            # Count each finding once per page, however many times it occurs there
+            for name in {f['name'] for f in results[category]['findings']}:
+                self.finding_pages[(category, name)] += 1
+
+    def to_dict(self, top=10):
+        scores = {}
+        for category, stats in self.scores.items():
+            scores[category] = {
+                'pages': stats['count'],
+                'average': round(stats['total'] / stats['count'], 1) if stats['count'] else None,
+                'min': stats['min'],
+                'max': stats['max'],
+                'distribution': stats['distribution'],
+            }
+        return {
+            'pages_audited': self.pages,
+            'pages_failed': self.errors,
+            'pages_skipped_by_robots': self.skipped_robots,
+            'scores': scores,
+            'most_common_findings': [
+                {'category': category, 'name': name, 'pages': count}
+                for (category, name), count in self.finding_pages.most_common(top)
+            ],
+        }
+
+
+class Crawler:
+    """Breadth-first, same-origin crawl that audits each page it visits
+
+    ``audit`` is called with a URL and must return ``(audit_results, page_index)``
+    like ``audit.audit_page``. Iterate ``crawl()`` for ``(depth, results)``
+    pairs; ``summary`` holds the site-level aggregate once it is exhausted.
+    """
+
+    def __init__(self, start_url, audit, fetcher=None, max_depth=2, max_pages=100, concurrency=4,
+                 rate=2.0, use_sitemap=False, obey_robots=True, categories=CATEGORIES):
+        if not start_url.startswith(('http://', 'https://')):
+            start_url = 'https://' + start_url
+        self.start_url = urldefrag(start_url)[0]
+        self.origin = _origin(self.start_url)
+        # The start page may redirect (to www., to https); its final origin is added once it is audited
+        self.origins = {self.origin}
+        self.audit = audit
+        self.fetcher = fetcher or default_fetcher()
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = max(1, concurrency)
+        self.limiter = HostRateLimiter(rate)
+        self.use_sitemap = use_sitemap
+        self.obey_robots = obey_robots
+        self.robots = None
+        self.summary = SiteSummary(categories)
+        self._seen = set()
+        self._disallowed = set()
+        self._frontier = deque()
+
+    def crawl(self):
+        if self.obey_robots:
+            self._load_robots()
+        self._enqueue(self.start_url, 0)
+
+        audited = 0
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='audit-crawl') as executor:
+            while True:
+                while self._frontier and len(running) < self.concurrency and audited + len(running) < self.max_pages:
+                    url, depth = self._frontier.popleft()
+                    running[executor.submit(self._audit_one, url)] = depth
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    depth = running.pop(future)
+                    results, index = future.result()
+                    audited += 1
+                    if depth == 0:
+                        self._start_page_done(results)
+                    self.summary.add(results)
+                    if index is not None and depth < self.max_depth:
+                        base = results.get('fetch', {}).get('final_url') or results['url']
+                        for href in index.links:
+                            if href:
+                                self._enqueue(urljoin(base, href), depth + 1)
+                    yield depth, results
+
+    def _audit_one(self, url):
+        self.limiter.wait(urlparse(url).netloc)
+        try:
+            return self.audit(url)
+        except Exception as e:
+            return {'url': url, 'error': f'Audit failed: {str(e)}'}, None
+
+    def _start_page_done(self, results):
+        final_url = results.get('fetch', {}).get('final_url')
+        if final_url and _origin(final_url) not in self.origins:
+            self.origin = _origin(final_url)
+            self.origins.add(self.origin)
+            if self.obey_robots:
+                self.robots = None
+                self._load_robots()
+        # Seeded after the redirect is known, so sitemap entries on the final origin are kept
+        if self.use_sitemap:
+            for url in self._sitemap_urls():
+                self._enqueue(url, 1)
+
+    def _enqueue(self, url, depth):
+        url = urldefrag(url)[0]
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or _origin(url) not in self.origins:
+            return
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            return
+        # The seen set doubles as the crawl budget, so memory stays bounded by max_pages
+        if url in self._seen or len(self._seen) >= self.max_pages:
+            return
+        if self.robots is not None and not self.robots.can_fetch(ROBOTS_USER_AGENT, url):
+            if url not in self._disallowed:
+                self._disallowed.add(url)
+                self.summary.skipped_robots += 1
+            return
+        self._seen.add(url)
+        self._frontier.append((url, depth))
+
+    def _load_robots(self):
+        robots = RobotFileParser(urljoin(self.origin, '/robots.txt'))
+        try:
+            response = self.fetcher.fetch(robots.url)
+        except requests.exceptions.RequestException:
+            return
+        if response.status_code >= 400:
+            return
+        robots.parse(response.text.splitlines())
+        self.robots = robots
+        delay = robots.crawl_delay(ROBOTS_USER_AGENT)
+        if delay:
+            self.limiter.set_min_interval(float(delay))
+
+    def _sitemap_urls(self):
+        sitemaps = deque((self.robots.site_maps() if self.robots else None) or [urljoin(self.origin, '/sitemap.xml')])
+        visited = set()
+        while sitemaps and len(self._seen) < self.max_pages:
+            sitemap_url = sitemaps.popleft()
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            try:
+                response = self.fetcher.fetch(sitemap_url)
+            except requests.exceptions.RequestException:
+                continue
+            if response.status_code >= 400:
+                continue
+            try:
+                for tag, loc in _iter_sitemap(response.content):
+                    if tag == 'sitemap':
+                        sitemaps.append(loc)
+                    else:
+                        yield loc
+            except ElementTree.ParseError:
+                continue
+
+
+def _origin(url):
+    parsed = urlparse(url)
+    return f'{parsed.scheme}://{parsed.netloc.lower()}'
+
+
+def _iter_sitemap(content):
+    """Yield ``('url' | 'sitemap', loc)`` from a sitemap or sitemap index without building a tree"""
+    for _, element in ElementTree.iterparse(BytesIO(content)):
+        tag = element.tag.rsplit('}', 1)[-1]
+        if tag in ('url', 'sitemap'):
+            for child in element:
+                if child.tag.rsplit('}', 1)[-1] == 'loc' and child.text:
+                    yield tag, child.text.strip()
+            element.clear()
@@ -0,0 +1,246 @@
+"""Streaming machine-readable exports of audit results
+
+``export(results, fmt)`` serializes an iterable of audit results (one
+audit, a batch or the pages of a crawl) as JSON, NDJSON, CSV or SARIF and
+returns a generator of text chunks, so a response or file can be written
+while audits are still being produced and memory does not grow with the
+number of findings.
+
+Fix steps are usually identical across findings of the same kind, so each
+distinct list is written once and findings refer to it by ``fix_ref``:
+
+- ``json``: ``{"audits": [...], "fix_steps": {ref: [...]}}``, the table last
+- ``ndjson``: ``audit``, ``fix_steps`` and ``finding`` records, each
+  ``fix_steps`` record before the first finding that refers to it
+- ``csv``: one row per finding; the ``fix_steps`` column is only filled on
+  the first row with a given ``fix_ref``
+- ``sarif``: SARIF 2.1.0 with one rule per kind of finding; the fix steps
+  are the rule's ``help`` and results refer to it by ``ruleIndex``
+"""
+import csv
+import hashlib
+import json
+import re
+from io import StringIO
+
+from checks import CATEGORIES
+
+FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'sarif': 'application/sarif+json',
+}
+
+CSV_COLUMNS = ('url', 'scan_time', 'category', 'name', 'severity', 'deduction', 'description', 'fix_ref',
+               'fix_steps', 'error')
+
+SARIF_LEVELS = {'critical': 'error', 'high': 'error', 'medium': 'warning', 'low': 'note'}
+# GitHub code scanning ranks security results by this score
+SECURITY_SEVERITY = {'critical': '9.5', 'high': '8.0', 'medium': '5.5', 'low': '3.0'}
+
+CHUNK_BYTES = 64 * 1024
+
+# Yielded by the format writers after each audit so buffered output is not held back
+_FLUSH = object()
+
+
+def parse_format(value, default=None):
+    """Validate an export format name; raises ValueError on unknown formats"""
+    if not value:
+        return default
+    value = value.lower()
+    if value not in FORMATS:
+        raise ValueError(f'Unknown export format: {value} (expected one of {", ".join(FORMATS)})')
+    return value
+
+
+def export(results, fmt):
+    """Generator of text chunks serializing ``results`` (an iterable of audit results) as ``fmt``"""
+    writer = _WRITERS[parse_format(fmt)]
+    return _buffered(writer(results))
+
+
+class FixStepTable:
+    """Content-addressed references for distinct ``fix_steps`` lists
+
+    References are derived from the text, so the same steps get the same
+    ``fix_ref`` in every export.
+    """
+
+    def __init__(self):
+        self.steps = {}
+
+    def ref(self, fix_steps):
+        """``(fix_ref, new)`` where ``new`` is true the first time these steps are seen"""
+        digest = hashlib.sha1('\n'.join(fix_steps).encode('utf-8')).hexdigest()[:12]
+        fix_ref = f'fix-{digest}'
+        if fix_ref in self.steps:
+            return fix_ref, False
+        self.steps[fix_ref] = list(fix_steps)
+        return fix_ref, True
+
+
+def audit_header(results):
+    """URL, scan time, scores and issue counts of one audit"""
+    return {
+        'url': results.get('url'),
+        'scan_time': results.get('scan_time'),
+        'error': results.get('error'),
+        'scores': {c: results[c]['score'] for c in CATEGORIES if c in results},
+        'summary': results.get('summary'),
+    }
+
+
+def iter_findings(results):
+    """``(category, finding)`` for every finding of one audit, in report order"""
+    for category in CATEGORIES:
+        for f in results.get(category, {}).get('findings', []):
+            yield category, f
+
+
+def export_finding(category, f, fix_ref):
+    record = {'category': category, 'name': f['name'], 'severity': f.get('severity'),
+              'deduction': f.get('deduction'), 'description': f['description'], 'fix_ref': fix_ref}
+    if f.get('matches'):
+        record['matches'] = f['matches']
+    return record
+
+
+def _buffered(chunks, size=CHUNK_BYTES):
+    """Join small chunks into writes of about ``size`` characters, flushing after every audit"""
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        if chunk is not _FLUSH:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered < size:
+                continue
+        if buffer:
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def _write_json(results):
+    table = FixStepTable()
+    yield '{"audits":['
+    for i, audit in enumerate(results):
+        header = _dumps(audit_header(audit))
+        yield (',' if i else '') + header[:-1] + ',"findings":['
+        for j, (category, f) in enumerate(iter_findings(audit)):
+            yield (',' if j else '') + _dumps(export_finding(category, f, table.ref(f['fix_steps'])[0]))
+        yield ']}'
+        yield _FLUSH
+    yield '],"fix_steps":' + _dumps(table.steps) + '}\n'
+
+
+def _write_ndjson(results):
+    table = FixStepTable()
+    for audit in results:
+        url = audit.get('url')
+        yield _dumps({'type': 'audit', **audit_header(audit)}) + '\n'
+        for category, f in iter_findings(audit):
+            fix_ref, new = table.ref(f['fix_steps'])
+            if new:
+                yield _dumps({'type': 'fix_steps', 'fix_ref': fix_ref, 'steps': f['fix_steps']}) + '\n'
+            yield _dumps({'type': 'finding', 'url': url, **export_finding(category, f, fix_ref)}) + '\n'
+        yield _FLUSH
+
+
+def _write_csv(results):
+    table = FixStepTable()
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def row(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    yield row(CSV_COLUMNS)
+    for audit in results:
+        url, scan_time = audit.get('url'), audit.get('scan_time')
+        if audit.get('error'):
+            yield row([url, scan_time, '', '', '', '', '', '', '', audit['error']])
+        for category, f in iter_findings(audit):
+            fix_ref, new = table.ref(f['fix_steps'])
+            yield row([url, scan_time, category, f['name'], f.get('severity', ''), f.get('deduction', ''),
+                       f['description'], fix_ref, '\n'.join(f['fix_steps']) if new else '', ''])
+        yield _FLUSH
+
+
+def rule_id(category, name):
+    return f'{category}/{re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")}'
+
+
+def _sarif_rule(rule, category, f, fix_ref):
+    severity = f.get('severity', 'medium')
+    properties = {'category': category, 'tags': [category], 'fix_ref': fix_ref}
+    if category == 'security':
+        properties['security-severity'] = SECURITY_SEVERITY.get(severity, '5.5')
+    return {
+        'id': rule,
+        'name': f['name'],
+        'shortDescription': {'text': f['name']},
+        'help': {'text': '\n'.join(f'{i}. {step}' for i, step in enumerate(f['fix_steps'], 1))},
+        'defaultConfiguration': {'level': SARIF_LEVELS.get(severity, 'warning')},
+        'properties': properties,
+    }
+
+
+def _sarif_locations(url, f):
+    if not f.get('matches'):
+        return [{'physicalLocation': {'artifactLocation': {'uri': url}}}]
+    return [{'physicalLocation': {'artifactLocation': {'uri': url},
+                                  'region': {'byteOffset': match['offset'], 'snippet': {'text': match['context']}}}}
+            for match in f['matches']]
+
+
+def _write_sarif(results):
+    rules = {}
+    rule_list = []
+    table = FixStepTable()
+    notifications = []
+    yield ('{"$schema":"https://json.schemastore.org/sarif-2.1.0.json","version":"2.1.0",'
+           '"runs":[{"results":[')
+    first = True
+    for audit in results:
+        url = audit.get('url')
+        if audit.get('error'):
+            notifications.append({'level': 'error', 'message': {'text': audit['error']},
+                                  'locations': [{'physicalLocation': {'artifactLocation': {'uri': url}}}]})
+        for category, f in iter_findings(audit):
+            rule = rule_id(category, f['name'])
+            if rule not in rules:
+                rules[rule] = len(rule_list)
+                rule_list.append(_sarif_rule(rule, category, f, table.ref(f['fix_steps'])[0]))
+            result = {
+                'ruleId': rule,
+                'ruleIndex': rules[rule],
+                'level': SARIF_LEVELS.get(f.get('severity'), 'warning'),
+                'message': {'text': f['description']},
+                'locations': _sarif_locations(url, f),
+                'properties': {'category': category, 'severity': f.get('severity'), 'deduction': f.get('deduction'),
+                               'scanTime': audit.get('scan_time')},
+            }
+            yield ('' if first else ',') + _dumps(result)
+            first = False
+        yield _FLUSH
+    invocation = {'executionSuccessful': not notifications}
+    if notifications:
+        invocation['toolExecutionNotifications'] = notifications
+    driver = {'name': 'Comprehensive Website Audit Tool', 'rules': rule_list}
+    yield '],"invocations":' + _dumps([invocation]) + ',"tool":' + _dumps({'driver': driver}) + '}]}\n'
+
+
+_WRITERS = {'json': _write_json, 'ndjson': _write_ndjson, 'csv': _write_csv, 'sarif': _write_sarif}
@@ -0,0 +1,224 @@
+import codecs
+import socket
+import threading
+import time
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (compatible; WebsiteAuditBot/1.0)'
+CHUNK_SIZE = 64 * 1024
+
+
+def declared_charset(content_type):
+    """The ``charset`` a Content-Type header declares, or ``None``
+
+    Unlike ``requests``' ``Response.encoding`` there is no ISO-8859-1
+    fallback for ``text/*``, so parsers can still honour ``<meta charset>``.
+    """
+    for param in (content_type or '').split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            charset = value.strip().strip('"\'')
+            try:
+                return codecs.lookup(charset).name if charset else None
+            except LookupError:
+                return None
+    return None
+
+
+_connection_timing = threading.local()
+
+
+def _record_connection_time(stage, seconds):
+    timing = getattr(_connection_timing, 'values', None)
+    if timing is not None:
+        timing[stage] = timing.get(stage, 0.0) + seconds
+
+
+class _TimedConnectionMixin:
+    """Times DNS resolution and TCP connect of each new connection for the fetch in progress"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, self.port, 0,
+                                                                                      socket.SOCK_STREAM)))
+        except OSError:
+            return super()._new_conn()  # let urllib3 raise its usual resolution error
+        resolved = time.perf_counter()
+        _record_connection_time('dns', resolved - start)
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError):
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+        _record_connection_time('connect', time.perf_counter() - resolved)
+        return sock
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        timing = getattr(_connection_timing, 'values', None) or {}
+        before = timing.get('dns', 0.0) + timing.get('connect', 0.0)
+        start = time.perf_counter()
+        super().connect()
+        timing = getattr(_connection_timing, 'values', None) or {}
+        socket_time = timing.get('dns', 0.0) + timing.get('connect', 0.0) - before
+        _record_connection_time('tls', time.perf_counter() - start - socket_time)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections report DNS, connect and TLS handshake time"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                   'https': _TimedHTTPSConnectionPool}
+
+
+class FetchResult:
+    """Everything the audit needs from a single page fetch
+
+    ``connection`` holds the DNS, connect and TLS handshake time of any
+    connections opened for this fetch; it is empty when a pooled
+    keep-alive connection was reused.
+    """
+
+    def __init__(self, url, final_url, status_code, headers, content, encoding=None,
+                 redirects=None, ttfb=0.0, download_time=0.0, truncated=False, connection=None):
+        self.url = url
+        self.final_url = final_url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.encoding = encoding
+        self.redirects = redirects or []
+        self.ttfb = ttfb
+        self.download_time = download_time
+        self.truncated = truncated
+        self.connection = connection or {}
+
+    @property
+    def load_time(self):
+        """Time to first byte plus time spent downloading the body"""
+        return self.ttfb + self.download_time
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def summary(self):
+        return {
+            'final_url': self.final_url,
+            'status_code': self.status_code,
+            'redirects': self.redirects,
+            'ttfb': round(self.ttfb, 4),
+            'download_time': round(self.download_time, 4),
+            'load_time': round(self.load_time, 4),
+            'bytes': len(self.content),
+            'truncated': self.truncated,
+        }
+
+
+class Fetcher:
+    """Blocking fetcher backed by a pooled, keep-alive requests Session
+
+    The session is shared by every audit that uses this fetcher, so repeated
+    scans of a host reuse its DNS lookup, TCP connection and TLS session.
+    Bodies are streamed and cut off at ``max_bytes``.
+    """
+
+    def __init__(self, connect_timeout=5, read_timeout=15, max_bytes=5 * 1024 * 1024,
+                 verify=False, pool_size=20, max_redirects=10, user_agent=DEFAULT_USER_AGENT):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_bytes = max_bytes
+        self.verify = verify
+        if not verify:
+            # Certificate problems are reported by the TLS checks rather than warned about on every fetch
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        self.session = requests.Session()
+        self.session.max_redirects = max_redirects
+        self.session.headers['User-Agent'] = user_agent
+        adapter = _TimedAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, url, headers=None):
+        connection = _connection_timing.values = {}
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout, allow_redirects=True,
+                                        verify=self.verify, stream=True)
+        finally:
+            _connection_timing.values = None
+        try:
+            ttfb = time.perf_counter() - start
+            chunks = []
+            received = 0
+            truncated = False
+            for chunk in response.iter_content(CHUNK_SIZE):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received > self.max_bytes:
+                    truncated = True
+                    break
+            download_time = time.perf_counter() - start - ttfb
+        finally:
+            response.close()
+
+        content = b''.join(chunks)[:self.max_bytes]
+        return FetchResult(
+            url=url,
+            final_url=response.url,
+            status_code=response.status_code,
+            headers=response.headers,
+            content=content,
+            encoding=declared_charset(response.headers.get('Content-Type')),
+            redirects=[{'url': r.url, 'status_code': r.status_code, 'location': r.headers.get('Location')}
+                       for r in response.history],
+            ttfb=ttfb,
+            download_time=download_time,
+            truncated=truncated,
+            connection=connection,
+        )
+
+    def close(self):
+        self.session.close()
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher():
+    """Process-wide shared Fetcher used when the caller does not supply one"""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher()
+        return _default_fetcher
@@ -0,0 +1,23 @@
+"""Gunicorn settings for ``gunicorn -c gunicorn.conf.py wsgi:app``
+
+Every value can be overridden from the environment. Audit jobs, caches and
+metrics live in the worker process that runs them, so job polling needs
+either a single worker (scale with ``GUNICORN_THREADS``) or sticky routing
+in front of several workers; results and history are shared through
+``RESULT_STORE_URL`` and ``HISTORY_DB``.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f'0.0.0.0:{os.environ.get("PORT", "8000")}')
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# Import the app once in the master so workers share its modules copy-on-write.
+# Thread pools, sessions and database connections are created lazily, after the fork.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
@@ -0,0 +1,227 @@
+"""Long-term audit history with trend, diff and aggregate queries
+
+Every finished audit is appended to a local SQLite database. Per-category
+scores are stored as columns of the ``audits`` table, indexed on
+``(url, scanned_at)``, so a site's time series is a single index range scan.
+Site-wide aggregates are read from daily rollup tables that are updated in
+the same transaction as the insert; their size grows with the number of
+days, not audits, so aggregate queries stay fast however much history
+accumulates. The full result is kept compressed for finding-level diffs.
+"""
+import time
+from datetime import datetime
+
+from checks import CATEGORIES
+from result_store import dumps, loads
+from storage import SQLiteDatabase
+
+SCAN_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS audits ('
+    'id INTEGER PRIMARY KEY, audit_id TEXT UNIQUE NOT NULL, url TEXT NOT NULL, scanned_at REAL NOT NULL, '
+    + ', '.join(f'{c} INTEGER' for c in CATEGORIES) +
+    ', total_issues INTEGER, error TEXT, data BLOB NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS audits_url_time ON audits (url, scanned_at)',
+    'CREATE INDEX IF NOT EXISTS audits_time ON audits (scanned_at)',
+    'CREATE TABLE IF NOT EXISTS sites (url TEXT PRIMARY KEY, first_seen REAL NOT NULL, last_seen REAL NOT NULL, '
+    'audits INTEGER NOT NULL) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS daily_audits (day TEXT PRIMARY KEY, audits INTEGER NOT NULL, '
+    'errors INTEGER NOT NULL) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS daily_scores (day TEXT NOT NULL, category TEXT NOT NULL, audits INTEGER NOT NULL, '
+    'total INTEGER NOT NULL, min INTEGER NOT NULL, max INTEGER NOT NULL, PRIMARY KEY (day, category)) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS daily_findings (day TEXT NOT NULL, category TEXT NOT NULL, name TEXT NOT NULL, '
+    'pages INTEGER NOT NULL, PRIMARY KEY (day, category, name)) WITHOUT ROWID',
+]
+
+
+def parse_time(value):
+    """Epoch seconds from ``None``, a number, or an ISO date / date-time string"""
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        raise ValueError(f'Invalid time: {value} (use YYYY-MM-DD, YYYY-MM-DD HH:MM:SS or epoch seconds)')
+
+
+def _scan_timestamp(results):
+    try:
+        return datetime.strptime(results['scan_time'], SCAN_TIME_FORMAT).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime(SCAN_TIME_FORMAT)
+
+
+def finding_key(category, f):
+    # The id run_checks stamps on each finding; results stored before it existed fall back to the name
+    return category, f.get('id') or f['name']
+
+
+def _findings_by_key(results):
+    grouped = {}
+    for category in CATEGORIES:
+        for f in results.get(category, {}).get('findings', []):
+            grouped.setdefault(finding_key(category, f), []).append(dict(f, category=category))
+    return grouped
+
+
+class AuditHistory(SQLiteDatabase):
+    """Append-only audit history in a SQLite file"""
+
+    SCHEMA = SCHEMA
+
+    def record(self, audit_id, results):
+        """Store one audit result; cache hits repeat an earlier scan and are skipped"""
+        if results.get('cache', {}).get('status') == 'hit' or not results.get('url'):
+            return False
+        scanned_at = _scan_timestamp(results)
+        day = _format_time(scanned_at)[:10]
+        scores = [results[c]['score'] if c in results and not results.get('error') else None for c in CATEGORIES]
+        total_issues = results.get('summary', {}).get('total_issues')
+
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN')
+            try:
+                inserted = conn.execute(
+                    f'INSERT OR IGNORE INTO audits (audit_id, url, scanned_at, {", ".join(CATEGORIES)}, '
+                    f'total_issues, error, data) VALUES (?, ?, ?, {", ".join("?" * len(CATEGORIES))}, ?, ?, ?)',
+                    [audit_id, results['url'], scanned_at, *scores, total_issues, results.get('error'),
+                     dumps(results)]).rowcount
+                if not inserted:
+                    conn.execute('ROLLBACK')
+                    return False
+                conn.execute('INSERT INTO sites (url, first_seen, last_seen, audits) VALUES (?, ?, ?, 1) '
+                             'ON CONFLICT (url) DO UPDATE SET audits = audits + 1, '
+                             'first_seen = min(first_seen, excluded.first_seen), '
+                             'last_seen = max(last_seen, excluded.last_seen)',
+                             (results['url'], scanned_at, scanned_at))
+                conn.execute('INSERT INTO daily_audits (day, audits, errors) VALUES (?, 1, ?) '
+                             'ON CONFLICT (day) DO UPDATE SET audits = audits + 1, errors = errors + excluded.errors',
+                             (day, 1 if results.get('error') else 0))
+                for category, score in zip(CATEGORIES, scores):
+                    if score is None:
+                        continue
+                    conn.execute('INSERT INTO daily_scores (day, category, audits, total, min, max) '
+                                 'VALUES (?, ?, 1, ?, ?, ?) ON CONFLICT (day, category) DO UPDATE SET '
+                                 'audits = audits + 1, total = total + excluded.total, '
+                                 'min = min(min, excluded.min), max = max(max, excluded.max)',
+                                 (day, category, score, score, score))
+                    for name in {f['name'] for f in results[category]['findings']}:
+                        conn.execute('INSERT INTO daily_findings (day, category, name, pages) VALUES (?, ?, ?, 1) '
+                                     'ON CONFLICT (day, category, name) DO UPDATE SET pages = pages + 1',
+                                     (day, category, name))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return True
+
+    def scans(self, url, since=None, until=None, limit=100):
+        """Most recent scans of ``url``, newest first"""
+        rows = self._query(
+            f'SELECT audit_id, scanned_at, {", ".join(CATEGORIES)}, total_issues, error FROM audits '
+            'WHERE url = ? AND scanned_at >= ? AND scanned_at <= ? ORDER BY scanned_at DESC LIMIT ?',
+            (url, since or 0, until or float('inf'), limit))
+        return [{
+            'audit_id': row[0],
+            'scan_time': _format_time(row[1]),
+            'scores': {c: s for c, s in zip(CATEGORIES, row[2:2 + len(CATEGORIES)]) if s is not None},
+            'total_issues': row[-2],
+            'error': row[-1],
+        } for row in rows]
+
+    def series(self, url, categories=CATEGORIES, since=None, until=None, limit=1000):
+        """Per-category ``[scan_time, score]`` points for ``url``, oldest first"""
+        columns = ', '.join(categories)
+        rows = self._query(
+            f'SELECT scanned_at, {columns} FROM (SELECT scanned_at, {columns} FROM audits '
+            'WHERE url = ? AND scanned_at >= ? AND scanned_at <= ? AND error IS NULL '
+            'ORDER BY scanned_at DESC LIMIT ?) ORDER BY scanned_at',
+            (url, since or 0, until or float('inf'), limit))
+        series = {c: [] for c in categories}
+        for row in rows:
+            scan_time = _format_time(row[0])
+            for category, score in zip(categories, row[1:]):
+                if score is not None:
+                    series[category].append([scan_time, score])
+        return series
+
+    def load(self, audit_id):
+        rows = self._query('SELECT url, data FROM audits WHERE audit_id = ?', (audit_id,))
+        return (rows[0][0], loads(rows[0][1])) if rows else (None, None)
+
+    def latest_two(self, url):
+        rows = self._query('SELECT audit_id FROM audits WHERE url = ? AND error IS NULL '
+                           'ORDER BY scanned_at DESC LIMIT 2', (url,))
+        return [row[0] for row in reversed(rows)]
+
+    def diff(self, old_id, new_id):
+        """Findings added and resolved between two scans, with score changes
+
+        Returns ``None`` if either scan is unknown. Findings are compared by
+        their ``id`` (the check and what it found, e.g. which header), counting
+        repeated findings; a finding whose description only changed (a
+        different measured value) is unchanged.
+        """
+        old_url, old = self.load(old_id)
+        new_url, new = self.load(new_id)
+        if old is None or new is None:
+            return None
+
+        old_findings = _findings_by_key(old)
+        new_findings = _findings_by_key(new)
+        added, resolved, unchanged = [], [], 0
+        for key in sorted(set(old_findings) | set(new_findings)):
+            before, after = old_findings.get(key, []), new_findings.get(key, [])
+            unchanged += min(len(before), len(after))
+            added.extend(after[len(before):])
+            resolved.extend(before[len(after):])
+
+        scores = {}
+        for category in CATEGORIES:
+            if category in old and category in new:
+                scores[category] = {'from': old[category]['score'], 'to': new[category]['score'],
+                                    'delta': new[category]['score'] - old[category]['score']}
+        return {
+            'from': {'audit_id': old_id, 'url': old_url, 'scan_time': old.get('scan_time')},
+            'to': {'audit_id': new_id, 'url': new_url, 'scan_time': new.get('scan_time')},
+            'scores': scores,
+            'added': added,
+            'resolved': resolved,
+            'unchanged': unchanged,
+        }
+
+    def aggregate(self, since=None, until=None, top=10):
+        """Site-wide score statistics and most common findings, from the daily rollups"""
+        since_day = _format_time(since)[:10] if since else '0000-00-00'
+        until_day = _format_time(until)[:10] if until else '9999-99-99'
+        scores = {}
+        for category, audits, total, low, high in self._query(
+                'SELECT category, sum(audits), sum(total), min(min), max(max) FROM daily_scores '
+                'WHERE day >= ? AND day <= ? GROUP BY category', (since_day, until_day)):
+            scores[category] = {'audits': audits, 'average': round(total / audits, 1), 'min': low, 'max': high}
+        findings = self._query(
+            'SELECT category, name, sum(pages) AS n FROM daily_findings WHERE day >= ? AND day <= ? '
+            'GROUP BY category, name ORDER BY n DESC LIMIT ?', (since_day, until_day, top))
+        audits, errors = self._query('SELECT coalesce(sum(audits), 0), coalesce(sum(errors), 0) FROM daily_audits '
+                                     'WHERE day >= ? AND day <= ?', (since_day, until_day))[0]
+        sites = self._query('SELECT count(*) FROM sites WHERE last_seen >= ? AND first_seen <= ?',
+                            (since or 0, until or float('inf')))[0][0]
+        return {
+            'since': since_day if since else None,
+            'until': until_day if until else None,
+            'audits': audits,
+            'failed': errors,
+            'sites': sites,
+            'scores': {c: scores[c] for c in CATEGORIES if c in scores},
+            'most_common_findings': [{'category': c, 'name': n, 'pages': p} for c, n, p in findings],
+        }
@@ -0,0 +1,185 @@
+"""Single-pass HTML analysis
+
+``build_index`` walks the document once with an event-driven parser and
+collects every fact the audit checks need into a ``PageIndex``. No tree is
+built, so cost is linear in the size of the page and label lookups are set
+membership tests instead of document searches.
+"""
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+
+IMAGE_ATTRS = ('src', 'alt', 'width', 'height', 'srcset', 'loading')
+INPUT_ATTRS = ('type', 'id', 'name')
+
+# Parts of the index a check can declare as its input, e.g. ``inputs=('index.images',)``
+REGIONS = ('title', 'meta_description', 'images', 'scripts', 'stylesheets', 'headings', 'labels_for', 'forms',
+           'links', 'button_count')
+
+
+class PageIndex:
+    """Compact summary of a parsed page"""
+
+    def __init__(self):
+        self.title = None
+        self.meta_description = None
+        self.images = []
+        self.scripts = []
+        self.stylesheets = []
+        self.headings = {'h1': 0, 'h2': 0, 'h3': 0, 'h4': 0, 'h5': 0, 'h6': 0}
+        self.labels_for = set()
+        self.forms = []
+        self.links = []
+        self.button_count = 0
+        self.element_count = 0
+
+    @property
+    def h1_count(self):
+        return self.headings['h1']
+
+    @property
+    def anchor_count(self):
+        return len(self.links)
+
+    def images_without_alt(self):
+        return [img for img in self.images if not img.get('alt')]
+
+
+class _IndexBuilder:
+    """Parser event sink shared by every backend"""
+
+    def __init__(self):
+        self.index = PageIndex()
+        self._title_parts = None
+        self._open_forms = []
+
+    def start(self, tag, attrs):
+        index = self.index
+        index.element_count += 1
+
+        if tag == 'img':
+            index.images.append({name: attrs[name] for name in IMAGE_ATTRS if name in attrs})
+        elif tag == 'script':
+            index.scripts.append(attrs.get('src'))
+        elif tag == 'link':
+            if 'stylesheet' in (attrs.get('rel') or '').lower().split():
+                index.stylesheets.append(attrs.get('href'))
+        elif tag == 'a':
+            index.links.append(attrs.get('href'))
+        elif tag in index.headings:
+            index.headings[tag] += 1
+        elif tag == 'input':
+            if self._open_forms:
+                self._open_forms[-1].append({name: attrs[name] for name in INPUT_ATTRS if name in attrs})
+        elif tag == 'label':
+            if attrs.get('for'):
+                index.labels_for.add(attrs['for'])
+        elif tag == 'form':
+            inputs = []
+            index.forms.append(inputs)
+            self._open_forms.append(inputs)
+        elif tag == 'button':
+            index.button_count += 1
+        elif tag == 'title':
+            if index.title is None and self._title_parts is None:
+                self._title_parts = []
+        elif tag == 'meta':
+            if index.meta_description is None and attrs.get('name') == 'description':
+                index.meta_description = attrs.get('content') or ''
+
+    def end(self, tag):
+        if tag == 'title' and self._title_parts is not None:
+            self.index.title = ''.join(self._title_parts)
+            self._title_parts = None
+        elif tag == 'form' and self._open_forms:
+            self._open_forms.pop()
+
+    def data(self, text):
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+
+    def close(self):
+        if self._title_parts is not None:
+            self.index.title = ''.join(self._title_parts)
+            self._title_parts = None
+        return self.index
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, builder):
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+
+    def handle_starttag(self, tag, attrs):
+        self.builder.start(tag, {name: value if value is not None else '' for name, value in attrs})
+
+    def handle_endtag(self, tag):
+        self.builder.end(tag)
+
+    def handle_data(self, data):
+        self.builder.data(data)
+
+
+class _LxmlTarget:
+    def __init__(self, builder):
+        self.builder = builder
+
+    def start(self, tag, attrib):
+        self.builder.start(tag, attrib)
+
+    def end(self, tag):
+        self.builder.end(tag)
+
+    def data(self, data):
+        self.builder.data(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return self.builder.close()
+
+
+def _index_with_stdlib(content, encoding):
+    if isinstance(content, bytes):
+        content = content.decode(encoding or 'utf-8', errors='replace')
+    builder = _IndexBuilder()
+    parser = _StdlibParser(builder)
+    parser.feed(content)
+    parser.close()
+    return builder.close()
+
+
+def _index_with_lxml(content, encoding):
+    # Without a charset from the Content-Type header libxml2 sniffs it from the bytes (BOM, <meta charset>)
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+        encoding = 'utf-8'
+    builder = _IndexBuilder()
+    parser = _lxml_etree.HTMLParser(target=_LxmlTarget(builder), encoding=encoding,
+                                    recover=True, no_network=True)
+    parser.feed(content)
+    return parser.close()
+
+
+BACKENDS = {'html.parser': _index_with_stdlib}
+if _lxml_etree is not None:
+    BACKENDS['lxml'] = _index_with_lxml
+
+
+def default_backend():
+    """Fastest backend available in this environment"""
+    return 'lxml' if 'lxml' in BACKENDS else 'html.parser'
+
+
+def build_index(content, encoding=None, backend=None):
+    """Parse ``content`` (bytes or str) once and return its ``PageIndex``"""
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown or unavailable HTML backend: {backend}')
+    if isinstance(content, bytes) and not content.strip():
+        return PageIndex()
+    return BACKENDS[backend](content, encoding)
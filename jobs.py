@@ -0,0 +1,137 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Recent job run times kept to estimate how long a new submission would wait
+RUN_TIME_SAMPLES = 50
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class Job:
+    """A single unit of background work tracked by the job queue"""
+
+    def __init__(self, func, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    """Bounded background worker pool with fast rejection under overload
+
+    Jobs beyond ``max_queue`` waiting submissions are refused with
+    ``QueueFull``, as are submissions whose estimated wait (queue depth per
+    worker times the mean run time of recent jobs) exceeds ``max_wait``.
+    Jobs that still sit in the queue for longer than ``max_wait`` seconds
+    are failed instead of run. Finished jobs are kept for
+    ``retention`` seconds (up to ``max_jobs`` entries) so clients can poll them.
+    """
+
+    def __init__(self, workers=4, max_queue=32, max_wait=60, retention=600, max_jobs=1000):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='audit-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._run_times = deque(maxlen=RUN_TIME_SAMPLES)
+
+    @property
+    def depth(self):
+        """Number of jobs waiting for a worker"""
+        return self._queued
+
+    @property
+    def estimated_wait(self):
+        """Seconds a job submitted now is expected to wait for a worker"""
+        with self._lock:
+            return self._estimated_wait_locked()
+
+    def _estimated_wait_locked(self):
+        if not self._run_times:
+            return 0.0
+        return self._queued / self.workers * (sum(self._run_times) / len(self._run_times))
+
+    def submit(self, func, *args, **kwargs):
+        job = Job(func, args, kwargs)
+        with self._lock:
+            self._evict_locked()
+            if self._queued >= self.max_queue:
+                raise QueueFull(f'Audit queue is full ({self._queued} jobs waiting)')
+            estimated = self._estimated_wait_locked()
+            if self.max_wait and estimated > self.max_wait:
+                raise QueueFull(f'Audit queue is too slow (estimated wait {estimated:.1f}s, '
+                                f'limit {self.max_wait}s)')
+            self._queued += 1
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        with self._lock:
+            self._queued -= 1
+        job.started_at = time.time()
+        waited = job.started_at - job.submitted_at
+        if self.max_wait and waited > self.max_wait:
+            job.error = f'Job waited {waited:.1f}s in queue (limit {self.max_wait}s)'
+            job.func = job.args = job.kwargs = None
+            job.finished_at = job.started_at
+            job.status = FAILED
+            return
+        job.status = RUNNING
+        try:
+            job.result = job.func(*job.args, **job.kwargs)
+            status = DONE
+        except Exception as e:
+            job.error = str(e)
+            status = FAILED
+        job.func = job.args = job.kwargs = None
+        job.finished_at = time.time()
+        with self._lock:
+            self._run_times.append(job.finished_at - job.started_at)
+        job.status = status
+
+    def _evict_locked(self):
+        cutoff = time.time() - self.retention
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            finished = job.status in (DONE, FAILED)
+            if finished and (job.finished_at < cutoff or len(self._jobs) > self.max_jobs):
+                del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,176 @@
+"""Per-stage timing spans, process-wide metrics and an optional profiler hook
+
+``Spans`` collects the duration of each stage of one audit (fetch, parse,
+checks, ...) into the ``timings`` block of its result. Every finished span
+is also fed to the shared ``METRICS`` registry, which keeps a sliding
+window of recent durations per stage and renders p50/p95/p99 together with
+counters and gauges in the Prometheus text format for ``/metrics``.
+"""
+import cProfile
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Spans:
+    """Named stage durations for one run of a pipeline, in the order they were recorded
+
+    Stages are reported to the registry as ``<pipeline>.<stage>``.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def finish(self, registry=None):
+        """Record the total, report every stage to ``registry`` and return the ``timings`` block"""
+        self.timings['total'] = time.perf_counter() - self._start
+        registry = registry if registry is not None else METRICS
+        for name, seconds in self.timings.items():
+            registry.observe(f'{self.pipeline}.{name}', seconds)
+        return {name: round(seconds, 6) for name, seconds in self.timings.items()}
+
+
+class _Window:
+    """The most recent ``size`` observations of one stage plus running totals"""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES} if ordered else {}
+
+
+class MetricsRegistry:
+    """Thread-safe store of stage durations, counters and in-flight gauges"""
+
+    def __init__(self, window=1024):
+        self.window = window
+        self._stages = {}
+        self._counters = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            window = self._stages.get(stage)
+            if window is None:
+                window = self._stages[stage] = _Window(self.window)
+            window.add(seconds)
+
+    @contextmanager
+    def timed(self, stage):
+        """Observe the duration of the ``with`` block as ``stage``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def in_flight(self, name):
+        with self._lock:
+            self._in_flight[name] = self._in_flight.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[name] -= 1
+
+    def snapshot(self):
+        with self._lock:
+            stages = {stage: (w.quantiles(), w.count, w.sum) for stage, w in self._stages.items()}
+            return stages, dict(self._counters), dict(self._in_flight)
+
+    def render(self, gauges=()):
+        """Prometheus text exposition; ``gauges`` adds ``(name, help, value)`` triples"""
+        stages, counters, in_flight = self.snapshot()
+        lines = ['# HELP audit_stage_seconds Duration of audit and report pipeline stages',
+                 '# TYPE audit_stage_seconds summary']
+        for stage in sorted(stages):
+            quantiles, count, total = stages[stage]
+            for q, value in quantiles.items():
+                lines.append(f'audit_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'audit_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'audit_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f'# TYPE {name} counter')
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f'{name}{_labels(labels)} {value}')
+
+        for name, value in sorted(in_flight.items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        for name, help_text, value in gauges:
+            if value is None:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+METRICS = MetricsRegistry()
+
+_profile_lock = threading.Lock()
+
+
+def profile_call(func, *args, top=30, **kwargs):
+    """Run ``func`` under cProfile and return ``(result, profile)``
+
+    ``profile`` lists the ``top`` functions by cumulative time. Only the
+    calling thread is profiled, and only one profiled call runs at a time;
+    when another is in progress the call runs unprofiled and ``profile`` is
+    ``None``.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return func(*args, **kwargs), None
+    try:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+    finally:
+        _profile_lock.release()
+
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in pstats.Stats(profiler).stats.items():
+        rows.append({'function': f'{filename}:{line}({function})', 'calls': calls,
+                     'tottime': round(tottime, 6), 'cumtime': round(cumtime, 6)})
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return result, rows[:top]
@@ -0,0 +1,205 @@
+"""Compiled multi-pattern matcher for body-content signatures
+
+All literal signatures are compiled into one automaton and the raw page
+bytes are scanned once, case-insensitively, in fixed-size windows: only a
+window at a time is lower-cased, never a copy of the whole body, and the
+cost of the scan barely grows with the number of signatures. The automaton
+is an Aho-Corasick trie when ``pyahocorasick`` is installed and a combined
+regex otherwise; both report every occurrence, including signatures that
+overlap (``color: #`` inside ``background-color: #``).
+
+Extra signatures can be loaded from a JSON rules file, a list of objects::
+
+    [{"id": "php-warning", "pattern": "warning: mysql_", "category": "security",
+      "name": "PHP Warning Disclosure", "description": "PHP warnings are shown to visitors",
+      "fix_steps": ["Set display_errors=Off"], "severity": "medium", "deduction": 5}]
+
+``"regex": true`` treats ``pattern`` as a regular expression instead of a
+literal string; regex signatures are matched in one extra pass over the raw
+bytes, and only when any are loaded. Rules loaded from a file belong to the
+``custom`` group and are reported by the ``custom_signatures_<category>``
+checks.
+"""
+import json
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import ahocorasick
+except ImportError:  # optional, falls back to the combined regex
+    ahocorasick = None
+
+WINDOW = 64 * 1024
+CUSTOM_GROUP = 'custom'
+
+
+class Signature:
+    """One content pattern and the finding it produces"""
+
+    def __init__(self, id, pattern, regex=False, group=CUSTOM_GROUP, category='security', name=None,
+                 description=None, fix_steps=(), severity='medium', deduction=5):
+        self.id = id
+        self.pattern = pattern
+        self.regex = regex
+        self.group = group
+        self.category = category
+        self.name = name or id
+        self.description = description or f'Content matches signature {id}'
+        self.fix_steps = list(fix_steps)
+        self.severity = severity
+        self.deduction = deduction
+
+    def compiled_source(self):
+        source = self.pattern.encode('utf-8')
+        return source if self.regex else re.escape(source)
+
+
+class SignatureSet:
+    """Registry of signatures, compiled lazily into one automaton"""
+
+    def __init__(self):
+        self._signatures = OrderedDict()
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(list(self._signatures.values()))
+
+    def add(self, signature):
+        try:
+            re.compile(signature.compiled_source(), re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f'Invalid pattern for signature {signature.id}: {e}')
+        with self._lock:
+            self._signatures[signature.id] = signature
+            self._compiled = None
+
+    def by_group(self, group):
+        return [s for s in self._signatures.values() if s.group == group]
+
+    def load_rules(self, path):
+        """Add the signatures in a JSON rules file; returns how many were loaded"""
+        from checks import CATEGORIES, SEVERITIES
+        with open(path, encoding='utf-8') as fh:
+            rules = json.load(fh)
+        if not isinstance(rules, list):
+            raise ValueError(f'{path}: rules file must contain a JSON list')
+        for i, rule in enumerate(rules):
+            if not isinstance(rule, dict) or not rule.get('id') or not rule.get('pattern'):
+                raise ValueError(f'{path}: rule {i} needs at least "id" and "pattern"')
+            rule = dict(rule, group=CUSTOM_GROUP)
+            if rule.get('category', 'security') not in CATEGORIES:
+                raise ValueError(f'{path}: rule {rule["id"]} has unknown category {rule["category"]}')
+            if rule.get('severity', 'medium') not in SEVERITIES:
+                raise ValueError(f'{path}: rule {rule["id"]} has unknown severity {rule["severity"]}')
+            try:
+                signature = Signature(**rule)
+            except TypeError as e:
+                raise ValueError(f'{path}: rule {rule["id"]}: {e}')
+            self.add(signature)
+        return len(rules)
+
+    def _compile(self):
+        with self._lock:
+            if self._compiled is None:
+                self._compiled = _CompiledSignatures(list(self._signatures.values()))
+            return self._compiled
+
+    def scan(self, data, max_matches=5, context=40):
+        """Scan ``data`` (bytes) once
+
+        Returns ``{signature_id: {'count': n, 'matches': [{'offset', 'context'}, ...]}}``
+        for every signature that occurs, keeping at most ``max_matches``
+        offsets per signature.
+        """
+        found = {}
+
+        def record(signature_id, start, length):
+            entry = found.setdefault(signature_id, {'count': 0, 'matches': []})
+            entry['count'] += 1
+            if len(entry['matches']) < max_matches:
+                snippet = data[max(0, start - context):start + length + context]
+                entry['matches'].append({'offset': start, 'context': snippet.decode('utf-8', errors='replace')})
+
+        compiled = self._compile()
+        for start, literal in compiled.iter_literals(data):
+            for signature_id in compiled.literal_ids[literal]:
+                record(signature_id, start, len(literal))
+        if compiled.regex is not None:
+            # The combined pattern finds every offset where some signature matches, but captures
+            # only the first alternative there; each signature is then tried at that offset
+            for match in compiled.regex.finditer(data):
+                start = match.start()
+                for signature_id, pattern in compiled.regex_signatures:
+                    found_here = pattern.match(data, start)
+                    if found_here is not None:
+                        record(signature_id, start, found_here.end() - start)
+        for entry in found.values():
+            entry['matches'].sort(key=lambda m: m['offset'])
+        return found
+
+
+class _CompiledSignatures:
+    """The automaton for one snapshot of a ``SignatureSet``"""
+
+    def __init__(self, signatures):
+        # Several signatures may share a literal; each literal is matched once
+        self.literal_ids = OrderedDict()
+        for s in signatures:
+            if not s.regex:
+                self.literal_ids.setdefault(s.pattern.lower().encode('utf-8'), []).append(s.id)
+        self.overlap = max((len(literal) for literal in self.literal_ids), default=1) - 1
+
+        self.automaton = None
+        self.literal_regex = None
+        if self.literal_ids and ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for literal in self.literal_ids:
+                self.automaton.add_word(literal.decode('latin-1'), literal)
+            self.automaton.make_automaton()
+        elif self.literal_ids:
+            # Longest first; a shorter literal that is a prefix of a match is added back in iter_literals
+            ordered = sorted(self.literal_ids, key=len, reverse=True)
+            self.literal_regex = re.compile(b'(?=(' + b'|'.join(re.escape(lit) for lit in ordered) + b'))')
+            self.prefixes = {lit: [other for other in ordered if other != lit and lit.startswith(other)]
+                             for lit in ordered}
+
+        regex_signatures = [s for s in signatures if s.regex]
+        self.regex_signatures = [(s.id, re.compile(s.compiled_source(), re.IGNORECASE | re.DOTALL))
+                                 for s in regex_signatures]
+        self.regex = None
+        if regex_signatures:
+            alternatives = b'|'.join(b'(?:%s)' % s.compiled_source() for s in regex_signatures)
+            self.regex = re.compile(b'(?=' + alternatives + b')', re.IGNORECASE | re.DOTALL)
+
+    def iter_literals(self, data):
+        """Yield ``(offset, literal)`` for every literal occurrence in ``data``"""
+        if not self.literal_ids:
+            return
+        for base in range(0, len(data), WINDOW):
+            # Windows overlap by the longest literal so no match straddles a boundary unseen;
+            # a match belongs to the window it starts in
+            window = data[base:base + WINDOW + self.overlap].lower()
+            if self.automaton is not None:
+                for end, literal in self.automaton.iter(window.decode('latin-1')):
+                    start = end - len(literal) + 1
+                    if start < WINDOW:
+                        yield base + start, literal
+            else:
+                for match in self.literal_regex.finditer(window):
+                    start = match.start()
+                    if start >= WINDOW:
+                        break
+                    literal = match.group(1)
+                    yield base + start, literal
+                    for prefix in self.prefixes[literal]:
+                        yield base + start, prefix
+
+
+SIGNATURES = SignatureSet()
+
+
+def register(id, pattern, **kwargs):
+    """Register a built-in signature on the shared set"""
+    SIGNATURES.add(Signature(id, pattern, **kwargs))
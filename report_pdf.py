@@ -0,0 +1,111 @@
+"""PDF rendering of audit results
+
+Reports are rendered into an in-memory buffer, so concurrent downloads
+never share a file, and cached by audit ID plus a hash of the result so a
+repeat download is a dictionary lookup.
+"""
+import hashlib
+import json
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from metrics import METRICS
+from storage import LRUCache
+
+CATEGORIES = ['security', 'performance', 'seo', 'accessibility']
+CATEGORY_NAMES = ['Security', 'Performance', 'SEO', 'Accessibility']
+
+
+def count_findings(audit_results):
+    return sum(len(audit_results.get(category, {}).get('findings', [])) for category in CATEGORIES)
+
+
+def content_hash(audit_results):
+    """Stable hash of a result, so a re-stored audit never serves a stale PDF"""
+    encoded = json.dumps(audit_results, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def render_pdf(audit_results, website_url=None):
+    """Render the audit report and return the PDF bytes"""
+    # ReportLab takes longer to import than the rest of the app; load it on the first report
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+    website_url = website_url or audit_results.get('url', 'Unknown URL')
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Title
+    story.append(Paragraph("Comprehensive Website Audit Report", styles['Title']))
+    story.append(Spacer(1, 12))
+    story.append(Paragraph("WebAudit.com - Professional Website Analysis", styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Meta info
+    story.append(Paragraph(f"URL: {escape(website_url)}", styles['Normal']))
+    story.append(Paragraph(f"Scan Date: {escape(audit_results.get('scan_time', 'Unknown'))}", styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Overall Scores
+    story.append(Paragraph("Overall Audit Scores", styles['Heading1']))
+    story.append(Spacer(1, 12))
+    
+    for i, category in enumerate(CATEGORIES):
+        if category not in audit_results:
+            continue
+        score = audit_results[category].get('score', 0)
+        story.append(Paragraph(f"{CATEGORY_NAMES[i]}: {score}/100", styles['Heading2']))
+        story.append(Spacer(1, 12))
+    
+    # Detailed Findings
+    for category, category_name in zip(CATEGORIES, CATEGORY_NAMES):
+        findings = audit_results.get(category, {}).get('findings', [])
+        
+        if findings:
+            story.append(Paragraph(f"{category_name} Findings", styles['Heading1']))
+            story.append(Spacer(1, 12))
+            
+            for finding in findings:
+                story.append(Paragraph(escape(finding['name']), styles['Heading3']))
+                story.append(Paragraph(escape(finding['description']), styles['Normal']))
+                story.append(Paragraph("Steps to Fix:", styles['Heading4']))
+                
+                for i, step in enumerate(finding['fix_steps'], 1):
+                    story.append(Paragraph(f"{i}. {escape(step)}", styles['Normal']))
+                
+                story.append(Spacer(1, 12))
+    
+    doc.build(story)
+    return buffer.getvalue()
+
+
+class PdfCache:
+    """Thread-safe LRU of rendered PDFs bounded by total size in bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = LRUCache(max_bytes=max_bytes, sizeof=len)
+
+    @staticmethod
+    def key(audit_id, audit_results):
+        return f'{audit_id}:{content_hash(audit_results)}'
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def put(self, key, pdf):
+        self._entries.put(key, pdf)
+
+
+def render_into_cache(cache, key, audit_results, website_url=None):
+    """Job body for rendering large reports off the request thread"""
+    pdf = cache.get(key)
+    if pdf is None:
+        with METRICS.timed('report.render'):
+            pdf = render_pdf(audit_results, website_url)
+        cache.put(key, pdf)
+    return key
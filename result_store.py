@@ -0,0 +1,106 @@
+"""Server-side storage for finished audit results
+
+Results are kept out of the session cookie: the session only carries the
+audit ID and the full result is loaded from a ``ResultStore`` on demand.
+Entries are serialized as compact zlib-compressed JSON and expire after a
+TTL. ``open_result_store`` picks a backend from a URL such as
+``sqlite:///audit_results.db`` or ``memory://``.
+"""
+import json
+import time
+import zlib
+
+from storage import LRUCache, SQLiteDatabase
+
+
+def dumps(results):
+    return zlib.compress(json.dumps(results, separators=(',', ':')).encode('utf-8'))
+
+
+def loads(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+class ResultStore:
+    """Interface every result store backend implements"""
+
+    def __init__(self, ttl=86400):
+        self.ttl = ttl
+
+    def put(self, audit_id, results):
+        raise NotImplementedError
+
+    def get(self, audit_id):
+        raise NotImplementedError
+
+    def delete(self, audit_id):
+        raise NotImplementedError
+
+    def evict_expired(self):
+        raise NotImplementedError
+
+
+class MemoryResultStore(ResultStore):
+    """In-process store, for tests and single-process deployments"""
+
+    def __init__(self, ttl=86400, max_entries=1000):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries = LRUCache(max_entries=max_entries)
+
+    def put(self, audit_id, results):
+        self._entries.put(audit_id, dumps(results), ttl=self.ttl)
+
+    def get(self, audit_id):
+        blob = self._entries.get(audit_id)
+        return loads(blob) if blob is not None else None
+
+    def delete(self, audit_id):
+        self._entries.pop(audit_id)
+
+    def evict_expired(self):
+        self._entries.evict_expired()
+
+
+class SQLiteResultStore(SQLiteDatabase, ResultStore):
+    """Store backed by a local SQLite file, shared by every worker process on the host"""
+
+    EVICT_EVERY = 100
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS audit_results (id TEXT PRIMARY KEY, expires_at REAL NOT NULL, data BLOB NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS audit_results_expires ON audit_results (expires_at)',
+    ]
+
+    def __init__(self, path, ttl=86400):
+        ResultStore.__init__(self, ttl)
+        SQLiteDatabase.__init__(self, path)
+        self._puts = 0
+
+    def put(self, audit_id, results):
+        blob = dumps(results)
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO audit_results (id, expires_at, data) VALUES (?, ?, ?)',
+                               (audit_id, time.time() + self.ttl, blob))
+            self._puts += 1
+            evict = self._puts % self.EVICT_EVERY == 0
+        if evict:
+            self.evict_expired()
+
+    def get(self, audit_id):
+        rows = self._query('SELECT data FROM audit_results WHERE id = ? AND expires_at >= ?', (audit_id, time.time()))
+        return loads(rows[0][0]) if rows else None
+
+    def delete(self, audit_id):
+        self._execute('DELETE FROM audit_results WHERE id = ?', (audit_id,))
+
+    def evict_expired(self):
+        self._execute('DELETE FROM audit_results WHERE expires_at < ?', (time.time(),))
+
+
+def open_result_store(url, ttl=86400):
+    """Create a result store from ``sqlite:///path/to.db`` or ``memory://``"""
+    if url.startswith('sqlite:///'):
+        return SQLiteResultStore(url[len('sqlite:///'):], ttl=ttl)
+    if url.startswith('memory://'):
+        return MemoryResultStore(ttl=ttl)
+    raise ValueError(f'Unsupported result store URL: {url}')
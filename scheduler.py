@@ -0,0 +1,357 @@
+"""Recurring audits with a persistent schedule and alerts
+
+URLs are registered in a SQLite ``ScheduleStore`` with an interval and
+optional per-category score thresholds and a webhook, so schedules survive
+restarts. A ``Scheduler`` runs one dispatcher thread for all of them: it
+looks up the schedules that are due (an index range scan on ``next_run``),
+claims as many as it has free workers for, and runs their audits on a
+bounded thread pool. Due schedules beyond that stay in the database until
+a worker is free, so thousands of schedules never fire at once and never
+need a thread each.
+
+Every run is moved forward by a random jitter, so schedules registered
+together drift apart instead of hitting the same moment each interval.
+Claiming a schedule is an atomic compare-and-set of its ``next_run``, so
+several processes can share the database without running an audit twice.
+
+After each run the result is recorded in the audit history and compared
+with the schedule's previous run. A category score dropping below its
+threshold, findings that were not present before, and a failing audit
+each create an alert: a row in the ``alerts`` table, also POSTed as JSON
+to the schedule's (or the default) webhook when one is set.
+"""
+import json
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from checks import CATEGORIES, parse_categories
+from history import SCAN_TIME_FORMAT
+from metrics import METRICS
+from storage import SQLiteDatabase
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = 60
+
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+SCORE_BELOW_THRESHOLD = 'score_below_threshold'
+NEW_FINDINGS = 'new_findings'
+AUDIT_FAILED = 'audit_failed'
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS schedules (id TEXT PRIMARY KEY, url TEXT NOT NULL, interval REAL NOT NULL, '
+    'categories TEXT, thresholds TEXT NOT NULL, webhook TEXT, enabled INTEGER NOT NULL, next_run REAL NOT NULL, '
+    'created_at REAL NOT NULL, last_run REAL, runs INTEGER NOT NULL DEFAULT 0, last_audit_id TEXT, '
+    'last_error TEXT) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS schedules_due ON schedules (enabled, next_run)',
+    'CREATE TABLE IF NOT EXISTS alerts (id INTEGER PRIMARY KEY, schedule_id TEXT NOT NULL, url TEXT NOT NULL, '
+    'created_at REAL NOT NULL, kind TEXT NOT NULL, audit_id TEXT, details TEXT NOT NULL, delivery TEXT)',
+    'CREATE INDEX IF NOT EXISTS alerts_schedule_time ON alerts (schedule_id, created_at)',
+    'CREATE INDEX IF NOT EXISTS alerts_time ON alerts (created_at)',
+]
+
+SCHEDULE_COLUMNS = ('id', 'url', 'interval', 'categories', 'thresholds', 'webhook', 'enabled', 'next_run',
+                    'created_at', 'last_run', 'runs', 'last_audit_id', 'last_error')
+
+
+def parse_interval(value):
+    """Seconds from a number or a ``30m`` / ``6h`` / ``1d`` string; raises ValueError below ``MIN_INTERVAL``"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', str(value).lower())
+    if not match:
+        raise ValueError(f'Invalid interval: {value} (use seconds or a number with s, m, h or d)')
+    seconds = float(match.group(1)) * INTERVAL_UNITS[match.group(2) or 's']
+    if seconds < MIN_INTERVAL:
+        raise ValueError(f'Interval must be at least {MIN_INTERVAL} seconds')
+    return seconds
+
+
+def parse_thresholds(value):
+    """``{category: minimum score}`` from a dict or ``'security=80,seo=70'``; raises ValueError on bad input"""
+    if not value:
+        return {}
+    if isinstance(value, str):
+        pairs = [item.split('=', 1) for item in value.split(',') if item.strip()]
+        if any(len(pair) != 2 for pair in pairs):
+            raise ValueError(f'Invalid thresholds: {value} (use category=score,...)')
+        value = dict(pairs)
+    elif not isinstance(value, dict):
+        raise ValueError(f'Invalid thresholds: {value!r} (use an object or category=score,...)')
+    thresholds = {}
+    for category, score in value.items():
+        category = category.strip().lower()
+        if category not in CATEGORIES:
+            raise ValueError(f'Unknown category in thresholds: {category} (choose from {", ".join(CATEGORIES)})')
+        try:
+            score = int(score)
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid threshold for {category}: {score}')
+        if not 0 <= score <= 100:
+            raise ValueError(f'Threshold for {category} must be between 0 and 100')
+        thresholds[category] = score
+    return thresholds
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime(SCAN_TIME_FORMAT) if timestamp else None
+
+
+class ScheduleStore(SQLiteDatabase):
+    """Registered schedules and their alerts in a SQLite file"""
+
+    SCHEMA = SCHEMA
+
+    def add(self, url, interval, categories=None, thresholds=None, webhook=None, start=None, jitter=0.1):
+        """Register ``url`` and return the schedule
+
+        The first run is at ``start`` (default now) plus a random share of
+        ``jitter`` times the interval, so a bulk registration is spread out.
+        """
+        now = time.time()
+        interval = parse_interval(interval)
+        categories = parse_categories(categories)
+        schedule_id = uuid.uuid4().hex
+        next_run = (start or now) + random.uniform(0, jitter * interval)
+        self._execute('INSERT INTO schedules (id, url, interval, categories, thresholds, webhook, enabled, next_run, '
+                      'created_at) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)',
+                      (schedule_id, url, interval, None if categories == CATEGORIES else ','.join(categories),
+                       json.dumps(parse_thresholds(thresholds)), webhook or None, next_run, now))
+        return self.get(schedule_id)
+
+    def get(self, schedule_id):
+        rows = self._query(f'SELECT {", ".join(SCHEDULE_COLUMNS)} FROM schedules WHERE id = ?', (schedule_id,))
+        return self._schedule(rows[0]) if rows else None
+
+    def schedules(self, url=None, limit=100, offset=0):
+        """Schedules ordered by URL, optionally only those of ``url``"""
+        where, params = ('WHERE url = ? ', (url,)) if url else ('', ())
+        rows = self._query(f'SELECT {", ".join(SCHEDULE_COLUMNS)} FROM schedules {where}'
+                           'ORDER BY url, created_at LIMIT ? OFFSET ?', params + (limit, offset))
+        return [self._schedule(row) for row in rows]
+
+    def count(self):
+        return self._query('SELECT count(*) FROM schedules WHERE enabled = 1')[0][0]
+
+    def set_enabled(self, schedule_id, enabled):
+        return self._execute('UPDATE schedules SET enabled = ? WHERE id = ?', (int(enabled), schedule_id)) > 0
+
+    def remove(self, schedule_id):
+        return self._execute('DELETE FROM schedules WHERE id = ?', (schedule_id,)) > 0
+
+    def due(self, now, limit):
+        """``(id, next_run, interval)`` of up to ``limit`` enabled schedules due at ``now``, most overdue first"""
+        return self._query('SELECT id, next_run, interval FROM schedules WHERE enabled = 1 AND next_run <= ? '
+                           'ORDER BY next_run LIMIT ?', (now, limit))
+
+    def next_due(self):
+        """``next_run`` of the earliest enabled schedule, or ``None``"""
+        return self._query('SELECT min(next_run) FROM schedules WHERE enabled = 1')[0][0]
+
+    def claim(self, schedule_id, next_run, new_next_run):
+        """Move a due schedule to ``new_next_run``; false if another dispatcher claimed it first"""
+        return self._execute('UPDATE schedules SET next_run = ? WHERE id = ? AND next_run = ?',
+                             (new_next_run, schedule_id, next_run)) > 0
+
+    def finish(self, schedule_id, ran_at, audit_id, error):
+        """Record a run; ``audit_id`` becomes the baseline for the next comparison unless it is ``None``"""
+        self._execute('UPDATE schedules SET last_run = ?, runs = runs + 1, last_error = ?, '
+                      'last_audit_id = coalesce(?, last_audit_id) WHERE id = ?',
+                      (ran_at, error, audit_id, schedule_id))
+
+    def add_alert(self, schedule, kind, audit_id, details):
+        """Store an alert and return it as the webhook payload"""
+        created_at = time.time()
+        with self._lock:
+            alert_id = self._conn.execute(
+                'INSERT INTO alerts (schedule_id, url, created_at, kind, audit_id, details) VALUES (?, ?, ?, ?, ?, ?)',
+                (schedule['id'], schedule['url'], created_at, kind, audit_id, json.dumps(details))).lastrowid
+        return {'id': alert_id, 'schedule_id': schedule['id'], 'url': schedule['url'],
+                'created_at': _format_time(created_at), 'kind': kind, 'audit_id': audit_id, 'details': details,
+                'delivery': None}
+
+    def set_delivery(self, alert_id, delivery):
+        self._execute('UPDATE alerts SET delivery = ? WHERE id = ?', (delivery, alert_id))
+
+    def alerts(self, schedule_id=None, since=None, limit=100):
+        """Most recent alerts, newest first"""
+        where, params = ('schedule_id = ? AND ', (schedule_id,)) if schedule_id else ('', ())
+        rows = self._query('SELECT id, schedule_id, url, created_at, kind, audit_id, details, delivery FROM alerts '
+                           f'WHERE {where}created_at >= ? ORDER BY created_at DESC, id DESC LIMIT ?',
+                           params + (since or 0, limit))
+        return [{'id': row[0], 'schedule_id': row[1], 'url': row[2], 'created_at': _format_time(row[3]),
+                 'kind': row[4], 'audit_id': row[5], 'details': json.loads(row[6]), 'delivery': row[7]}
+                for row in rows]
+
+    def _schedule(self, row):
+        schedule = dict(zip(SCHEDULE_COLUMNS, row))
+        schedule['categories'] = schedule['categories'].split(',') if schedule['categories'] else None
+        schedule['thresholds'] = json.loads(schedule['thresholds'])
+        schedule['enabled'] = bool(schedule['enabled'])
+        for key in ('next_run', 'created_at', 'last_run'):
+            schedule[key] = _format_time(schedule[key])
+        return schedule
+
+
+class Scheduler:
+    """Dispatches due schedules to at most ``workers`` concurrent audits and raises alerts
+
+    ``audit(url, categories=...)`` runs one audit and returns its result;
+    ``history`` is the ``AuditHistory`` each run is recorded in and compared
+    against. ``webhook`` is the default alert webhook for schedules without
+    their own.
+    """
+
+    def __init__(self, store, audit, history, workers=4, jitter=0.1, poll_interval=5.0, webhook=None,
+                 webhook_timeout=10.0):
+        self.store = store
+        self.audit = audit
+        self.history = history
+        self.workers = workers
+        self.jitter = jitter
+        self.poll_interval = poll_interval
+        self.webhook = webhook
+        self.webhook_timeout = webhook_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='audit-schedule')
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        """Scheduled audits in progress"""
+        return len(self._running)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='audit-scheduler', daemon=True)
+                self._thread.start()
+        return self
+
+    def wake(self):
+        """Check for due schedules now, e.g. after registering one"""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                delay = self.dispatch()
+            except sqlite3.Error:
+                logger.exception('Cannot read the schedule database')
+                delay = self.poll_interval
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def dispatch(self, now=None):
+        """Start the audits of due schedules that fit in the free workers; returns seconds until the next check"""
+        now = now or time.time()
+        with self._lock:
+            free = self.workers - len(self._running)
+        if free > 0:
+            for schedule_id, next_run, interval in self.store.due(now, free):
+                # Later runs keep the interval on average but not the phase of their neighbours
+                new_next_run = now + interval * random.uniform(1 - self.jitter / 2, 1 + self.jitter / 2)
+                if not self.store.claim(schedule_id, next_run, new_next_run):
+                    continue
+                with self._lock:
+                    # A run that outlasts its interval skips the next one instead of overlapping it
+                    if schedule_id in self._running:
+                        continue
+                    self._running.add(schedule_id)
+                self._executor.submit(self._run, schedule_id)
+        with self._lock:
+            if len(self._running) >= self.workers:
+                # Finished runs wake the loop, so waiting for a free worker needs no polling
+                return self.poll_interval
+        next_due = self.store.next_due()
+        if next_due is None:
+            return self.poll_interval
+        return min(max(next_due - time.time(), 0.05), self.poll_interval)
+
+    def _run(self, schedule_id):
+        try:
+            schedule = self.store.get(schedule_id)
+            if schedule is not None and schedule['enabled']:
+                self.run(schedule)
+        except Exception:
+            logger.exception('Scheduled audit %s failed', schedule_id)
+        finally:
+            with self._lock:
+                self._running.discard(schedule_id)
+            self._wake.set()
+
+    def run(self, schedule):
+        """Audit one schedule now, record the result and deliver its alerts; returns the alerts"""
+        ran_at = time.time()
+        audit_id = uuid.uuid4().hex
+        try:
+            results = self.audit(schedule['url'], categories=schedule['categories'])
+        except Exception as e:
+            results = {'url': schedule['url'], 'error': f'Audit failed: {str(e)}'}
+        recorded = self.history.record(audit_id, results)
+        METRICS.increment('scheduled_audits_total', result='error' if results.get('error') else 'ok')
+
+        alerts = [self.store.add_alert(schedule, kind, audit_id if recorded else None, details)
+                  for kind, details in self.evaluate(schedule, audit_id if recorded else None, results)]
+        baseline = audit_id if recorded and not results.get('error') else None
+        self.store.finish(schedule['id'], ran_at, baseline, results.get('error'))
+        for alert in alerts:
+            METRICS.increment('alerts_total', kind=alert['kind'])
+            self.deliver(schedule, alert)
+        return alerts
+
+    def evaluate(self, schedule, audit_id, results):
+        """``(kind, details)`` of each alert raised by this run compared with the previous one"""
+        if results.get('error'):
+            # Only the first failure of a series alerts
+            if schedule['last_error'] is None:
+                yield AUDIT_FAILED, {'error': results['error']}
+            return
+
+        diff = None
+        if audit_id and schedule['last_audit_id']:
+            diff = self.history.diff(schedule['last_audit_id'], audit_id)
+        for category, threshold in schedule['thresholds'].items():
+            if category not in results:
+                continue
+            score = results[category]['score']
+            previous = diff['scores'][category]['from'] if diff and category in diff['scores'] else None
+            # Alert when the score drops below the threshold, not on every run it stays there
+            if score < threshold and (previous is None or previous >= threshold):
+                yield SCORE_BELOW_THRESHOLD, {'category': category, 'score': score, 'threshold': threshold,
+                                              'previous': previous}
+        if diff and diff['added']:
+            yield NEW_FINDINGS, {'findings': [{'category': f['category'], 'name': f['name'],
+                                               'severity': f.get('severity'), 'description': f['description']}
+                                              for f in diff['added']]}
+
+    def deliver(self, schedule, alert):
+        """POST the alert to the schedule's webhook; the outcome is stored with the alert"""
+        webhook = schedule['webhook'] or self.webhook
+        if not webhook:
+            return
+        try:
+            response = requests.post(webhook, json=alert, timeout=self.webhook_timeout)
+            delivery = f'HTTP {response.status_code}'
+        except requests.RequestException as e:
+            delivery = f'Failed: {e.__class__.__name__}'
+        self.store.set_delivery(alert['id'], delivery)
+        alert['delivery'] = delivery
+
+    def shutdown(self, wait=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
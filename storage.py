@@ -0,0 +1,137 @@
+"""Building blocks shared by the in-process caches and the SQLite stores
+
+``LRUCache`` is the bounded map behind the audit, asset, PDF, TLS and
+in-memory result caches. ``SQLiteDatabase`` is the base of the result
+store, the audit history and the schedule store: one WAL-mode connection
+per process, shared by its threads under a lock.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and, optionally, total size
+
+    ``sizeof`` measures a value against ``max_bytes``; a value that alone
+    exceeds it is not stored. An entry put with a ``ttl`` is treated as
+    missing once that many seconds have passed. ``hits`` and ``misses``
+    count lookups.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at or None, value, size)
+        self._size = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[0] is not None and entry[0] < time.time()):
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl=None):
+        """Store ``value`` as the most recently used entry; false if it is too large to keep"""
+        size = self.sizeof(value) if self.sizeof else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        with self._lock:
+            self._pop_locked(key)
+            self._entries[key] = (None if ttl is None else time.time() + ttl, value, size)
+            self._size += size
+            while ((self.max_entries is not None and len(self._entries) > self.max_entries)
+                   or (self.max_bytes is not None and self._size > self.max_bytes)):
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+        return True
+
+    def get_or_put(self, key, create, ttl=None):
+        """``(value, cached)``: the live value of ``key``, or ``create()`` stored in its place
+
+        The lookup and ``create()`` happen under the cache lock, so
+        concurrent callers for one key share a single created value.
+        """
+        with self._lock:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value, True
+            value = create()
+            self.put(key, value, ttl)
+            return value, False
+
+    def expire(self, key, value, ttl):
+        """Let ``key`` live at most ``ttl`` more seconds if it still holds ``value``"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is value:
+                expires_at = time.time() + ttl
+                if entry[0] is None or expires_at < entry[0]:
+                    self._entries[key] = (expires_at, value, entry[2])
+
+    def pop(self, key):
+        with self._lock:
+            self._pop_locked(key)
+
+    def evict_expired(self):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (expires_at, _, _) in self._entries.items()
+                        if expires_at is not None and expires_at < now]:
+                self._pop_locked(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _pop_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+
+class SQLiteDatabase:
+    """A SQLite file in WAL mode behind one connection shared by the process's threads
+
+    Subclasses list their ``CREATE`` statements in ``SCHEMA``. Statements
+    that need more than one call (a transaction, ``lastrowid``) hold
+    ``_lock`` and use ``_conn`` directly.
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,42 @@
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fixture_server import FixtureServer  # noqa: E402
+
+
+@pytest.fixture
+def fixture_server():
+    with FixtureServer() as server:
+        yield server
+
+
+@pytest.fixture
+def tls_server():
+    with FixtureServer(tls=True) as server:
+        yield server
+
+
+@pytest.fixture
+def closed_url():
+    """URL of a local port nothing listens on, so fetching it fails fast"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/page'
+
+
+@pytest.fixture
+def client(tmp_path):
+    from app import create_app
+    app = create_app({'TESTING': True, 'SECRET_KEY': 'test',
+                      'RESULT_STORE_URL': f'sqlite:///{tmp_path / "results.db"}',
+                      'HISTORY_DB': str(tmp_path / 'history.db'),
+                      'SCHEDULE_DB': str(tmp_path / 'schedules.db')})
+    return app.test_client()
@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.mark.parametrize('options', [{'max_pages': None}, {'concurrency': [4]}, {'rate': -1}, {'rate': 0}])
+def test_crawl_rejects_bad_options(client, fixture_server, options):
+    response = client.post('/api/crawl', json={'url': fixture_server.url(), **options})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_crawl_clamps_limits_to_one(client, fixture_server):
+    response = client.post('/api/crawl', json={'url': fixture_server.url(), 'max_pages': -5, 'concurrency': -2,
+                                               'format': 'json'})
+    assert response.status_code == 200
+    assert len(response.get_json()['audits']) == 1
+
+
+@pytest.mark.parametrize('method, path', [('post', '/api/audits'), ('post', '/api/batch'), ('post', '/api/crawl'),
+                                          ('post', '/api/schedules')])
+def test_non_object_json_body_is_rejected(client, method, path):
+    response = getattr(client, method)(path, json=['http://example.com/'])
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Request body must be a JSON object'}
+
+
+def test_schedule_patch_rejects_non_object_json(client):
+    created = client.post('/api/schedules', json={'url': 'http://example.com/', 'interval': '1h'})
+    assert created.status_code == 201
+    path = created.headers['Location']
+    assert client.patch(path, json=[False]).status_code == 400
+    assert client.patch(path, json={'enabled': False}).get_json()['enabled'] is False
+
+
+def test_schedule_with_non_object_thresholds_is_rejected(client):
+    response = client.post('/api/schedules', json={'url': 'http://example.com/', 'thresholds': [1]})
+    assert response.status_code == 400
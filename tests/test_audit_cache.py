@@ -0,0 +1,52 @@
+from audit import comprehensive_website_audit
+from audit_cache import HIT, MISS, REVALIDATED, UNCHANGED, AuditCache
+from fetcher import Fetcher
+
+from fixture_server import FixtureServer
+
+
+def audit(url, cache, fetcher):
+    return comprehensive_website_audit(url, fetcher=fetcher, cache=cache)
+
+
+def test_fresh_entry_is_served_without_fetching(fixture_server):
+    cache = AuditCache(ttl=60)
+    fetcher = Fetcher()
+    first = audit(fixture_server.url(), cache, fetcher)
+    fixture_server.httpd.header_profile = 'secure'
+    second = audit(fixture_server.url(), cache, fetcher)
+    assert first['cache']['status'] == MISS
+    assert second['cache']['status'] == HIT
+    assert second['security'] == first['security']
+
+
+def test_stale_entry_with_same_body_reuses_unaffected_checks(fixture_server):
+    cache = AuditCache(ttl=0)
+    fetcher = Fetcher()
+    first = audit(fixture_server.url(), cache, fetcher)
+    fixture_server.httpd.header_profile = 'secure'
+    second = audit(fixture_server.url(), cache, fetcher)
+
+    assert second['cache']['status'] == UNCHANGED
+    checks = second['checks']
+    # The body did not change, the headers did
+    assert checks['sql_error_disclosure']['reused']
+    assert checks['image_alt_text_a11y']['reused']
+    assert not checks['security_headers']['reused']
+    assert second['reuse']['reused'] > 0 and second['reuse']['recomputed'] > 0
+    assert second['security']['score'] > first['security']['score']
+    assert second['seo'] == first['seo']
+
+
+def test_stale_entry_is_revalidated_with_etag():
+    with FixtureServer(etags=True) as server:
+        cache = AuditCache(ttl=0)
+        fetcher = Fetcher()
+        first = audit(server.url(), cache, fetcher)
+        second = audit(server.url(), cache, fetcher)
+    assert first['cache']['status'] == MISS
+    assert second['cache']['status'] == REVALIDATED
+    assert second['fetch']['status_code'] == 200
+    assert second['fetch']['bytes'] == first['fetch']['bytes']
+    assert second['accessibility'] == first['accessibility']
+    assert cache.hit_rate() == 0.5
@@ -0,0 +1,45 @@
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+
+from batch import run_batch
+from fetcher import Fetcher
+
+
+def test_run_batch_limits_concurrent_audits_per_host(fixture_server):
+    port = fixture_server.httpd.server_address[1]
+    urls = [f'http://{host}:{port}/page?latency=0.05&n={i}' for host in ('127.0.0.1', 'localhost') for i in range(6)]
+    fetcher = Fetcher()
+    lock = threading.Lock()
+    active = Counter()
+    peak = Counter()
+
+    def audit(url):
+        host = urlparse(url).netloc
+        with lock:
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            peak['all'] = max(peak['all'], sum(active.values()))
+        try:
+            return {'url': url, 'status_code': fetcher.fetch(url).status_code}
+        finally:
+            with lock:
+                active[host] -= 1
+
+    results = list(run_batch(urls, audit, concurrency=8, per_host=2))
+    fetcher.close()
+    assert sorted(r['url'] for r in results) == sorted(urls)
+    assert all(r['status_code'] == 200 for r in results)
+    assert peak[f'127.0.0.1:{port}'] == 2
+    assert peak[f'localhost:{port}'] == 2
+    # Both hosts were audited side by side
+    assert peak['all'] > 2
+
+
+def test_run_batch_reports_failed_audits(closed_url):
+    def audit(url):
+        return {'url': url, 'status_code': Fetcher().fetch(url).status_code}
+
+    [result] = run_batch([closed_url], audit)
+    assert result['url'] == closed_url
+    assert result['error'].startswith('Audit failed:')
@@ -0,0 +1,36 @@
+from functools import partial
+
+from audit import audit_page
+from crawler import Crawler
+from fetcher import Fetcher
+
+from fixture_server import FixtureServer
+
+
+def crawl(start_url, **options):
+    fetcher = Fetcher()
+    crawler = Crawler(start_url, partial(audit_page, fetcher=fetcher), fetcher=fetcher, rate=0, **options)
+    pages = {results['url']: depth for depth, results in crawler.crawl()}
+    return crawler, pages
+
+
+def test_crawl_stays_on_the_start_origin(fixture_server):
+    crawler, pages = crawl(fixture_server.url(links=3, external=2), max_depth=2)
+    assert pages == {fixture_server.url(links=3, external=2): 0,
+                     **{fixture_server.url(links=0, n=i): 1 for i in range(3)}}
+    assert crawler.summary.to_dict()['pages_audited'] == 4
+
+
+def test_crawl_respects_max_pages(fixture_server):
+    _, pages = crawl(fixture_server.url(links=10), max_pages=3)
+    assert len(pages) == 3
+
+
+def test_crawl_skips_pages_disallowed_by_robots():
+    with FixtureServer(robots='User-agent: *\nDisallow: /page?links=0&n=1\n') as server:
+        crawler, pages = crawl(server.url(links=3))
+        _, unrestricted = crawl(server.url(links=3), obey_robots=False)
+    assert server.url(links=0, n=1) not in pages
+    assert len(pages) == 3
+    assert crawler.summary.skipped_robots == 1
+    assert server.url(links=0, n=1) in unrestricted
@@ -0,0 +1,67 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+
+from audit import comprehensive_website_audit
+from checks import CATEGORIES
+from exports import export
+from fetcher import Fetcher
+
+
+@pytest.fixture
+def audits(fixture_server, closed_url):
+    fetcher = Fetcher()
+    return [comprehensive_website_audit(url, fetcher=fetcher) for url in (fixture_server.url(), closed_url)]
+
+
+def finding_count(audits):
+    return sum(len(audit[c]['findings']) for audit in audits for c in CATEGORIES if c in audit)
+
+
+def test_json_export_round_trips(audits):
+    document = json.loads(''.join(export(audits, 'json')))
+    assert [a['url'] for a in document['audits']] == [a['url'] for a in audits]
+    assert sum(len(a['findings']) for a in document['audits']) == finding_count(audits)
+    assert document['audits'][1]['error']
+    refs = {f['fix_ref'] for a in document['audits'] for f in a['findings']}
+    assert refs == set(document['fix_steps'])
+
+
+def test_ndjson_export_has_one_record_per_line(audits):
+    records = [json.loads(line) for line in ''.join(export(audits, 'ndjson')).splitlines()]
+    assert sum(r['type'] == 'audit' for r in records) == 2
+    assert sum(r['type'] == 'finding' for r in records) == finding_count(audits)
+    defined = set()
+    for record in records:
+        if record['type'] == 'fix_steps':
+            defined.add(record['fix_ref'])
+        elif record['type'] == 'finding':
+            assert record['fix_ref'] in defined
+
+
+def test_csv_export_has_a_row_per_finding_and_failed_audit(audits):
+    rows = list(csv.DictReader(StringIO(''.join(export(audits, 'csv')))))
+    assert len(rows) == finding_count(audits) + 1
+    assert [r['url'] for r in rows if r['error']] == [audits[1]['url']]
+    first_rows = {}
+    for row in rows:
+        if row['fix_ref']:
+            first_rows.setdefault(row['fix_ref'], row)
+    assert all(row['fix_steps'] for row in first_rows.values())
+
+
+def test_sarif_export_is_valid_sarif(audits):
+    sarif = json.loads(''.join(export(audits, 'sarif')))
+    assert sarif['version'] == '2.1.0'
+    [run] = sarif['runs']
+    rules = run['tool']['driver']['rules']
+    assert len(run['results']) == finding_count(audits)
+    for result in run['results']:
+        assert rules[result['ruleIndex']]['id'] == result['ruleId']
+        assert result['level'] in ('error', 'warning', 'note')
+        assert result['locations'][0]['physicalLocation']['artifactLocation']['uri'] == audits[0]['url']
+    [invocation] = run['invocations']
+    assert invocation['executionSuccessful'] is False
+    assert len(invocation['toolExecutionNotifications']) == 1
@@ -0,0 +1,16 @@
+import warnings
+
+from urllib3.exceptions import InsecureRequestWarning
+
+from fetcher import Fetcher
+
+
+def test_unverified_fetch_does_not_warn(tls_server):
+    fetcher = Fetcher()
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            response = fetcher.fetch(tls_server.url())
+    finally:
+        fetcher.close()
+    assert response.status_code == 200
+    assert not [w for w in caught if issubclass(w.category, InsecureRequestWarning)]
@@ -0,0 +1,46 @@
+from history import AuditHistory
+
+
+def result(url, load_time, findings=()):
+    page_load = {'name': 'Moderate Page Load Time', 'description': f'Page takes {load_time} seconds to load',
+                 'fix_steps': [], 'severity': 'medium', 'deduction': 5}
+    return {'url': url, 'scan_time': '2026-01-01 00:00:00',
+            'security': {'score': 90, 'findings': list(findings)},
+            'performance': {'score': 95, 'findings': [page_load]},
+            'seo': {'score': 100, 'findings': []},
+            'accessibility': {'score': 100, 'findings': []}}
+
+
+def test_diff_ignores_changed_measurements(tmp_path):
+    history = AuditHistory(str(tmp_path / 'history.db'))
+    header = {'name': 'Missing Header', 'description': 'X-Frame-Options is not set', 'fix_steps': []}
+    history.record('a', result('https://example.com', '1.61'))
+    history.record('b', result('https://example.com', '1.60', [header, header]))
+
+    diff = history.diff('a', 'b')
+
+    assert [f['name'] for f in diff['added']] == ['Missing Header', 'Missing Header']
+    assert diff['resolved'] == []
+    assert diff['unchanged'] == 1
+
+
+def audit_with_headers(url, headers):
+    from checks import AuditContext, run_checks
+    from fetcher import FetchResult
+    from html_index import build_index
+    content = b'<html><head><title>Home</title></head><body></body></html>'
+    response = FetchResult(url, url, 200, headers, content)
+    results = run_checks(AuditContext(url, response, build_index(content)), ['security'])
+    return dict(results, url=url, scan_time='2026-01-01 00:00:00')
+
+
+def test_diff_tells_findings_with_the_same_name_apart(tmp_path):
+    history = AuditHistory(str(tmp_path / 'history.db'))
+    history.record('a', audit_with_headers('https://example.com', {'Server': 'nginx'}))
+    history.record('b', audit_with_headers('https://example.com', {'X-Powered-By': 'PHP/5.4'}))
+
+    diff = history.diff('a', 'b')
+
+    assert [(f['name'], f['id']) for f in diff['added']] == [
+        ('Server Information Disclosure', 'server_disclosure:X-Powered-By')]
+    assert [f['id'] for f in diff['resolved']] == ['server_disclosure:Server']
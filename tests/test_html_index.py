@@ -0,0 +1,21 @@
+import pytest
+
+from fetcher import declared_charset
+from html_index import BACKENDS, build_index
+
+PAGE = '<html><head><title>Café Ünïcødé ééééé</title><meta name="description" content="Crème brûlée"></head></html>'
+
+
+def test_declared_charset():
+    assert declared_charset('text/html; charset="UTF-8"') == 'utf-8'
+    # requests would fall back to ISO-8859-1 here; no declaration leaves the parser to sniff <meta charset>
+    assert declared_charset('text/html') is None
+    assert declared_charset('text/html; charset=bogus') is None
+
+
+@pytest.mark.skipif('lxml' not in BACKENDS, reason='lxml is not installed')
+def test_backends_agree_on_header_charset():
+    content = PAGE.encode('utf-8')
+    indexes = [build_index(content, declared_charset('text/html; charset=utf-8'), backend)
+               for backend in ('lxml', 'html.parser')]
+    assert [(i.title, i.meta_description) for i in indexes] == [('Café Ünïcødé ééééé', 'Crème brûlée')] * 2
@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+from jobs import DONE, RUNNING, JobQueue, QueueFull
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.status != DONE and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.status == DONE
+
+
+def test_submit_is_refused_when_estimated_wait_exceeds_max_wait():
+    queue = JobQueue(workers=1, max_queue=10, max_wait=0.5)
+    release = threading.Event()
+    try:
+        wait_for(queue.submit(time.sleep, 0.2))
+        blocker = queue.submit(release.wait)
+        while blocker.status != RUNNING:
+            time.sleep(0.01)
+        # Each job waiting adds ~0.2s for the single worker
+        for _ in range(3):
+            queue.submit(time.sleep, 0)
+        assert 0.4 < queue.estimated_wait < 0.8
+        with pytest.raises(QueueFull, match='estimated wait'):
+            queue.submit(time.sleep, 0)
+        assert queue.depth == 3
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_estimated_wait_is_zero_without_history():
+    queue = JobQueue(workers=2, max_queue=4, max_wait=0.001)
+    try:
+        assert queue.estimated_wait == 0.0
+        wait_for(queue.submit(lambda: None))
+    finally:
+        queue.shutdown()
@@ -0,0 +1,34 @@
+import json
+
+from patterns import Signature, SignatureSet
+
+
+def test_regex_rule_with_capturing_group(tmp_path):
+    rules = tmp_path / 'rules.json'
+    rules.write_text(json.dumps([
+        {'id': 'fx', 'pattern': '(fixture) page', 'regex': True},
+        {'id': 'num', 'pattern': r'order (\d+)', 'regex': True},
+    ]))
+    signatures = SignatureSet()
+    signatures.add(Signature('lit', 'fixture'))
+    signatures.load_rules(str(rules))
+
+    found = signatures.scan(b'<p>A Fixture Page for order 42</p>')
+
+    assert found['fx']['count'] == 1
+    assert found['fx']['matches'][0]['offset'] == 5
+    assert found['num']['count'] == 1
+    assert found['num']['matches'][0]['offset'] == 22
+    assert found['lit']['count'] == 1
+
+
+def test_overlapping_regex_rules_both_match():
+    signatures = SignatureSet()
+    signatures.add(Signature('short', 'mysql', regex=True))
+    signatures.add(Signature('long', r'mysql_err\w+', regex=True))
+
+    found = signatures.scan(b'xx MySQL_Error')
+
+    assert found['short']['matches'][0]['offset'] == 3
+    assert found['long']['matches'][0]['offset'] == 3
+    assert found['long']['matches'][0]['context'] == 'xx MySQL_Error'
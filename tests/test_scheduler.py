@@ -0,0 +1,62 @@
+from functools import partial
+
+import pytest
+
+from audit import comprehensive_website_audit
+from fetcher import Fetcher
+from history import AuditHistory
+from scheduler import (AUDIT_FAILED, NEW_FINDINGS, SCORE_BELOW_THRESHOLD, ScheduleStore, Scheduler,
+                       parse_thresholds)
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = Scheduler(ScheduleStore(str(tmp_path / 'schedules.db')),
+                          partial(comprehensive_website_audit, fetcher=Fetcher()),
+                          AuditHistory(str(tmp_path / 'history.db')), workers=1)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def run(scheduler, schedule):
+    alerts = scheduler.run(scheduler.store.get(schedule['id']))
+    return {alert['kind']: alert['details'] for alert in alerts}
+
+
+def test_parse_thresholds_accepts_dict_and_string():
+    assert parse_thresholds({'Security': '80'}) == {'security': 80}
+    assert parse_thresholds('security=80, seo=70') == {'security': 80, 'seo': 70}
+
+
+@pytest.mark.parametrize('value', [[1], 5, ['security=80']])
+def test_parse_thresholds_rejects_other_types(value):
+    with pytest.raises(ValueError):
+        parse_thresholds(value)
+
+
+def test_alerts_when_a_score_drops_below_its_threshold(scheduler, fixture_server):
+    schedule = scheduler.store.add(fixture_server.url(), '1h', thresholds='security=60')
+    fixture_server.httpd.header_profile = 'secure'
+    assert run(scheduler, schedule) == {}
+
+    fixture_server.httpd.header_profile = 'bare'
+    alerts = run(scheduler, schedule)
+    assert set(alerts) == {SCORE_BELOW_THRESHOLD, NEW_FINDINGS}
+    assert alerts[SCORE_BELOW_THRESHOLD]['category'] == 'security'
+    assert alerts[SCORE_BELOW_THRESHOLD]['score'] < 60 <= alerts[SCORE_BELOW_THRESHOLD]['previous']
+    assert {f['name'] for f in alerts[NEW_FINDINGS]['findings']} >= {'Missing Content-Security-Policy',
+                                                                     'Missing X-Frame-Options'}
+    assert all(f['category'] == 'security' for f in alerts[NEW_FINDINGS]['findings'])
+
+    # Staying below the threshold with the same findings raises nothing new
+    assert run(scheduler, schedule) == {}
+    assert [a['kind'] for a in scheduler.store.alerts(schedule['id'])] == [NEW_FINDINGS, SCORE_BELOW_THRESHOLD]
+
+
+def test_only_the_first_failure_in_a_row_alerts(scheduler, closed_url):
+    schedule = scheduler.store.add(closed_url, '1h')
+    alerts = run(scheduler, schedule)
+    assert list(alerts) == [AUDIT_FAILED]
+    assert alerts[AUDIT_FAILED]['error'].startswith('Failed to access website')
+    assert run(scheduler, schedule) == {}
+    assert scheduler.store.get(schedule['id'])['runs'] == 2
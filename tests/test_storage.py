@@ -0,0 +1,51 @@
+import time
+
+from storage import LRUCache, SQLiteDatabase
+
+
+def test_lru_evicts_least_recently_used_by_count_and_size():
+    cache = LRUCache(max_entries=3, max_bytes=10, sizeof=len)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    assert cache.get('a') == b'1234'
+    cache.put('c', b'1234')
+    assert cache.get('b') is None
+    assert cache.get('a') and cache.get('c')
+    assert not cache.put('huge', b'x' * 11)
+    assert len(cache) == 2
+
+
+def test_lru_entries_expire_after_their_ttl():
+    cache = LRUCache(max_entries=10)
+    cache.put('short', 1, ttl=0.05)
+    cache.put('forever', 2)
+    time.sleep(0.1)
+    assert cache.get('short') is None
+    assert cache.get('forever') == 2
+    cache.evict_expired()
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_get_or_put_creates_once_and_expire_shortens_the_ttl():
+    cache = LRUCache(max_entries=10)
+    created = []
+    value, cached = cache.get_or_put('k', lambda: created.append(1) or 'v', ttl=60)
+    assert (value, cached) == ('v', False)
+    assert cache.get_or_put('k', lambda: created.append(1) or 'w', ttl=60) == ('v', True)
+    assert created == [1]
+    cache.expire('k', 'other', 0)
+    assert cache.get('k') == 'v'
+    cache.expire('k', 'v', -1)
+    assert cache.get('k') is None
+
+
+def test_sqlite_database_creates_schema(tmp_path):
+    class Store(SQLiteDatabase):
+        SCHEMA = ['CREATE TABLE IF NOT EXISTS items (name TEXT PRIMARY KEY)']
+
+    store = Store(str(tmp_path / 'items.db'))
+    assert store._execute('INSERT INTO items (name) VALUES (?)', ('a',)) == 1
+    assert store._query('SELECT name FROM items') == [('a',)]
+    assert store._query('PRAGMA journal_mode') == [('wal',)]
+    store.close()
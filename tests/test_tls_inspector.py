@@ -0,0 +1,72 @@
+import datetime
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from checks import AuditContext
+from checks.tls import tls_certificate, tls_certificate_expiry, tls_handshake, tls_hostname
+from fixture_server import FixtureServer
+from tls_inspector import TlsCache, TlsInspector
+
+
+def names(check, info):
+    return [f['name'] for f in check(AuditContext('https://example.com', None, None, tls=info))]
+
+
+def write_certificate(tmp_path, common_name, san, not_before, not_after):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number()).not_valid_before(not_before).not_valid_after(not_after)
+            .add_extension(x509.SubjectAlternativeName([x509.DNSName(n) for n in san]), critical=False)
+            .sign(key, hashes.SHA256()))
+    certfile, keyfile = tmp_path / 'cert.pem', tmp_path / 'key.pem'
+    certfile.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    keyfile.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                          serialization.NoEncryption()))
+    return str(certfile), str(keyfile)
+
+
+def test_self_signed_server(tls_server):
+    info = TlsInspector().inspect('localhost', tls_server.httpd.server_address[1])
+
+    assert info['error'] is None
+    assert info['protocol'] in ('TLSv1.2', 'TLSv1.3')
+    assert info['verified'] is False
+    assert info['hostname_match'] is True
+    assert info['certificate']['self_signed'] is True
+    assert set(info['certificate']['san']) == {'localhost', '127.0.0.1'}
+    assert names(tls_certificate, info) == ['Untrusted TLS Certificate']
+    assert names(tls_certificate_expiry, info) == ['TLS Certificate Expiring Soon']
+    assert names(tls_hostname, info) == []
+
+
+def test_expired_certificate_for_another_host(tmp_path):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certfile, keyfile = write_certificate(tmp_path, 'other.example', ['other.example'],
+                                          now - datetime.timedelta(days=30), now - datetime.timedelta(days=2))
+    with FixtureServer(tls=True, certfile=certfile, keyfile=keyfile) as server:
+        info = TlsInspector().inspect('localhost', server.httpd.server_address[1])
+
+    assert info['certificate']['san'] == ['other.example']
+    assert names(tls_certificate_expiry, info) == ['TLS Certificate Expired']
+    # Self-signed as well: OpenSSL reports that before the expiry, so both findings apply
+    assert names(tls_certificate, info) == ['Untrusted TLS Certificate']
+    assert names(tls_hostname, info) == ['TLS Certificate Hostname Mismatch']
+
+
+def test_failed_inspections_are_retried():
+    inspector = TlsInspector(cache=TlsCache(error_ttl=0))
+    first = inspector.start('https://127.0.0.1:1/')
+    assert first.result()['error']
+    assert names(tls_handshake, first.result()) == ['TLS Handshake Failed']
+    assert inspector.start('https://127.0.0.1:1/').cached is False
+
+
+def test_successful_inspections_are_shared(tls_server):
+    inspector = TlsInspector()
+    inspector.start(tls_server.url()).result()
+    assert inspector.start(tls_server.url('/other')).cached is True
+    assert inspector.start(tls_server.url().replace('https', 'http', 1)) is None
@@ -0,0 +1,246 @@
+"""TLS and DNS inspection of the host serving a page
+
+Pages are fetched with ``verify=False`` so a broken certificate does not
+stop the audit; ``TlsInspector`` reports what the fetch ignores. For an
+``https`` URL it resolves the host (timed), opens a connection and performs
+a verifying TLS handshake (timed), and records the negotiated protocol and
+cipher, whether the chain is trusted, the certificate's validity window and
+whether it matches the host name.
+
+Inspections run on a small thread pool, so an audit starts one before its
+page fetch and collects it afterwards. Results are cached per ``host:port``
+in a ``TlsCache``, and audits of the same host that overlap share the
+inspection in flight, so a batch or crawl over one site does a single
+handshake analysis per TTL.
+"""
+import ipaddress
+import socket
+import ssl
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+
+from storage import LRUCache
+
+# Failed inspections are often transient (a timeout, a reset); they are retried after this many seconds
+ERROR_TTL = 60
+
+
+class TlsCache:
+    """Thread-safe LRU of inspections per ``host:port`` with a TTL
+
+    Entries are futures, so a second audit of a host whose inspection is
+    still running waits for it instead of starting another. Inspections
+    that failed are only kept for ``error_ttl`` seconds.
+    """
+
+    def __init__(self, ttl=3600, max_entries=1000, error_ttl=ERROR_TTL):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_entries = max_entries
+        self._entries = LRUCache(max_entries=max_entries)
+
+    @property
+    def hits(self):
+        return self._entries.hits
+
+    @property
+    def misses(self):
+        return self._entries.misses
+
+    def get_or_start(self, key, start):
+        """``(future, cached)``: the cached inspection of ``key``, or ``start()`` if there is none"""
+        future, cached = self._entries.get_or_put(key, start, ttl=self.ttl)
+        if not cached:
+            future.add_done_callback(lambda done: self._expire_failed(key, done))
+        return future, cached
+
+    def _expire_failed(self, key, future):
+        if future.exception() is None and not future.result()['error']:
+            return
+        self._entries.expire(key, future, self.error_ttl)
+
+
+class TlsInspector:
+    """Inspects certificates, protocol and cipher of hosts concurrently with page fetches"""
+
+    def __init__(self, cache=None, timeout=5.0, concurrency=4):
+        self.cache = cache if cache is not None else TlsCache()
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='audit-tls')
+
+    def start(self, url):
+        """Begin (or join) the inspection of ``url``'s host; ``None`` for non-HTTPS URLs
+
+        The returned handle's ``result()`` is the inspection dict, with
+        ``cached`` set when it was reused from an earlier audit.
+        """
+        parts = urlsplit(url)
+        if parts.scheme != 'https' or not parts.hostname:
+            return None
+        try:
+            port = parts.port or 443
+        except ValueError:
+            return None
+        host = parts.hostname
+        future, cached = self.cache.get_or_start(f'{host}:{port}',
+                                                 lambda: self._executor.submit(self.inspect, host, port))
+        return _Pending(future, cached)
+
+    def inspect(self, host, port=443):
+        """Resolve, connect and handshake with ``host:port``; never raises"""
+        info = {'host': host, 'port': port, 'addresses': [], 'dns_time': None, 'connect_time': None,
+                'handshake_time': None, 'protocol': None, 'cipher': None, 'cipher_bits': None, 'verified': False,
+                'verify_error': None, 'verify_code': None, 'hostname_match': None, 'certificate': None,
+                'error': None}
+        try:
+            start = time.perf_counter()
+            addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            info['dns_time'] = round(time.perf_counter() - start, 6)
+            info['addresses'] = list(OrderedDict.fromkeys(a[4][0] for a in addresses))
+            address = addresses[0][4][:2]
+
+            context = ssl.create_default_context()
+            # Hostname matching is reported separately from chain trust
+            context.check_hostname = False
+            try:
+                tls_socket = self._handshake(context, address, host, info)
+                info['verified'] = True
+            except ssl.SSLCertVerificationError as e:
+                info['verify_error'] = e.verify_message
+                info['verify_code'] = e.verify_code
+                # Handshake again without verification to see what the server presents
+                context = ssl.create_default_context()
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+                tls_socket = self._handshake(context, address, host, info)
+
+            with tls_socket:
+                info['protocol'] = tls_socket.version()
+                cipher = tls_socket.cipher()
+                if cipher:
+                    info['cipher'], info['cipher_bits'] = cipher[0], cipher[2]
+                if info['verified']:
+                    cert = tls_socket.getpeercert()
+                else:
+                    cert = _decode_der(tls_socket.getpeercert(binary_form=True))
+            if cert:
+                info['certificate'] = summarize_certificate(cert)
+                info['hostname_match'] = hostname_matches(host, cert)
+        except (OSError, ssl.SSLError, ValueError) as e:
+            info['error'] = str(e) or e.__class__.__name__
+        return info
+
+    def _handshake(self, context, address, host, info):
+        start = time.perf_counter()
+        sock = socket.create_connection(address, timeout=self.timeout)
+        connected = time.perf_counter()
+        try:
+            tls_socket = context.wrap_socket(sock, server_hostname=host)
+        except BaseException:
+            sock.close()
+            raise
+        info['connect_time'] = round(connected - start, 6)
+        info['handshake_time'] = round(time.perf_counter() - connected, 6)
+        return tls_socket
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class _Pending:
+    def __init__(self, future, cached):
+        self.future = future
+        self.cached = cached
+
+    def result(self):
+        return dict(self.future.result(), cached=self.cached)
+
+
+def _decode_der(der):
+    """Decode a certificate the handshake did not verify into the ``getpeercert()`` dict shape"""
+    if not der:
+        return None
+    try:
+        cert = x509.load_der_x509_certificate(der)
+    except ValueError:
+        return None
+
+    def rdns(name):
+        fields = {NameOID.COMMON_NAME: 'commonName', NameOID.ORGANIZATION_NAME: 'organizationName'}
+        return tuple(((fields[a.oid], a.value),) for a in name if a.oid in fields)
+
+    def timestamp(value):
+        return value.strftime('%b %d %H:%M:%S %Y GMT')
+
+    try:
+        extension = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName).value
+        san = tuple([('DNS', name) for name in extension.get_values_for_type(x509.DNSName)]
+                    + [('IP Address', str(ip)) for ip in extension.get_values_for_type(x509.IPAddress)])
+    except x509.ExtensionNotFound:
+        san = ()
+    # not_valid_*_utc appeared in cryptography 42
+    not_before = getattr(cert, 'not_valid_before_utc', None) or cert.not_valid_before
+    not_after = getattr(cert, 'not_valid_after_utc', None) or cert.not_valid_after
+    return {'subject': rdns(cert.subject), 'issuer': rdns(cert.issuer), 'notBefore': timestamp(not_before),
+            'notAfter': timestamp(not_after), 'subjectAltName': san}
+
+
+def _name(rdns, field):
+    for rdn in rdns:
+        for key, value in rdn:
+            if key == field:
+                return value
+    return None
+
+
+def summarize_certificate(cert):
+    subject = cert.get('subject', ())
+    issuer = cert.get('issuer', ())
+    return {
+        'subject': _name(subject, 'commonName'),
+        'issuer': _name(issuer, 'commonName') or _name(issuer, 'organizationName'),
+        'self_signed': bool(subject) and subject == issuer,
+        'not_before': ssl.cert_time_to_seconds(cert['notBefore']) if cert.get('notBefore') else None,
+        'not_after': ssl.cert_time_to_seconds(cert['notAfter']) if cert.get('notAfter') else None,
+        'san': [value for kind, value in cert.get('subjectAltName', ()) if kind in ('DNS', 'IP Address')],
+    }
+
+
+def hostname_matches(host, cert):
+    """Whether ``cert`` is valid for ``host`` (RFC 6125: SAN entries, one left-most wildcard label)"""
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        ip = None
+    san = cert.get('subjectAltName', ())
+    if ip is not None:
+        return any(kind == 'IP Address' and ipaddress.ip_address(value.strip()) == ip for kind, value in san)
+
+    names = [value for kind, value in san if kind == 'DNS']
+    if not names:
+        # Only certificates without DNS names fall back to the common name
+        names = [_name(cert.get('subject', ()), 'commonName') or '']
+    host = host.lower().rstrip('.')
+    for name in names:
+        name = name.lower().rstrip('.')
+        if name == host:
+            return True
+        if name.startswith('*.') and '.' in host and host.split('.', 1)[1] == name[2:]:
+            return True
+    return False
+
+
+def summarize_tls(info):
+    """The ``tls`` block of an audit result"""
+    summary = {k: v for k, v in info.items() if k != 'verify_code'}
+    certificate = info['certificate']
+    if certificate and certificate['not_after']:
+        summary['certificate'] = dict(certificate,
+                                      expires=time.strftime('%Y-%m-%d', time.gmtime(certificate['not_after'])),
+                                      days_left=int((certificate['not_after'] - time.time()) // 86400))
+    return summary